@@ -0,0 +1,386 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+from loggings import flush_logs, logger, log_listener
+from main import FULL_REFRESH, INCREMENTAL
+from pipeline_dimensional_data.backends import BACKENDS
+from pipeline_dimensional_data.config_db import reload_settings
+from pipeline_dimensional_data.connection_pool import close_pool, get_pool
+from pipeline_dimensional_data.flow import DimensionalDataFlow
+from pipeline_dimensional_data.raw_data_reader import STREAM_CHUNK_SIZE
+from pipeline_dimensional_data.synthetic_data import expected_load_counts, generate_raw_data, write_raw_data
+from pipeline_dimensional_data.tasks import reset_db
+
+BENCHMARK_DIR = os.path.join("logs", "benchmarks")
+WORK_DIR = os.path.join(".cache", "benchmark")
+
+# Seconds between two samples of the process's resident memory
+MEMORY_SAMPLE_INTERVAL = 0.02
+
+# Group keys of the aggregate tables, checked against a GROUP BY over FactOrders
+AGGREGATE_KEYS = {
+    'AggSalesDayProductCustomer': ['OrderDate', 'ProductKey', 'CustomerKey'],
+    'AggSalesMonthEmployee': ['MonthStart', 'EmployeeKey'],
+    'AggSalesShipperCountry': ['ShipperKey', 'Country'],
+}
+AGGREGATE_MEASURES = ['OrderLines', 'Quantity', 'TotalAmount']
+
+
+def _rss_bytes():
+    """
+    Returns the resident set size of this process, or None where it cannot be read.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+class PeakMemory:
+    """
+    Samples the process's resident memory on a background thread while the block runs.
+
+    Resident memory covers pandas/numpy buffers and the driver alike, which tracemalloc
+    would not, and sampling does not slow the measured code down.
+    """
+
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_bytes = None
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self):
+        rss = _rss_bytes()
+        if rss is not None:
+            self.peak_bytes = max(self.peak_bytes or 0, rss)
+
+    def __enter__(self):
+        self.start_bytes = _rss_bytes()
+        self.peak_bytes = self.start_bytes
+        self._thread = threading.Thread(target=self._sample, name="peak-memory", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._update()
+        return False
+
+    def summary(self) -> dict:
+        if self.peak_bytes is None:
+            return {'peak_rss_mb': None, 'peak_growth_mb': None}
+        return {
+            'peak_rss_mb': round(self.peak_bytes / 2 ** 20, 1),
+            'peak_growth_mb': round((self.peak_bytes - self.start_bytes) / 2 ** 20, 1),
+        }
+
+
+class BenchmarkFlow(DimensionalDataFlow):
+    """
+    DimensionalDataFlow that also measures the peak memory of every task.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peak_memory = {}
+
+    def _run_task(self, name: str, task, *args, **kwargs):
+        with PeakMemory() as memory:
+            status = super()._run_task(name, task, *args, **kwargs)
+        self.peak_memory[name] = memory.summary()
+        return status
+
+
+@contextmanager
+def _quiet_console(quiet: bool):
+    """
+    Raises the console handlers to WARNING while the block runs; the log file keeps
+    every message of the pipeline.
+    """
+    all_handlers = log_listener.handlers if log_listener is not None else logger.handlers
+    handlers = [handler for handler in all_handlers if type(handler) is logging.StreamHandler]
+    levels = [handler.level for handler in handlers]
+    if quiet:
+        flush_logs()
+        for handler in handlers:
+            handler.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        flush_logs()
+        for handler, level in zip(handlers, levels):
+            handler.setLevel(level)
+
+
+def _phase_results(flow: BenchmarkFlow):
+    """
+    Builds one result per task of a finished flow: duration, rows written, rows/sec and
+    peak memory. Staging rows count as the rows written by load_raw_data; error counts
+    are left out since FactError rows are already counted as inserted.
+    """
+    phases = []
+    for row in flow.task_history:
+        if row['parent_task_name'] is not None:
+            continue
+        name = row['task_name']
+        metrics = flow.tasks_status.get(name, {}).get('metrics', {})
+        seconds = metrics.get('wall_seconds') or row['duration_seconds'] or 0
+        rows = (metrics.get('staging_rows_inserted', 0) + metrics.get('staging_rows_failed', 0)
+                + row['rows_inserted'] + row['rows_updated'] + row['rows_expired'])
+        phases.append({
+            'phase': name,
+            'status': row['status'],
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_second': round(rows / seconds, 1) if rows and seconds else None,
+            **flow.peak_memory.get(name, {}),
+        })
+    return phases
+
+
+def _fetch_frame(cursor, sql: str) -> pd.DataFrame:
+    cursor.execute(sql)
+    columns = [column[0] for column in cursor.description]
+    return pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+
+
+def _aggregate_mismatches(cursor) -> dict:
+    """
+    Counts, per aggregate table, the groups missing, extra or with other totals than a
+    GROUP BY over FactOrders. Shipper countries come from the current DimCustomers row
+    of every line, so completed inferred members are checked too.
+    """
+    facts = _fetch_frame(cursor, """
+        SELECT fo.OrderDate, fo.ProductKey, fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey,
+               COALESCE(dc.Country, 'Unknown') AS Country, 1 AS OrderLines, fo.Quantity, fo.TotalAmount
+        FROM FactOrders fo
+        LEFT JOIN DimCustomers dc
+            ON dc.CustomerKey = fo.CustomerKey
+    """)
+    facts['OrderDate'] = pd.to_datetime(facts['OrderDate']).dt.strftime('%Y-%m-%d')
+    facts['MonthStart'] = facts['OrderDate'].str[:8] + '01'
+
+    mismatches = {}
+    for table, keys in AGGREGATE_KEYS.items():
+        expected = facts.dropna(subset=keys).astype({key: str for key in keys})
+        expected = expected.groupby(keys, as_index=False)[AGGREGATE_MEASURES].sum(min_count=1)
+        loaded = _fetch_frame(cursor, f"SELECT {', '.join(keys + AGGREGATE_MEASURES)} FROM {table}")
+        for key in keys:
+            if key in ('OrderDate', 'MonthStart'):
+                loaded[key] = pd.to_datetime(loaded[key]).dt.strftime('%Y-%m-%d')
+        loaded = loaded.astype({key: str for key in keys})
+
+        merged = expected.merge(loaded, on=keys, how='outer', suffixes=('_expected', '_loaded'))
+        differs = pd.Series(False, index=merged.index)
+        for measure in AGGREGATE_MEASURES:
+            expected_values = pd.to_numeric(merged[f'{measure}_expected']).astype(float)
+            loaded_values = pd.to_numeric(merged[f'{measure}_loaded']).astype(float)
+            # A group on one side only leaves NaN on the other, which never compares equal
+            same = ((expected_values - loaded_values).abs() < 0.01) | (expected_values.isna() & loaded_values.isna())
+            differs |= ~same
+        mismatches[table] = int(differs.sum())
+    return mismatches
+
+
+def _check_warehouse(frames) -> dict:
+    """
+    Compares the loaded warehouse with what the generated sheets should produce, and the
+    aggregate tables with FactOrders.
+    """
+    expected = expected_load_counts(frames)
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM FactOrders")
+        fact_rows = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM FactError")
+        fact_error_rows = cursor.fetchone()[0]
+        aggregate_mismatches = _aggregate_mismatches(cursor)
+        cursor.close()
+    return {
+        'fact_rows': fact_rows,
+        'expected_fact_rows': expected['fact_rows'],
+        'fact_error_rows': fact_error_rows,
+        'expected_fact_error_rows': expected['fact_error_rows'],
+        'aggregate_mismatches': aggregate_mismatches,
+        'passed': (fact_rows == expected['fact_rows'] and fact_error_rows == expected['fact_error_rows']
+                   and not any(aggregate_mismatches.values())),
+    }
+
+
+def run_scale(scale: float, args) -> list:
+    """
+    Loads every generation of one scale: generation 0 as a full refresh, the following
+    ones incrementally on top of it.
+
+    Returns:
+        list: One result per generation.
+    """
+    results = []
+    for generation in range(args.generations + 1):
+        mode = FULL_REFRESH if generation == 0 else INCREMENTAL
+        with _quiet_console(not args.verbose):
+            started = time.perf_counter()
+            frames = generate_raw_data(scale, generation, seed=args.seed, dirty_rate=args.dirty_rate,
+                                       scd_change_rate=args.scd_change_rate, new_order_rate=args.new_order_rate)
+            extension = ".xlsx" if args.format == "xlsx" else ""
+            raw_data_path = write_raw_data(
+                frames, os.path.join(args.work_dir, f"scale_{scale:g}_generation_{generation}{extension}")
+            )
+            generate_seconds = round(time.perf_counter() - started, 3)
+
+            if mode == FULL_REFRESH:
+                reset_db()
+            flow = BenchmarkFlow(raw_data_path=raw_data_path, stream=True, chunk_size=args.chunk_size, mode=mode)
+            status = flow.exec()
+
+        result = {
+            'scale': scale,
+            'generation': generation,
+            'mode': mode,
+            'execution_id': flow.execution_id,
+            'input_rows': sum(len(df) for df in frames.values()),
+            'order_lines': len(frames['OrderDetails']),
+            'generate_seconds': generate_seconds,
+            'error': status.get('error'),
+            'phases': _phase_results(flow),
+            'checks': _check_warehouse(frames),
+        }
+        result['seconds'] = round(sum(phase['seconds'] for phase in result['phases']), 3)
+        result['rows_per_second'] = round(result['input_rows'] / result['seconds'], 1) if result['seconds'] else None
+        results.append(result)
+        _log_result(result)
+    return results
+
+
+def _log_result(result: dict):
+    checks = result['checks']
+    logger.info(f"Scale {result['scale']:g}, generation {result['generation']} ({result['mode']}): "
+                f"{result['input_rows']} input rows in {result['seconds']}s "
+                f"({result['rows_per_second']} rows/s).")
+    for phase in result['phases']:
+        logger.info(f"  {phase['phase']:<24} {phase['status']:<10} {phase['seconds']:>9.3f}s "
+                    f"{phase['rows']:>10} rows {phase['rows_per_second'] or '-':>12} rows/s "
+                    f"peak {phase.get('peak_rss_mb') or '-'} MB (+{phase.get('peak_growth_mb') or 0} MB)")
+    log = logger.info if checks['passed'] else logger.warning
+    log(f"  FactOrders {checks['fact_rows']}/{checks['expected_fact_rows']}, "
+        f"FactError {checks['fact_error_rows']}/{checks['expected_fact_error_rows']} "
+        f"(loaded/expected), aggregate groups differing from FactOrders "
+        f"{sum(checks['aggregate_mismatches'].values())}: {'passed' if checks['passed'] else 'FAILED'}")
+
+
+def find_regressions(results, baseline, tolerance: float):
+    """
+    Lists the phases whose throughput dropped more than tolerance below a baseline run.
+
+    Args:
+        results (list): Results of this run.
+        baseline (list): Results of an earlier run, as written to its JSON report.
+        tolerance (float): Accepted relative drop in rows/sec (0.2 = 20%).
+
+    Returns:
+        list: Messages describing every regression.
+    """
+    baseline_rates = {
+        (result['scale'], result['generation'], phase['phase']): phase['rows_per_second']
+        for result in baseline for phase in result['phases']
+    }
+    regressions = []
+    for result in results:
+        for phase in result['phases']:
+            key = (result['scale'], result['generation'], phase['phase'])
+            before, after = baseline_rates.get(key), phase['rows_per_second']
+            if before and after and after < before * (1 - tolerance):
+                regressions.append(f"scale {key[0]:g} generation {key[1]} {key[2]}: "
+                                   f"{after} rows/s, baseline {before} rows/s")
+    return regressions
+
+
+def get_args():
+    """
+    Parses command-line arguments for the scales, data shape and backend of the benchmark.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data at several scales.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100],
+                        help="Multiples of the sample workbook's size to benchmark.")
+    parser.add_argument("--generations", type=int, default=2,
+                        help="Incremental loads run after the initial full refresh, per scale.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+    parser.add_argument("--dirty_rate", type=float, default=0.01,
+                        help="Share of order lines with a defect that routes them to FactError.")
+    parser.add_argument("--scd_change_rate", type=float, default=0.05,
+                        help="Share of dimension rows changed between two generations.")
+    parser.add_argument("--new_order_rate", type=float, default=0.1,
+                        help="Orders added per generation, relative to the initial orders.")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv",
+                        help="Raw data format; xlsx is limited to about 400x.")
+    parser.add_argument("--chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Rows held in memory per sheet while streaming into staging.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="Database engine. Defaults to the configured one.")
+    parser.add_argument("--sqlite_path", default=os.path.join(WORK_DIR, "benchmark.sqlite"),
+                        help="Database file used by the sqlite backend.")
+    parser.add_argument("--work_dir", default=WORK_DIR, help="Directory receiving the generated raw data.")
+    parser.add_argument("--output", default=None,
+                        help=f"JSON report path. Defaults to {BENCHMARK_DIR}/<timestamp>.json.")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON report of an earlier run; slower phases make the benchmark fail.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Accepted relative drop in rows/sec against the baseline.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's console logging.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Runs the benchmark and writes its JSON report. Exits with 1 when a check fails or a
+    phase regressed against the baseline.
+    """
+    args = get_args()
+    reload_settings(backend=args.backend, sqlite_path=args.sqlite_path)
+    output = args.output or os.path.join(BENCHMARK_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+
+    results = []
+    try:
+        for scale in args.scales:
+            results.extend(run_scale(scale, args))
+    finally:
+        close_pool()
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as report:
+        json.dump(results, report, indent=2, default=str)
+    logger.info(f"Benchmark report written to: {output}")
+
+    failures = [f"scale {result['scale']:g} generation {result['generation']}: warehouse check failed"
+                for result in results if not result['checks']['passed'] or result['error']]
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            failures += find_regressions(results, json.load(baseline_file), args.tolerance)
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- ====================================================================
+-- Optional columnstore index on FactOrders
+-- Speeds up the scans and aggregations issued by the Power BI model.
+-- Enabled with main.py --columnstore.
+-- ====================================================================
+USE ORDER_DDS;
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'NCCI_FactOrders' AND object_id = OBJECT_ID(N'dbo.FactOrders'))
+CREATE NONCLUSTERED COLUMNSTORE INDEX NCCI_FactOrders ON dbo.FactOrders (
+    OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount
+);
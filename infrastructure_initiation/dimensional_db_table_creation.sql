@@ -5,6 +5,7 @@ USE ORDER_DDS;
 -- Type: SCD1 (Overwrite data with new values)
 -- Description: Stores product category data.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimCategories', N'U') IS NULL
 CREATE TABLE DimCategories (
     CategoryKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     CategoryID INT,                            -- Natural Key
@@ -18,6 +19,7 @@ CREATE TABLE DimCategories (
 -- Type: SCD2 (Historical tracking with validity dates)
 -- Description: Stores customer data with historical changes.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimCustomers', N'U') IS NULL
 CREATE TABLE DimCustomers (
     CustomerKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     CustomerID NVARCHAR(10),                            -- Natural Key
@@ -32,8 +34,16 @@ CREATE TABLE DimCustomers (
     Phone NVARCHAR(255),
     Fax NVARCHAR(255),
     EffectiveDate DATE,                        -- Start of validity
-    ExpirationDate DATE                        -- End of validity
+    ExpirationDate DATE,                       -- End of validity
+    RowHash BINARY(16),                        -- Staging RowHash of the current values
+    IsInferred BIT DEFAULT 0                   -- Placeholder for a member first seen in a fact line
 );
+-- DimCustomers created before RowHash existed
+IF COL_LENGTH(N'dbo.DimCustomers', N'RowHash') IS NULL
+ALTER TABLE dbo.DimCustomers ADD RowHash BINARY(16);
+-- DimCustomers created before IsInferred existed
+IF COL_LENGTH(N'dbo.DimCustomers', N'IsInferred') IS NULL
+ALTER TABLE dbo.DimCustomers ADD IsInferred BIT DEFAULT 0;
 -- SCD2: Tracks historical changes by adding new rows with EffectiveDate and ExpirationDate.
 
 -- ====================================================================
@@ -41,6 +51,7 @@ CREATE TABLE DimCustomers (
 -- Type: SCD1 with Delete (Overwrite data, remove inactive records)
 -- Description: Stores employee details.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimEmployees', N'U') IS NULL
 CREATE TABLE DimEmployees (
     EmployeeKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     EmployeeID INT,                            -- Natural Key
@@ -60,8 +71,16 @@ CREATE TABLE DimEmployees (
     Notes NVARCHAR(MAX),
     ReportsTo INT,                             -- Foreign key reference to EmployeeID
     PhotoPath NVARCHAR(255),
-    IsDeleted BIT DEFAULT 0                    -- Soft deletion marker
+    IsDeleted BIT DEFAULT 0,                   -- Soft deletion marker
+    RowHash BINARY(16),                        -- Staging RowHash of the current values
+    IsInferred BIT DEFAULT 0                   -- Placeholder for a member first seen in a fact line
 );
+-- DimEmployees created before RowHash existed
+IF COL_LENGTH(N'dbo.DimEmployees', N'RowHash') IS NULL
+ALTER TABLE dbo.DimEmployees ADD RowHash BINARY(16);
+-- DimEmployees created before IsInferred existed
+IF COL_LENGTH(N'dbo.DimEmployees', N'IsInferred') IS NULL
+ALTER TABLE dbo.DimEmployees ADD IsInferred BIT DEFAULT 0;
 -- SCD1 with Delete: Only current data is stored, and inactive records are removed.
 
 -- ====================================================================
@@ -69,6 +88,7 @@ CREATE TABLE DimEmployees (
 -- Type: SCD1 (Overwrite data with new values)
 -- Description: Stores product details including category and supplier.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimProducts', N'U') IS NULL
 CREATE TABLE DimProducts (
     ProductKey INT IDENTITY(1,1) PRIMARY KEY,  -- Surrogate Key
     ProductID INT,                             -- Natural Key
@@ -80,8 +100,16 @@ CREATE TABLE DimProducts (
     UnitsInStock INT,
     UnitsOnOrder INT,
     ReorderLevel INT,
-    Discontinued BIT
+    Discontinued BIT,
+    RowHash BINARY(16),                        -- Staging RowHash of the current values
+    IsInferred BIT DEFAULT 0                   -- Placeholder for a member first seen in a fact line
 );
+-- DimProducts created before RowHash existed
+IF COL_LENGTH(N'dbo.DimProducts', N'RowHash') IS NULL
+ALTER TABLE dbo.DimProducts ADD RowHash BINARY(16);
+-- DimProducts created before IsInferred existed
+IF COL_LENGTH(N'dbo.DimProducts', N'IsInferred') IS NULL
+ALTER TABLE dbo.DimProducts ADD IsInferred BIT DEFAULT 0;
 -- SCD1: Only current data is stored, with no history tracking.
 
 -- ====================================================================
@@ -89,6 +117,7 @@ CREATE TABLE DimProducts (
 -- Type: SCD4 (Snapshot-based historical tracking)
 -- Description: Stores region details with snapshots to track changes.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimRegion', N'U') IS NULL
 CREATE TABLE DimRegion (
     RegionKey INT IDENTITY(1,1) PRIMARY KEY,   -- Surrogate Key
     RegionID INT,                              -- Natural Key
@@ -104,13 +133,18 @@ CREATE TABLE DimRegion (
 -- Type: SCD1 with Delete (Overwrite data, remove inactive records)
 -- Description: Stores shipper details.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimShippers', N'U') IS NULL
 CREATE TABLE DimShippers (
     ShipperKey INT IDENTITY(1,1) PRIMARY KEY,  -- Surrogate Key
     ShipperID INT,                             -- Natural Key
     CompanyName NVARCHAR(255),
     Phone NVARCHAR(50),
-    IsDeleted BIT DEFAULT 0                    -- Soft deletion marker
+    IsDeleted BIT DEFAULT 0,                   -- Soft deletion marker
+    IsInferred BIT DEFAULT 0                   -- Placeholder for a member first seen in a fact line
 );
+-- DimShippers created before IsInferred existed
+IF COL_LENGTH(N'dbo.DimShippers', N'IsInferred') IS NULL
+ALTER TABLE dbo.DimShippers ADD IsInferred BIT DEFAULT 0;
 -- SCD1 with Delete: Only current data is stored, and inactive records are removed.
 
 -- ====================================================================
@@ -118,6 +152,7 @@ CREATE TABLE DimShippers (
 -- Type: SCD3 (Track current and prior values in separate columns)
 -- Description: Stores supplier details with one level of historical data.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimSuppliers', N'U') IS NULL
 CREATE TABLE DimSuppliers (
     SupplierKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     SupplierID INT,                            -- Natural Key
@@ -132,8 +167,12 @@ CREATE TABLE DimSuppliers (
     Phone NVARCHAR(255),
     Fax NVARCHAR(255),
     HomePage NVARCHAR(255),
-    PreviousContactInfo NVARCHAR(MAX)         -- Previous version of contact info
+    PreviousContactInfo NVARCHAR(MAX),        -- Previous version of contact info
+    RowHash BINARY(16)                        -- Staging RowHash of the current values
 );
+-- DimSuppliers created before RowHash existed
+IF COL_LENGTH(N'dbo.DimSuppliers', N'RowHash') IS NULL
+ALTER TABLE dbo.DimSuppliers ADD RowHash BINARY(16);
 -- SCD3: Tracks one historical version by keeping current and previous values.
 
 -- ====================================================================
@@ -141,6 +180,7 @@ CREATE TABLE DimSuppliers (
 -- Type: SCD4 (Snapshot-based historical tracking)
 -- Description: Stores territory details with snapshots for historical tracking.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.DimTerritories', N'U') IS NULL
 CREATE TABLE DimTerritories (
     TerritoryKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     TerritoryID INT,                            -- Natural Key
@@ -151,10 +191,27 @@ CREATE TABLE DimTerritories (
 );
 -- SCD4: Historical snapshots are stored, with each snapshot having a unique SnapshotDate.
 
+-- ====================================================================
+-- DimTerritoriesCurrent Table
+-- Type: SCD4 current table
+-- Description: Latest snapshot of each territory, kept in step with DimTerritories
+-- by update_dim_territories so change detection never reads the snapshot history.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.DimTerritoriesCurrent', N'U') IS NULL
+CREATE TABLE DimTerritoriesCurrent (
+    TerritoryID INT PRIMARY KEY,                -- Natural Key
+    TerritoryKey INT,                           -- Latest snapshot in DimTerritories
+    TerritoryDescription NVARCHAR(255),
+    TerritoryCode NVARCHAR(255),
+    RegionID INT,
+    SnapshotDate DATE
+);
+
 -- ====================================================================
 -- Dim_SOR Table
 -- Description: Tracks the mapping between staging raw tables and dimension tables.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.Dim_SOR', N'U') IS NULL
 CREATE TABLE Dim_SOR (
     SORKey INT IDENTITY(1,1) PRIMARY KEY, -- Surrogate Key
     StagingTableName NVARCHAR(255),      -- Name of the staging raw table
@@ -167,6 +224,7 @@ CREATE TABLE Dim_SOR (
 -- Type: INSERT (Add new rows for each transaction)
 -- Description: Stores transactional data about orders.
 -- ====================================================================
+IF OBJECT_ID(N'dbo.FactOrders', N'U') IS NULL
 CREATE TABLE FactOrders (
     OrderKey INT IDENTITY(1,1) PRIMARY KEY,   -- Surrogate Key
     OrderID INT,                              -- Natural Key
@@ -186,3 +244,117 @@ CREATE TABLE FactOrders (
     FOREIGN KEY (ProductKey) REFERENCES DimProducts(ProductKey)
 );
 -- FactOrders: Captures transactional data and links to dimensions using foreign keys.
+
+-- ====================================================================
+-- Aggregate Tables
+-- Type: Maintained from the FactOrders changes of each run
+-- Description: Pre-aggregated sales read by the Power BI model, see update_aggregates.sql.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.AggSalesDayProductCustomer', N'U') IS NULL
+CREATE TABLE AggSalesDayProductCustomer (
+    OrderDate DATE NOT NULL,
+    ProductKey INT NOT NULL,                  -- FK to DimProducts
+    CustomerKey INT NOT NULL,                 -- FK to DimCustomers (version of the line)
+    OrderLines INT NOT NULL,
+    Quantity INT,
+    TotalAmount DECIMAL(18,2),
+    PRIMARY KEY (OrderDate, ProductKey, CustomerKey)
+);
+
+IF OBJECT_ID(N'dbo.AggSalesMonthEmployee', N'U') IS NULL
+CREATE TABLE AggSalesMonthEmployee (
+    MonthStart DATE NOT NULL,                 -- First day of the OrderDate month
+    EmployeeKey INT NOT NULL,                 -- FK to DimEmployees
+    OrderLines INT NOT NULL,
+    Quantity INT,
+    TotalAmount DECIMAL(18,2),
+    PRIMARY KEY (MonthStart, EmployeeKey)
+);
+
+IF OBJECT_ID(N'dbo.AggSalesShipperCountry', N'U') IS NULL
+CREATE TABLE AggSalesShipperCountry (
+    ShipperKey INT NOT NULL,                  -- FK to DimShippers
+    Country NVARCHAR(255) NOT NULL,           -- Customer country, 'Unknown' if not set
+    OrderLines INT NOT NULL,
+    Quantity INT,
+    TotalAmount DECIMAL(18,2),
+    PRIMARY KEY (ShipperKey, Country)
+);
+-- Aggregate tables: Let dashboard refreshes read a few summary rows instead of FactOrders.
+
+-- ====================================================================
+-- ETL_HighWaterMark Table
+-- Description: Remembers how far each incremental load has progressed.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.ETL_HighWaterMark', N'U') IS NULL
+CREATE TABLE ETL_HighWaterMark (
+    ProcessName NVARCHAR(100) PRIMARY KEY,    -- Load that owns the mark (e.g. FactOrders)
+    LastOrderDate DATE,                       -- Latest OrderDate loaded so far
+    WindowStart DATE,                         -- Window used by the last run
+    WindowEnd DATE,
+    RowsMerged INT,                           -- Rows inserted or updated by the last run
+    UpdatedAt DATETIME
+);
+-- ETL_HighWaterMark: Lets a run without --start_date resume from the previous run.
+
+-- ====================================================================
+-- ETL_AggregateDeltas Table
+-- Description: FactOrders changes not yet applied to the aggregate tables.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.ETL_AggregateDeltas', N'U') IS NULL
+CREATE TABLE ETL_AggregateDeltas (
+    DeltaID INT IDENTITY(1,1) PRIMARY KEY,
+    OrderDate DATE,
+    ProductKey INT,
+    CustomerKey INT,
+    EmployeeKey INT,
+    ShipperKey INT,
+    Country NVARCHAR(255),
+    OrderLines INT,                           -- +1 for the new version of a line, -1 for the old one
+    Quantity INT,                             -- Signed like OrderLines
+    TotalAmount DECIMAL(18,2)
+);
+-- ETL_AggregateDeltas: Written with the fact load, emptied by update_aggregates.sql.
+
+-- ====================================================================
+-- ETL_RunHistory Table
+-- Description: One row per pipeline run, keyed by the flow's execution ID.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.ETL_RunHistory', N'U') IS NULL
+CREATE TABLE ETL_RunHistory (
+    ExecutionID NVARCHAR(36) PRIMARY KEY,     -- DimensionalDataFlow.execution_id
+    Mode NVARCHAR(20),                        -- full-refresh or incremental
+    StartTime DATETIME2 NOT NULL,
+    EndTime DATETIME2,                        -- NULL while the run is in progress
+    Status NVARCHAR(20) NOT NULL,             -- running, succeeded or failed
+    DurationSeconds DECIMAL(18,3),
+    RowsInserted INT,                         -- Totals over every task of the run
+    RowsUpdated INT,
+    RowsExpired INT,
+    ErrorCount INT,                           -- Rejected staging rows plus FactError rows
+    FailedTasks INT,
+    ErrorMessage NVARCHAR(MAX)
+);
+-- ETL_RunHistory: Makes runs comparable over time (durations, volumes, failures).
+
+-- ====================================================================
+-- ETL_TaskHistory Table
+-- Description: One row per task (and per dimension script) of a run.
+-- ====================================================================
+IF OBJECT_ID(N'dbo.ETL_TaskHistory', N'U') IS NULL
+CREATE TABLE ETL_TaskHistory (
+    TaskHistoryID INT IDENTITY(1,1) PRIMARY KEY,
+    ExecutionID NVARCHAR(36) NOT NULL,        -- Run the task belongs to
+    TaskName NVARCHAR(200) NOT NULL,          -- Task, or dimension script of update_dim_tables
+    ParentTaskName NVARCHAR(100),             -- Set for the scripts run by a task
+    StartTime DATETIME2,
+    EndTime DATETIME2,
+    Status NVARCHAR(20) NOT NULL,             -- succeeded, failed or skipped
+    DurationSeconds DECIMAL(18,3),
+    RowsInserted INT,
+    RowsUpdated INT,
+    RowsExpired INT,
+    ErrorCount INT,
+    ErrorMessage NVARCHAR(MAX)
+);
+-- ETL_TaskHistory: Per-task timings and row counts, e.g. to spot slow-growing MERGEs.
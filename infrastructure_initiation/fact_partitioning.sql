@@ -0,0 +1,116 @@
+-- ====================================================================
+-- Optional monthly partitioning of FactOrders and FactError on OrderDate
+-- Lets a window reload rebuild whole months aside and switch them in, see
+-- pipeline_dimensional_data/queries/update_fact_partitioned.sql.
+-- Enabled with main.py --partition_facts; SQL Server only.
+-- ====================================================================
+USE ORDER_DDS;
+GO
+
+-- One partition per month. RANGE RIGHT keeps the first day of a month in its own month;
+-- the fact load adds the boundaries of new months as they arrive.
+IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = N'PF_OrderMonth')
+CREATE PARTITION FUNCTION PF_OrderMonth (DATE) AS RANGE RIGHT FOR VALUES ();
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = N'PS_OrderMonth')
+CREATE PARTITION SCHEME PS_OrderMonth AS PARTITION PF_OrderMonth ALL TO ([PRIMARY]);
+GO
+
+-- Adds the missing month boundaries from @FirstMonth through @LastMonth. Splitting a
+-- partition only moves rows when the new month already holds some, so the fact load
+-- also adds the month after its window ahead of time.
+CREATE OR ALTER PROCEDURE dbo.usp_AddOrderMonthPartitions
+    @FirstMonth DATE,
+    @LastMonth DATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @Month DATE = DATEFROMPARTS(YEAR(@FirstMonth), MONTH(@FirstMonth), 1);
+
+    WHILE @Month <= @LastMonth
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM sys.partition_range_values rv
+            INNER JOIN sys.partition_functions pf ON pf.function_id = rv.function_id
+            WHERE pf.name = N'PF_OrderMonth' AND CAST(rv.value AS DATE) = @Month
+        )
+        BEGIN
+            ALTER PARTITION SCHEME PS_OrderMonth NEXT USED [PRIMARY];
+            ALTER PARTITION FUNCTION PF_OrderMonth() SPLIT RANGE (@Month);
+        END;
+        SET @Month = DATEADD(MONTH, 1, @Month);
+    END;
+END;
+GO
+
+-- Boundaries for the months already loaded, added before the tables move onto the
+-- scheme so that no rows have to move
+DECLARE @FirstMonth DATE, @LastMonth DATE;
+SELECT @FirstMonth = MIN(OrderDate), @LastMonth = MAX(OrderDate)
+FROM (
+    SELECT OrderDate FROM dbo.FactOrders
+    UNION ALL
+    SELECT OrderDate FROM dbo.FactError
+) AS loaded;
+
+IF @FirstMonth IS NOT NULL
+    EXEC dbo.usp_AddOrderMonthPartitions @FirstMonth, @LastMonth;
+GO
+
+-- Move FactOrders onto the scheme. Unique indexes of a partitioned table must contain
+-- OrderDate, so the OrderKey primary key becomes the unique clustered index
+-- (OrderDate, OrderKey). Nonclustered indexes are dropped here and recreated aligned
+-- below and by index_creation.sql.
+IF NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes i
+    INNER JOIN sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+    WHERE i.object_id = OBJECT_ID(N'dbo.FactOrders') AND i.index_id = 1
+)
+BEGIN
+    DECLARE @sql NVARCHAR(MAX) = N'';
+    SELECT @sql += N'DROP INDEX ' + QUOTENAME(name) + N' ON dbo.FactOrders;'
+    FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'dbo.FactOrders') AND index_id > 1 AND is_primary_key = 0;
+    SELECT @sql += N'ALTER TABLE dbo.FactOrders DROP CONSTRAINT ' + QUOTENAME(name) + N';'
+    FROM sys.key_constraints
+    WHERE parent_object_id = OBJECT_ID(N'dbo.FactOrders') AND type = 'PK';
+    EXEC sp_executesql @sql;
+
+    CREATE UNIQUE CLUSTERED INDEX CIX_FactOrders ON dbo.FactOrders (OrderDate, OrderKey)
+    ON PS_OrderMonth (OrderDate);
+END;
+GO
+
+-- Aligned version of the (OrderID, ProductKey) index. With OrderDate in its key it no
+-- longer guarantees one row per order line; a non-aligned unique index would, but it
+-- rules out partition switching. Instead the fact load fails on a window holding a line
+-- twice (key_lookup.check_unique_lines), and a line moved to another month leaves its
+-- old one, as the partitioned load also rebuilds that month.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'UX_FactOrders_OrderID_ProductKey' AND object_id = OBJECT_ID(N'dbo.FactOrders'))
+CREATE UNIQUE NONCLUSTERED INDEX UX_FactOrders_OrderID_ProductKey ON dbo.FactOrders (OrderID, ProductKey, OrderDate)
+ON PS_OrderMonth (OrderDate);
+GO
+
+-- Move FactError onto the scheme the same way, clustered on (OrderDate, ErrorID)
+IF NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes i
+    INNER JOIN sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+    WHERE i.object_id = OBJECT_ID(N'dbo.FactError') AND i.index_id = 1
+)
+BEGIN
+    DECLARE @sql NVARCHAR(MAX) = N'';
+    SELECT @sql += N'DROP INDEX ' + QUOTENAME(name) + N' ON dbo.FactError;'
+    FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'dbo.FactError') AND index_id > 1 AND is_primary_key = 0;
+    SELECT @sql += N'ALTER TABLE dbo.FactError DROP CONSTRAINT ' + QUOTENAME(name) + N';'
+    FROM sys.key_constraints
+    WHERE parent_object_id = OBJECT_ID(N'dbo.FactError') AND type = 'PK';
+    EXEC sp_executesql @sql;
+
+    CREATE UNIQUE CLUSTERED INDEX CIX_FactError ON dbo.FactError (OrderDate, ErrorID)
+    ON PS_OrderMonth (OrderDate);
+END;
+GO
@@ -0,0 +1,86 @@
+-- ====================================================================
+-- Index pack for staging, dimension and fact tables
+-- Executed by create_indexes_task after the staging bulk load, so loads
+-- never pay for index maintenance. Every index is created only if missing.
+-- ====================================================================
+USE ORDER_DDS;
+
+-- ====================================================================
+-- Staging tables: natural keys used by the dimension and fact joins
+-- ====================================================================
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Orders_OrderID' AND object_id = OBJECT_ID(N'dbo.Staging_Orders'))
+CREATE NONCLUSTERED INDEX IX_Staging_Orders_OrderID ON dbo.Staging_Orders (OrderID)
+    INCLUDE (CustomerID, EmployeeID, ShipVia, OrderDate);
+-- Range seek for the fact load window (OrderDate BETWEEN @StartDate AND @EndDate)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Orders_OrderDate' AND object_id = OBJECT_ID(N'dbo.Staging_Orders'))
+CREATE NONCLUSTERED INDEX IX_Staging_Orders_OrderDate ON dbo.Staging_Orders (OrderDate)
+    INCLUDE (OrderID, CustomerID, EmployeeID, ShipVia, Staging_Raw_ID);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_OrderDetails_OrderID' AND object_id = OBJECT_ID(N'dbo.Staging_OrderDetails'))
+CREATE NONCLUSTERED INDEX IX_Staging_OrderDetails_OrderID ON dbo.Staging_OrderDetails (OrderID)
+    INCLUDE (ProductID, UnitPrice, Quantity, Discount);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Customers_CustomerID' AND object_id = OBJECT_ID(N'dbo.Staging_Customers'))
+CREATE NONCLUSTERED INDEX IX_Staging_Customers_CustomerID ON dbo.Staging_Customers (CustomerID)
+    INCLUDE (RowHash);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Products_ProductID' AND object_id = OBJECT_ID(N'dbo.Staging_Products'))
+CREATE NONCLUSTERED INDEX IX_Staging_Products_ProductID ON dbo.Staging_Products (ProductID)
+    INCLUDE (RowHash);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Employees_EmployeeID' AND object_id = OBJECT_ID(N'dbo.Staging_Employees'))
+CREATE NONCLUSTERED INDEX IX_Staging_Employees_EmployeeID ON dbo.Staging_Employees (EmployeeID)
+    INCLUDE (RowHash);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Suppliers_SupplierID' AND object_id = OBJECT_ID(N'dbo.Staging_Suppliers'))
+CREATE NONCLUSTERED INDEX IX_Staging_Suppliers_SupplierID ON dbo.Staging_Suppliers (SupplierID)
+    INCLUDE (RowHash);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_Staging_Territories_TerritoryID' AND object_id = OBJECT_ID(N'dbo.Staging_Territories'))
+CREATE NONCLUSTERED INDEX IX_Staging_Territories_TerritoryID ON dbo.Staging_Territories (TerritoryID);
+
+-- ====================================================================
+-- Dimension tables: natural-key lookups
+-- ====================================================================
+-- SCD2: only active rows take part in change detection and key resolution.
+-- RowHash is included so change detection compares hashes without key lookups.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimCustomers_CustomerID_Active' AND object_id = OBJECT_ID(N'dbo.DimCustomers'))
+CREATE NONCLUSTERED INDEX IX_DimCustomers_CustomerID_Active ON dbo.DimCustomers (CustomerID)
+    INCLUDE (CustomerKey, RowHash)
+    WHERE ExpirationDate IS NULL;
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimCustomers_CustomerID' AND object_id = OBJECT_ID(N'dbo.DimCustomers'))
+CREATE NONCLUSTERED INDEX IX_DimCustomers_CustomerID ON dbo.DimCustomers (CustomerID, EffectiveDate);
+
+-- SCD1 / SCD1 with Delete / SCD3
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimProducts_ProductID' AND object_id = OBJECT_ID(N'dbo.DimProducts'))
+CREATE NONCLUSTERED INDEX IX_DimProducts_ProductID ON dbo.DimProducts (ProductID)
+    INCLUDE (ProductKey, RowHash);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimEmployees_EmployeeID' AND object_id = OBJECT_ID(N'dbo.DimEmployees'))
+CREATE NONCLUSTERED INDEX IX_DimEmployees_EmployeeID ON dbo.DimEmployees (EmployeeID)
+    INCLUDE (EmployeeKey, RowHash, IsDeleted);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimShippers_ShipperID' AND object_id = OBJECT_ID(N'dbo.DimShippers'))
+CREATE NONCLUSTERED INDEX IX_DimShippers_ShipperID ON dbo.DimShippers (ShipperID)
+    INCLUDE (ShipperKey);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimCategories_CategoryID' AND object_id = OBJECT_ID(N'dbo.DimCategories'))
+CREATE NONCLUSTERED INDEX IX_DimCategories_CategoryID ON dbo.DimCategories (CategoryID);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimSuppliers_SupplierID' AND object_id = OBJECT_ID(N'dbo.DimSuppliers'))
+CREATE NONCLUSTERED INDEX IX_DimSuppliers_SupplierID ON dbo.DimSuppliers (SupplierID)
+    INCLUDE (RowHash);
+
+-- SCD4: snapshot lookups by date. The latest territory snapshots are read from the
+-- DimTerritoriesCurrent primary key instead.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimRegion_RegionID_SnapshotDate' AND object_id = OBJECT_ID(N'dbo.DimRegion'))
+CREATE NONCLUSTERED INDEX IX_DimRegion_RegionID_SnapshotDate ON dbo.DimRegion (RegionID, SnapshotDate);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_DimTerritories_TerritoryID_SnapshotDate' AND object_id = OBJECT_ID(N'dbo.DimTerritories'))
+CREATE NONCLUSTERED INDEX IX_DimTerritories_TerritoryID_SnapshotDate ON dbo.DimTerritories (TerritoryID, SnapshotDate);
+
+-- ====================================================================
+-- Fact tables
+-- ====================================================================
+-- Supports the (OrderID, ProductKey) match of the FactOrders MERGE
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'UX_FactOrders_OrderID_ProductKey' AND object_id = OBJECT_ID(N'dbo.FactOrders'))
+CREATE UNIQUE NONCLUSTERED INDEX UX_FactOrders_OrderID_ProductKey ON dbo.FactOrders (OrderID, ProductKey);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_FactOrders_OrderDate' AND object_id = OBJECT_ID(N'dbo.FactOrders'))
+CREATE NONCLUSTERED INDEX IX_FactOrders_OrderDate ON dbo.FactOrders (OrderDate);
+
+-- Supports the window DELETE before FactError is re-populated
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_FactError_OrderDate' AND object_id = OBJECT_ID(N'dbo.FactError'))
+CREATE NONCLUSTERED INDEX IX_FactError_OrderDate ON dbo.FactError (OrderDate);
+
+-- Task rows are read back per run
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_ETL_TaskHistory_ExecutionID' AND object_id = OBJECT_ID(N'dbo.ETL_TaskHistory'))
+CREATE NONCLUSTERED INDEX IX_ETL_TaskHistory_ExecutionID ON dbo.ETL_TaskHistory (ExecutionID, TaskName);
@@ -0,0 +1,4 @@
+-- Task 1 (SQLite)
+
+-- Nothing to do: the database file is created on the first connection,
+-- see SQLiteBackend.ensure_database.
@@ -1,3 +1,4 @@
+IF OBJECT_ID(N'dbo.Staging_Categories', N'U') IS NULL
 CREATE TABLE Staging_Categories (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     CategoryID INT,
@@ -6,6 +7,7 @@ CREATE TABLE Staging_Categories (
 );
 
 -- Staging Table for Customers
+IF OBJECT_ID(N'dbo.Staging_Customers', N'U') IS NULL
 CREATE TABLE Staging_Customers (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     CustomerID NVARCHAR(10),
@@ -18,11 +20,16 @@ CREATE TABLE Staging_Customers (
     PostalCode NVARCHAR(255),
     Country NVARCHAR(255),
     Phone NVARCHAR(255),
-    Fax NVARCHAR(255)
+    Fax NVARCHAR(255),
+    RowHash BINARY(16)                         -- Hash of the tracked attributes, set by the loader
 );
+-- Staging_Customers created before RowHash existed
+IF COL_LENGTH(N'dbo.Staging_Customers', N'RowHash') IS NULL
+ALTER TABLE dbo.Staging_Customers ADD RowHash BINARY(16);
 
 
 -- Staging Table for Employees
+IF OBJECT_ID(N'dbo.Staging_Employees', N'U') IS NULL
 CREATE TABLE Staging_Employees (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     EmployeeID INT,
@@ -41,10 +48,15 @@ CREATE TABLE Staging_Employees (
     Extension NVARCHAR(10),
     Notes NVARCHAR(MAX),
     ReportsTo INT,
-    PhotoPath NVARCHAR(255)
+    PhotoPath NVARCHAR(255),
+    RowHash BINARY(16)                         -- Hash of the tracked attributes, set by the loader
 );
+-- Staging_Employees created before RowHash existed
+IF COL_LENGTH(N'dbo.Staging_Employees', N'RowHash') IS NULL
+ALTER TABLE dbo.Staging_Employees ADD RowHash BINARY(16);
 
 -- Staging Table for Products
+IF OBJECT_ID(N'dbo.Staging_Products', N'U') IS NULL
 CREATE TABLE Staging_Products (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     ProductID INT,
@@ -56,10 +68,15 @@ CREATE TABLE Staging_Products (
     UnitsInStock INT,
     UnitsOnOrder INT,
     ReorderLevel INT,
-    Discontinued BIT
+    Discontinued BIT,
+    RowHash BINARY(16)                         -- Hash of the tracked attributes, set by the loader
 );
+-- Staging_Products created before RowHash existed
+IF COL_LENGTH(N'dbo.Staging_Products', N'RowHash') IS NULL
+ALTER TABLE dbo.Staging_Products ADD RowHash BINARY(16);
 
 -- Staging Table for Region
+IF OBJECT_ID(N'dbo.Staging_Region', N'U') IS NULL
 CREATE TABLE Staging_Region (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     RegionID INT,
@@ -69,6 +86,7 @@ CREATE TABLE Staging_Region (
 );
 
 -- Staging Table for Shippers
+IF OBJECT_ID(N'dbo.Staging_Shippers', N'U') IS NULL
 CREATE TABLE Staging_Shippers (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     ShipperID INT,
@@ -77,6 +95,7 @@ CREATE TABLE Staging_Shippers (
 );
 
 -- Staging Table for Suppliers
+IF OBJECT_ID(N'dbo.Staging_Suppliers', N'U') IS NULL
 CREATE TABLE Staging_Suppliers (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     SupplierID INT,
@@ -90,10 +109,15 @@ CREATE TABLE Staging_Suppliers (
     Country NVARCHAR(100),
     Phone NVARCHAR(50),
     Fax NVARCHAR(50),
-    HomePage NVARCHAR(MAX)
+    HomePage NVARCHAR(MAX),
+    RowHash BINARY(16)                         -- Hash of the tracked attributes, set by the loader
 );
+-- Staging_Suppliers created before RowHash existed
+IF COL_LENGTH(N'dbo.Staging_Suppliers', N'RowHash') IS NULL
+ALTER TABLE dbo.Staging_Suppliers ADD RowHash BINARY(16);
 
 -- Staging Table for Territories
+IF OBJECT_ID(N'dbo.Staging_Territories', N'U') IS NULL
 CREATE TABLE Staging_Territories (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     TerritoryID INT,
@@ -103,14 +127,22 @@ CREATE TABLE Staging_Territories (
 );
 
 -- Staging Table for Orders
+-- Dates are typed (parsed once by the loader) so the fact load window can seek on OrderDate.
+-- Staging_Orders used to keep them as NVARCHAR. Staging is reloaded every run, so an old
+-- table is simply recreated.
+IF EXISTS (SELECT 1 FROM sys.columns WHERE object_id = OBJECT_ID(N'dbo.Staging_Orders')
+           AND name = N'OrderDate' AND system_type_id <> TYPE_ID(N'date'))
+DROP TABLE dbo.Staging_Orders;
+
+IF OBJECT_ID(N'dbo.Staging_Orders', N'U') IS NULL
 CREATE TABLE Staging_Orders (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     OrderID INT,
     CustomerID NVARCHAR(255),
     EmployeeID INT,
-    OrderDate NVARCHAR(255),
-    RequiredDate NVARCHAR(255),
-    ShippedDate NVARCHAR(255),
+    OrderDate DATE,
+    RequiredDate DATE,
+    ShippedDate DATE,
     ShipVia INT,
     Freight MONEY,
     ShipName NVARCHAR(255),
@@ -123,6 +155,7 @@ CREATE TABLE Staging_Orders (
 );
 
 -- Staging Table for Order Details
+IF OBJECT_ID(N'dbo.Staging_OrderDetails', N'U') IS NULL
 CREATE TABLE Staging_OrderDetails (
     Staging_Raw_ID INT IDENTITY(1,1) PRIMARY KEY,
     OrderID INT,
@@ -132,10 +165,32 @@ CREATE TABLE Staging_OrderDetails (
     Discount FLOAT
 );
 
+-- Order lines of the fact load window with their dimension keys already resolved.
+-- Filled by ingest_fact_table_task, not from the workbook.
+IF OBJECT_ID(N'dbo.Staging_FactLines', N'U') IS NULL
+CREATE TABLE Staging_FactLines (
+    Staging_Raw_ID INT,                   -- Staging_Orders row of the line
+    OrderID INT,
+    CustomerID NVARCHAR(10),
+    EmployeeID INT,
+    ShipVia INT,
+    ProductID INT,
+    CustomerKey INT,                      -- NULL when the natural key is missing
+    EmployeeKey INT,
+    ShipperKey INT,
+    ProductKey INT,
+    OrderDate DATE,
+    Quantity INT,
+    TotalAmount DECIMAL(18,2),
+    Discount DECIMAL(18,2),
+    ErrorReason NVARCHAR(255)             -- NULL for clean lines
+);
+
 
 
 -- For task 8 adding new FactError table
 
+IF OBJECT_ID(N'dbo.FactError', N'U') IS NULL
 CREATE TABLE dbo.FactError (
     ErrorID UNIQUEIDENTIFIER PRIMARY KEY, -- Unique error identifier
     Staging_Raw_ID INT,                   -- Link to staging row
@@ -0,0 +1,121 @@
+import os
+import re
+from functools import lru_cache
+
+STAGING_DDL_PATH = os.path.join(os.path.dirname(__file__), "staging_raw_table_creation.sql")
+
+# Maps SQL Server column types onto the cleaning rule applied by the loader
+SQL_TYPE_KINDS = {
+    'INT': 'int',
+    'BIGINT': 'int',
+    'SMALLINT': 'int',
+    'TINYINT': 'int',
+    'BIT': 'bit',
+    'MONEY': 'decimal',
+    'DECIMAL': 'decimal',
+    'NUMERIC': 'decimal',
+    'FLOAT': 'float',
+    'REAL': 'float',
+    'DATE': 'date',
+    'DATETIME': 'datetime',
+    'DATETIME2': 'datetime',
+    'NVARCHAR': 'str',
+    'VARCHAR': 'str',
+    'NCHAR': 'str',
+    'CHAR': 'str',
+    'UNIQUEIDENTIFIER': 'str',
+}
+
+# Column the loader fills with a hash of the tracked attributes of each row
+ROW_HASH_COLUMN = 'RowHash'
+
+# Attributes the dimension merges act on, per staging table. The loader hashes them into
+# RowHash once, so the merges detect changes by comparing one column instead of all of them.
+ROW_HASH_ATTRIBUTES = {
+    'Staging_Customers': (
+        'CompanyName', 'ContactName', 'ContactTitle', 'Address', 'City', 'Region',
+        'PostalCode', 'Country', 'Phone', 'Fax',
+    ),
+    'Staging_Employees': (
+        'LastName', 'FirstName', 'Title', 'TitleOfCourtesy', 'BirthDate', 'HireDate', 'Address',
+        'City', 'Region', 'PostalCode', 'Country', 'HomePhone', 'Extension', 'Notes', 'ReportsTo',
+        'PhotoPath',
+    ),
+    'Staging_Products': (
+        'ProductName', 'SupplierID', 'CategoryID', 'QuantityPerUnit', 'UnitPrice', 'UnitsInStock',
+        'UnitsOnOrder', 'ReorderLevel', 'Discontinued',
+    ),
+    'Staging_Suppliers': (
+        'CompanyName', 'ContactName', 'ContactTitle', 'Address', 'City', 'Region', 'PostalCode',
+        'Country', 'Phone', 'Fax', 'HomePage',
+    ),
+}
+
+_CREATE_TABLE_PATTERN = re.compile(
+    r"CREATE\s+TABLE\s+(?:dbo\.)?(\w+)\s*\((.*?)\n\);",
+    re.IGNORECASE | re.DOTALL,
+)
+_COLUMN_PATTERN = re.compile(r"^\s*(\w+)\s+(\w+)", re.IGNORECASE)
+
+
+def parse_staging_schema(ddl_path: str = STAGING_DDL_PATH):
+    """
+    Derives the column type map of every table declared in the staging DDL.
+
+    Identity columns are skipped because they are generated by the database, and
+    RowHash because the loader computes it.
+
+    Args:
+        ddl_path (str): Path to the staging table creation script.
+
+    Returns:
+        dict: {table_name: {column_name: kind}} where kind is one of the values of SQL_TYPE_KINDS.
+    """
+    with open(ddl_path, 'r', encoding='utf-8') as sql_file:
+        ddl = sql_file.read()
+
+    schema = {}
+    for table_name, body in _CREATE_TABLE_PATTERN.findall(ddl):
+        columns = {}
+        for line in body.splitlines():
+            line = line.split('--', 1)[0].strip()
+            match = _COLUMN_PATTERN.match(line)
+            if not match or 'IDENTITY' in line.upper():
+                continue
+            column, sql_type = match.groups()
+            if column == ROW_HASH_COLUMN:
+                continue
+            columns[column] = SQL_TYPE_KINDS.get(sql_type.upper(), 'str')
+        schema[table_name] = columns
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _cached_schema():
+    return parse_staging_schema()
+
+
+def get_staging_column_types(table_name: str):
+    """
+    Returns the column type map of a staging table.
+
+    Args:
+        table_name (str): Name of the staging table.
+
+    Returns:
+        dict: {column_name: kind}, empty when the table is not declared in the DDL.
+    """
+    return dict(_cached_schema().get(table_name, {}))
+
+
+def get_row_hash_attributes(table_name: str):
+    """
+    Returns the attributes hashed into the RowHash column of a staging table.
+
+    Args:
+        table_name (str): Name of the staging table.
+
+    Returns:
+        tuple: Attribute names, empty when the table has no RowHash.
+    """
+    return ROW_HASH_ATTRIBUTES.get(table_name, ())
@@ -1,6 +1,9 @@
 from logging import getLogger, INFO, DEBUG, ERROR, FileHandler, Formatter, StreamHandler
+from logging.handlers import QueueHandler, QueueListener
 from colorama import Fore, Style, init
+import atexit
 import os
+import queue
 
 init(autoreset=True)
 
@@ -10,6 +13,25 @@ logger.setLevel(DEBUG)
 log_file = "logs/logs_dimensional_data_pipeline.txt"
 os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
+# Rejected staging rows logged with their full message per table and error type;
+# the rest are only counted
+ROW_ERROR_SAMPLES = 5
+
+
+class ColoredFormatter(Formatter):
+    COLORS = {"INFO": Fore.GREEN, "ERROR": Fore.RED, "DEBUG": Fore.YELLOW}
+
+    def format(self, record):
+        message = super().format(record)
+        color = self.COLORS.get(record.levelname)
+        return f"{color}{message}{Style.RESET_ALL}" if color else message
+
+
+# Queue and background thread writing the records; None when the logger was already
+# configured elsewhere, e.g. by an earlier import of this module under another name
+log_queue = None
+log_listener = None
+
 if not logger.handlers:
     file_handler = FileHandler(log_file)
     file_handler.setLevel(DEBUG)
@@ -22,18 +44,28 @@ if not logger.handlers:
     )
     file_handler.setFormatter(file_formatter)
 
-    class ColoredFormatter(Formatter):
-        def format(self, record):
-            if record.levelname == "INFO":
-                record.msg = f"{Fore.GREEN}{record.msg}{Style.RESET_ALL}"
-            elif record.levelname == "ERROR":
-                record.msg = f"{Fore.RED}{record.msg}{Style.RESET_ALL}"
-            elif record.levelname == "DEBUG":
-                record.msg = f"{Fore.YELLOW}{record.msg}{Style.RESET_ALL}"
-            return super().format(record)
-
-    console_formatter = ColoredFormatter("%(levelname)s: %(message)s")
+    # Colour codes only help a terminal; redirected output stays plain
+    console_format = "%(levelname)s: %(message)s"
+    is_tty = getattr(stream_handler.stream, "isatty", lambda: False)()
+    console_formatter = ColoredFormatter(console_format) if is_tty else Formatter(console_format)
     stream_handler.setFormatter(console_formatter)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    # Callers only enqueue records; a background thread does the file and console I/O
+    log_queue = queue.Queue()
+    log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.propagate = False
+
+
+def flush_logs():
+    """
+    Waits until the background thread has written every record logged so far, e.g.
+    before changing the level of one of its handlers. Returns at once when this module
+    did not set up the queue.
+    """
+    if log_queue is None:
+        return
+    log_queue.join()
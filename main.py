@@ -1,17 +1,56 @@
 import sys
 import argparse
+from contextlib import nullcontext
 from pipeline_dimensional_data.flow import DimensionalDataFlow
 from loggings import logger
 from pipeline_dimensional_data.tasks import reset_db
+from pipeline_dimensional_data.connection_pool import close_pool
+from pipeline_dimensional_data.raw_data_reader import STREAM_CHUNK_SIZE
+from pipeline_dimensional_data.profiling import profile_run, PROFILE_DIR
+from pipeline_dimensional_data.config_db import reload_settings
+from pipeline_dimensional_data.backends import BACKENDS
+
+# Run modes
+FULL_REFRESH = "full-refresh"
+INCREMENTAL = "incremental"
 
 
 def get_args():
     """
-    Parses command-line arguments for start and end dates.
+    Parses command-line arguments for the run mode, date range and raw data loading options.
     """
     parser = argparse.ArgumentParser(description="Run the dimensional data pipeline.")
-    parser.add_argument("--start_date", required=True, help="The start date (YYYY-MM-DD).")
-    parser.add_argument("--end_date", required=True, help="The end date (YYYY-MM-DD).")
+    parser.add_argument("--start_date", default=None,
+                        help="The start date (YYYY-MM-DD). Defaults to the FactOrders high-water mark.")
+    parser.add_argument("--end_date", default=None,
+                        help="The end date (YYYY-MM-DD). Defaults to the latest staged order.")
+    parser.add_argument("--mode", choices=[FULL_REFRESH, INCREMENTAL], default=FULL_REFRESH,
+                        help="full-refresh drops and rebuilds the warehouse; incremental keeps it "
+                             "and applies only the changes.")
+    parser.add_argument("--raw_data_path", default="raw_data_source.xlsx",
+                        help="Excel workbook, or directory of <Sheet>.csv files, to load into staging.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream raw data into staging in bounded chunks instead of whole sheets.")
+    parser.add_argument("--chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Maximum number of rows held in memory per sheet when streaming.")
+    parser.add_argument("--load_workers", type=int, default=None,
+                        help="Staging tables loaded at once, each on its own connection. "
+                             "Defaults to the connection pool size.")
+    parser.add_argument("--parse_workers", type=int, default=1,
+                        help="Processes parsing the workbook sheets when not streaming; 1 parses in-process.")
+    parser.add_argument("--columnstore", action="store_true",
+                        help="Maintain a nonclustered columnstore index on FactOrders for the Power BI model.")
+    parser.add_argument("--partition_facts", action="store_true",
+                        help="Partition FactOrders and FactError by OrderDate month and reload windows by "
+                             "partition switching (SQL Server only).")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Profile the run with cProfile and SQL Server STATISTICS IO/TIME; "
+                             f"reports are written to {PROFILE_DIR}.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="Database engine. Defaults to the config file / $ETL_BACKEND, then mssql; "
+                             "sqlite runs the whole pipeline against an embedded database file.")
+    parser.add_argument("--sqlite_path", default=None,
+                        help="Database file used by the sqlite backend.")
     return parser.parse_args()
 
 
@@ -20,23 +59,36 @@ def main():
     Main function to execute the dimensional data pipeline.
     """
     try:
-        # Reset the database
-        logger.info("Resetting the database...")
-        reset_db()
-
         # Parse arguments
         args = get_args()
         start_date = args.start_date
         end_date = args.end_date
+        if args.backend or args.sqlite_path:
+            reload_settings(backend=args.backend, sqlite_path=args.sqlite_path)
+
+        data_flow = DimensionalDataFlow(
+            raw_data_path=args.raw_data_path, stream=args.stream, chunk_size=args.chunk_size,
+            include_columnstore=args.columnstore, mode=args.mode, load_workers=args.load_workers,
+            partition_facts=args.partition_facts, parse_workers=args.parse_workers,
+        )
 
-        logger.info(f"Starting pipeline execution from {start_date} to {end_date}.")
+        with profile_run(data_flow.execution_id) if args.profile else nullcontext():
+            # Reset the database only when a full rebuild is requested
+            if args.mode == FULL_REFRESH:
+                logger.info("Resetting the database...")
+                reset_db()
+            else:
+                logger.info("Incremental mode: keeping the existing warehouse.")
 
-        # Execute the ETL pipeline
-        data_flow = DimensionalDataFlow()
-        pipeline_status = data_flow.exec(start_date, end_date)
+            logger.info(f"Starting pipeline execution from {start_date} to {end_date}.")
+
+            # Execute the ETL pipeline
+            pipeline_status = data_flow.exec(start_date, end_date)
 
         if not isinstance(pipeline_status, dict):
             raise TypeError(f"Expected a dictionary, got {type(pipeline_status)}")
+        if pipeline_status.get('error'):
+            raise RuntimeError(pipeline_status['error'])
 
         logger.info("Execution completed successfully!")
         logger.info(f"Final Pipeline Status: {pipeline_status}")
@@ -45,6 +97,9 @@ def main():
         logger.error(f"Pipeline execution failed: {e}", exc_info=True)
         sys.exit(1)
 
+    finally:
+        close_pool()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,59 @@
+from loggings import logger
+from pipeline_dimensional_data.backends import run_statement
+
+# Lines of Staging_FactLines that the fact load is about to insert or change, queued as
+# -1 for the FactOrders row they replace and +1 for their new version. Unchanged lines
+# are skipped (NULL-safe). Nothing is queued while the aggregates are still empty, as
+# update_aggregates.sql then builds them from the whole of FactOrders.
+_QUEUE_FACT_DELTAS = """
+    INSERT INTO ETL_AggregateDeltas (
+        OrderDate, ProductKey, CustomerKey, EmployeeKey, ShipperKey, Country, OrderLines, Quantity, TotalAmount
+    )
+    SELECT
+        versions.OrderDate, versions.ProductKey, versions.CustomerKey, versions.EmployeeKey, versions.ShipperKey,
+        COALESCE(dc.Country, 'Unknown'), versions.Sign, versions.Sign * versions.Quantity,
+        versions.Sign * versions.TotalAmount
+    FROM (
+        SELECT
+            fo.OrderDate, fo.ProductKey, fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey,
+            fo.Quantity, fo.TotalAmount, -1 AS Sign
+        FROM Staging_FactLines l
+        JOIN FactOrders fo
+            ON fo.OrderID = l.OrderID AND fo.ProductKey = l.ProductKey
+        WHERE {clean_line}
+          AND EXISTS ({changed})
+        UNION ALL
+        SELECT
+            l.OrderDate, l.ProductKey, l.CustomerKey, l.EmployeeKey, l.ShipperKey,
+            l.Quantity, l.TotalAmount, 1 AS Sign
+        FROM Staging_FactLines l
+        LEFT JOIN FactOrders fo
+            ON fo.OrderID = l.OrderID AND fo.ProductKey = l.ProductKey
+        WHERE {clean_line}
+          AND (fo.OrderID IS NULL OR EXISTS ({changed}))
+    ) AS versions
+    LEFT JOIN DimCustomers dc
+        ON dc.CustomerKey = versions.CustomerKey
+    WHERE EXISTS (SELECT 1 FROM AggSalesDayProductCustomer);
+""".format(
+    clean_line="l.CustomerKey IS NOT NULL AND l.EmployeeKey IS NOT NULL "
+               "AND l.ShipperKey IS NOT NULL AND l.ProductKey IS NOT NULL",
+    changed="SELECT l.CustomerKey, l.EmployeeKey, l.ShipperKey, l.OrderDate, l.Quantity, l.TotalAmount "
+            "EXCEPT "
+            "SELECT fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey, fo.OrderDate, fo.Quantity, fo.TotalAmount",
+)
+
+
+def queue_fact_deltas(cursor) -> int:
+    """
+    Queues the changes the fact load is about to make to FactOrders for the aggregate
+    tables. Runs after stage_fact_lines and before the fact script, on the same
+    transaction, so the changes are only queued if the load commits and the deltas
+    of a failed aggregate refresh wait for the next one.
+
+    Returns:
+        int: Number of deltas queued, -1 when the driver does not report it.
+    """
+    queued = run_statement(cursor, _QUEUE_FACT_DELTAS, name="queue aggregate deltas")
+    logger.debug(f"Queued {queued} FactOrders changes for the aggregate tables.")
+    return queued
@@ -0,0 +1,603 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+import pandas as pd
+import pyodbc
+from loggings import logger
+from pipeline_dimensional_data.config_db import get_settings, get_db_connection, ensure_database_exists
+from pipeline_dimensional_data.metrics import get_metrics
+from pipeline_dimensional_data.profiling import sql_statistics_enabled, capture_server_messages
+
+# Backend names accepted by the `backend` setting
+MSSQL = "mssql"
+SQLITE = "sqlite"
+
+# Script parameters, declared in the T-SQL script as `DECLARE @Name TYPE = ?;` and
+# referenced as :Name by the SQLite dialect
+PARAMETER_DECLARATION = re.compile(r"DECLARE\s+@(\w+)\s+(\w+)(?:\s*\([^)]*\))?\s*=\s*\?", re.IGNORECASE)
+
+# Script that creates the warehouse database, run on the master database
+DATABASE_CREATION_SCRIPT = "infrastructure_initiation/dimensional_db_creation.sql"
+
+# Result columns a load script reports its row counts in
+ROW_COUNT_COLUMNS = {
+    'RowsInserted': 'rows_inserted',
+    'RowsUpdated': 'rows_updated',
+    'RowsExpired': 'rows_expired',
+    'ErrorCount': 'error_count',
+}
+
+
+# Timed statement execution
+def run_statement(cursor, statement: str, params=None, name: str = None):
+    """
+    Executes one statement or batch and records its wall time and affected rows
+    in the run metrics. When profiling a backend that supports it, STATISTICS IO
+    and TIME are switched on first and the server messages are captured.
+
+    Args:
+        cursor: Database cursor.
+        statement (str): SQL to execute.
+        params (tuple | dict): Optional query parameters.
+        name (str): Label for the metrics event. Defaults to the start of the statement.
+
+    Returns:
+        int: cursor.rowcount after execution (-1 when the driver does not report it).
+    """
+    name = name or statement.strip()[:80]
+    if sql_statistics_enabled() and get_backend().supports_statistics:
+        cursor.execute("SET STATISTICS IO, TIME ON;")
+    with get_metrics().timer('statement', name) as measurements:
+        if params is None:
+            cursor.execute(statement)
+        else:
+            cursor.execute(statement, params)
+        measurements['rows_affected'] = cursor.rowcount
+    capture_server_messages(cursor, name)
+    return cursor.rowcount
+
+
+def _row_counts(cursor):
+    columns = [column[0] for column in cursor.description]
+    row = cursor.fetchone()
+    if row is None or not any(column in ROW_COUNT_COLUMNS for column in columns):
+        return None
+    return {
+        ROW_COUNT_COLUMNS[column]: int(value or 0)
+        for column, value in zip(columns, row)
+        if column in ROW_COUNT_COLUMNS
+    }
+
+
+def read_row_counts(cursor, name: str = None):
+    """
+    Consumes every result set of an executed batch and returns the row counts the
+    load script reports in its final SELECT (RowsInserted, RowsUpdated, ...).
+
+    Reading all result sets also surfaces errors raised by later statements of the
+    batch before the caller commits.
+
+    Args:
+        cursor: Cursor the batch was executed on.
+        name (str): Statement label used for the server messages captured when profiling.
+
+    Returns:
+        dict: {'rows_inserted': int, ...} for the reported columns, empty if none.
+    """
+    counts = {}
+    while True:
+        if cursor.description is not None:
+            counts = _row_counts(cursor) or counts
+        if not cursor.nextset():
+            break
+        capture_server_messages(cursor, name)
+    return counts
+
+
+class Backend:
+    """
+    Database engine the pipeline runs against.
+
+    A backend opens connections for the pool, loads scripts in its SQL dialect and runs
+    the few engine-specific statements of the tasks (truncation, index maintenance, the
+    fact window query and the database reset).
+    """
+    name = None
+    # DB-API exception base class of the driver
+    Error = Exception
+    supports_statistics = False
+    # Monthly partitioning of the fact tables, see fact_partitioning.sql
+    supports_partitioning = False
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def connect(self):
+        raise NotImplementedError
+
+    def ensure_database(self):
+        raise NotImplementedError
+
+    def load_script(self, file_path: str) -> str:
+        """
+        Reads a SQL script in this backend's dialect. Only the script registry reads
+        scripts; everything else runs them through sql_registry.get_script.
+
+        Args:
+            file_path (str): Path of the T-SQL script shipped with the pipeline.
+
+        Returns:
+            str: Script text.
+        """
+        with open(file_path, 'r', encoding='utf-8') as sql_file:
+            return sql_file.read()
+
+    def split_script(self, sql_script: str) -> list:
+        """
+        Splits a script into the units sent to the server in one round-trip each: the
+        GO-separated batches of a T-SQL script.
+        """
+        return split_tsql_batches(sql_script)
+
+    def batch_params(self, batch: str, params: dict = None):
+        """
+        Picks the parameters one batch of a script takes: the ones it declares with
+        `DECLARE @Name TYPE = ?`, in the order of its ? markers. A batch without markers
+        takes none, since the driver rejects parameters it has no marker for.
+
+        Args:
+            batch (str): Batch of the script.
+            params (dict): Parameters of the whole script by name.
+
+        Returns:
+            tuple | None: Values to bind, None for a batch without markers.
+
+        Raises:
+            ValueError: If the batch has markers that are not parameter declarations.
+        """
+        markers = sum(1 for _, char in _tsql_tokens(batch) if char == '?')
+        if not markers:
+            return None
+        names = [name for name, _ in PARAMETER_DECLARATION.findall(batch)]
+        if len(names) != markers or any(name not in (params or {}) for name in names):
+            raise ValueError(f"Batch has {markers} parameter markers but declares {names}, "
+                             f"given {list(params or {})}")
+        return tuple(params[name] for name in names)
+
+    def run_batches(self, cursor, batches, params: dict = None, name: str = None) -> dict:
+        """
+        Executes the batches of a script, as returned by split_script, and returns the
+        row counts the script reports. Each batch is bound only the parameters it uses,
+        see batch_params.
+
+        Args:
+            cursor: Database cursor.
+            batches (list[str]): Batches of the script.
+            params (dict): Script parameters by name.
+            name (str): Label used in the run metrics.
+
+        Returns:
+            dict: {'rows_inserted': int, ...}, empty if the script reports none.
+        """
+        counts = {}
+        for i, batch in enumerate(batches):
+            label = name if len(batches) == 1 else f"{name}#{i + 1}"
+            run_statement(cursor, batch, self.batch_params(batch, params), name=label)
+            counts = read_row_counts(cursor, label) or counts
+        return counts
+
+    def truncate_table(self, cursor, table_name: str):
+        raise NotImplementedError
+
+    def disable_staging_indexes(self, cursor):
+        pass
+
+    def rebuild_staging_indexes(self, cursor):
+        pass
+
+    def fact_window(self, cursor, start_date, end_date):
+        """
+        Returns (start, end) of the FactOrders load window, see tasks.resolve_fact_window.
+        """
+        raise NotImplementedError
+
+    def reset(self, cursor, kept_tables=()):
+        """
+        Drops every table except kept_tables.
+        """
+        raise NotImplementedError
+
+    def already_applied(self, error) -> bool:
+        """
+        Tells whether a DDL error only means the change is already in place, e.g. a
+        column addition that SQLite cannot guard with an existence check.
+        """
+        return False
+
+
+class SqlServerBackend(Backend):
+    """
+    SQL Server through pyodbc; the scripts are executed as shipped.
+    """
+    name = MSSQL
+    Error = pyodbc.Error
+    supports_statistics = True
+    supports_partitioning = True
+
+    def connect(self):
+        return get_db_connection()
+
+    def ensure_database(self):
+        # Imported here, as the registry imports this module
+        from pipeline_dimensional_data.sql_registry import get_script
+        ensure_database_exists(get_script(DATABASE_CREATION_SCRIPT).batches)
+
+    def truncate_table(self, cursor, table_name: str):
+        run_statement(cursor, f"TRUNCATE TABLE dbo.{table_name};")
+
+    def disable_staging_indexes(self, cursor):
+        run_statement(cursor, """
+            DECLARE @sql NVARCHAR(MAX) = N'';
+            SELECT @sql += N'ALTER INDEX ' + QUOTENAME(i.name) + N' ON dbo.' + QUOTENAME(t.name) + N' DISABLE;'
+            FROM sys.indexes i
+            INNER JOIN sys.tables t ON i.object_id = t.object_id
+            WHERE t.name LIKE N'Staging[_]%' AND i.type = 2 AND i.is_disabled = 0;
+            EXEC sp_executesql @sql;
+        """, name="disable_staging_indexes")
+
+    def rebuild_staging_indexes(self, cursor):
+        run_statement(cursor, """
+            DECLARE @sql NVARCHAR(MAX) = N'';
+            SELECT @sql += N'ALTER INDEX ' + QUOTENAME(i.name) + N' ON dbo.' + QUOTENAME(t.name) + N' REBUILD;'
+            FROM sys.indexes i
+            INNER JOIN sys.tables t ON i.object_id = t.object_id
+            WHERE t.name LIKE N'Staging[_]%' AND i.is_disabled = 1;
+            EXEC sp_executesql @sql;
+        """, name="rebuild_staging_indexes")
+
+    def fact_window(self, cursor, start_date, end_date):
+        cursor.execute("""
+            SELECT
+                COALESCE(
+                    CAST(? AS DATE),
+                    (SELECT LastOrderDate FROM dbo.ETL_HighWaterMark WHERE ProcessName = 'FactOrders'),
+                    (SELECT MIN(OrderDate) FROM dbo.Staging_Orders)
+                ),
+                COALESCE(
+                    CAST(? AS DATE),
+                    (SELECT MAX(OrderDate) FROM dbo.Staging_Orders)
+                );
+        """, (start_date, end_date))
+        return tuple(cursor.fetchone())
+
+    def reset(self, cursor, kept_tables=()):
+        kept = ", ".join(f"N'{table}'" for table in kept_tables) or "N''"
+
+        # Drop all constraints
+        cursor.execute(f"""
+            DECLARE @sql NVARCHAR(MAX) = N'';
+            SELECT @sql += N'ALTER TABLE ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) +
+                          ' DROP CONSTRAINT ' + QUOTENAME(fk.name) + ';'
+            FROM sys.foreign_keys fk
+            INNER JOIN sys.tables t ON fk.parent_object_id = t.object_id
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE t.name NOT IN ({kept});
+            EXEC sp_executesql @sql;
+        """)
+
+        # Drop all tables
+        cursor.execute(f"""
+            DECLARE @sql NVARCHAR(MAX) = N'';
+            SELECT @sql += N'DROP TABLE ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) + ';'
+            FROM sys.tables t
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE t.name NOT IN ({kept});
+            EXEC sp_executesql @sql;
+        """)
+
+        # Drop the fact partitioning objects once no table uses them any more
+        cursor.execute("""
+            IF OBJECT_ID(N'dbo.usp_AddOrderMonthPartitions', N'P') IS NOT NULL
+                DROP PROCEDURE dbo.usp_AddOrderMonthPartitions;
+            IF EXISTS (SELECT 1 FROM sys.partition_schemes ps
+                       WHERE ps.name = N'PS_OrderMonth'
+                         AND NOT EXISTS (SELECT 1 FROM sys.indexes i WHERE i.data_space_id = ps.data_space_id))
+            BEGIN
+                DROP PARTITION SCHEME PS_OrderMonth;
+                DROP PARTITION FUNCTION PF_OrderMonth;
+            END;
+        """)
+
+
+# T-SQL DDL constructs and their SQLite equivalents, applied in order
+_DDL_TRANSLATIONS = [
+    (re.compile(r"^\s*USE\s+\w+\s*;", re.IGNORECASE | re.MULTILINE), ""),
+    (re.compile(r"IF\s+OBJECT_ID\(N?'[\w.]+',\s*N?'U'\)\s+IS\s+NULL\s+CREATE\s+TABLE\s+", re.IGNORECASE),
+     "CREATE TABLE IF NOT EXISTS "),
+    (re.compile(r"IF\s+NOT\s+EXISTS\s*\(\s*SELECT\s+1\s+FROM\s+sys\.indexes\b.*?\)\)\s*(?=CREATE\b)",
+                re.IGNORECASE | re.DOTALL), ""),
+    (re.compile(r"IF\s+EXISTS\s*\(\s*SELECT\s+1\s+FROM\s+sys\.columns\b.*?\)\s*DROP\s+TABLE\s+[\w.]+\s*;",
+                re.IGNORECASE | re.DOTALL), ""),
+    (re.compile(r"IF\s+COL_LENGTH\(N?'[\w.]+',\s*N?'\w+'\)\s+IS\s+NULL\s+ALTER\s+TABLE\s+([\w.]+)\s+ADD\s+",
+                re.IGNORECASE), r"ALTER TABLE \1 ADD COLUMN "),
+    (re.compile(r"CREATE\s+(?:NON)?CLUSTERED\s+COLUMNSTORE\s+INDEX\b[^;]*;", re.IGNORECASE), ""),
+    (re.compile(r"CREATE\s+(UNIQUE\s+)?(?:NON)?CLUSTERED\s+INDEX\s+", re.IGNORECASE), r"CREATE \1INDEX IF NOT EXISTS "),
+    (re.compile(r"\s+INCLUDE\s*\([^)]*\)", re.IGNORECASE), ""),
+    (re.compile(r"\bdbo\.", re.IGNORECASE), ""),
+    (re.compile(r"\bINT\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)\s+PRIMARY\s+KEY", re.IGNORECASE),
+     "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bN?VARCHAR\s*\(\s*MAX\s*\)", re.IGNORECASE), "TEXT"),
+    (re.compile(r"\bUNIQUEIDENTIFIER\b", re.IGNORECASE), "TEXT"),
+    (re.compile(r"\bBINARY\s*\(\s*\d+\s*\)", re.IGNORECASE), "BLOB"),
+    (re.compile(r"\bGETDATE\(\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bN'"), "'"),
+]
+
+
+def translate_ddl(sql_script: str) -> str:
+    """
+    Translates the T-SQL table and index DDL of the pipeline into SQLite DDL.
+
+    Existence guards become IF NOT EXISTS clauses, COL_LENGTH-guarded column additions
+    become plain ADD COLUMN statements (see Backend.already_applied), IDENTITY keys become
+    AUTOINCREMENT rowid keys, (MAX) types become TEXT, BINARY becomes BLOB, and SQL
+    Server-only options (INCLUDE columns,
+    columnstore indexes, schema prefixes, sys.columns-guarded table migrations) are dropped.
+
+    Args:
+        sql_script (str): T-SQL DDL script.
+
+    Returns:
+        str: Equivalent SQLite script.
+    """
+    for pattern, replacement in _DDL_TRANSLATIONS:
+        sql_script = pattern.sub(replacement, sql_script)
+    return sql_script
+
+
+def split_sqlite_statements(sql_script: str):
+    """
+    Splits a SQLite script into complete statements, ignoring semicolons that appear
+    inside string literals or comments.
+    """
+    statements, current = [], ""
+    for line in sql_script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ""
+    # A trailing fragment holding only comments is not a statement
+    if any(line.strip() and not line.strip().startswith('--') for line in current.splitlines()):
+        statements.append(current.strip())
+    return statements
+
+
+# A line holding only GO ends a T-SQL batch
+_BATCH_SEPARATOR = re.compile(r"^\s*(GO)\s*$", re.IGNORECASE)
+
+
+def _tsql_tokens(sql_script: str):
+    """
+    Yields (position, character) for every character of a T-SQL script that is outside
+    string literals, quoted or bracketed identifiers and comments.
+    """
+    i, length = 0, len(sql_script)
+    while i < length:
+        char = sql_script[i]
+        if sql_script.startswith('--', i):
+            end = sql_script.find('\n', i)
+            i = length if end < 0 else end
+            continue
+        if sql_script.startswith('/*', i):
+            end = sql_script.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+            continue
+        if char in "'\"[":
+            closing = ']' if char == '[' else char
+            i += 1
+            while i < length:
+                if sql_script[i] == closing:
+                    # A doubled quote is an escaped one, not the end of the literal
+                    if sql_script.startswith(closing * 2, i):
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+            continue
+        yield i, char
+        i += 1
+
+
+def split_tsql_statements(sql_script: str):
+    """
+    Splits a T-SQL batch into statements on semicolons, ignoring the ones inside string
+    literals, identifiers and comments.
+    """
+    statements, start = [], 0
+    for position, char in _tsql_tokens(sql_script):
+        if char == ';':
+            statements.append(sql_script[start:position + 1])
+            start = position + 1
+    statements.append(sql_script[start:])
+    return [statement.strip() for statement in statements if _has_code(statement)]
+
+
+def split_tsql_batches(sql_script: str):
+    """
+    Splits a T-SQL script into the batches separated by GO lines. A GO line inside a
+    block comment or a multi-line string literal does not end a batch. A script
+    without GO is a single batch.
+    """
+    code = {position for position, _ in _tsql_tokens(sql_script)}
+    batches, current, offset = [], [], 0
+    for line in sql_script.splitlines(keepends=True):
+        separator = _BATCH_SEPARATOR.match(line)
+        if separator and offset + separator.start(1) in code:
+            batches.append(''.join(current))
+            current = []
+        else:
+            current.append(line)
+        offset += len(line)
+    batches.append(''.join(current))
+    return [batch.strip() for batch in batches if _has_code(batch)]
+
+
+def _has_code(sql: str) -> bool:
+    return any(not char.isspace() for _, char in _tsql_tokens(sql))
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    """
+    sqlite3 cursor usable as a context manager, like a pyodbc cursor.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _SQLiteConnection(sqlite3.Connection):
+    """
+    sqlite3 connection exposing the pyodbc-style autocommit attribute the pool uses.
+    Transactions start IMMEDIATE so concurrent writers queue on the busy timeout
+    instead of failing on a lock upgrade.
+    """
+
+    def cursor(self, factory=_SQLiteCursor):
+        return super().cursor(factory)
+
+    @property
+    def autocommit(self):
+        return self.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value):
+        self.isolation_level = None if value else "IMMEDIATE"
+
+
+# Python values SQLite cannot bind natively
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=" "))
+sqlite3.register_adapter(pd.Timestamp, lambda value: value.isoformat(sep=" "))
+
+
+class SQLiteBackend(Backend):
+    """
+    Embedded, file-based SQLite database for laptops, CI and benchmarks.
+
+    Table and index DDL is translated from the T-SQL scripts; load scripts are taken
+    from a `sqlite` directory next to the T-SQL script they replace.
+    """
+    name = SQLITE
+    Error = sqlite3.Error
+    dialect_directory = "sqlite"
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.database_path = settings.sqlite_path
+
+    def connect(self):
+        conn = sqlite3.connect(self.database_path, timeout=60, factory=_SQLiteConnection,
+                               check_same_thread=False, isolation_level="IMMEDIATE")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        # Row counts recorded by the load scripts, see run_batches
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS etl_row_counts (Name TEXT, RowCount INTEGER);")
+        conn.execute("""
+            CREATE TEMP VIEW IF NOT EXISTS etl_row_count_totals AS
+            SELECT
+                COALESCE(SUM(CASE WHEN Name = 'RowsInserted' THEN RowCount END), 0) AS RowsInserted,
+                COALESCE(SUM(CASE WHEN Name = 'RowsUpdated' THEN RowCount END), 0) AS RowsUpdated,
+                COALESCE(SUM(CASE WHEN Name = 'RowsExpired' THEN RowCount END), 0) AS RowsExpired,
+                COALESCE(SUM(CASE WHEN Name = 'ErrorCount' THEN RowCount END), 0) AS ErrorCount
+            FROM etl_row_counts;
+        """)
+        return conn
+
+    def ensure_database(self):
+        directory = os.path.dirname(self.database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        logger.info(f"Using SQLite database: {self.database_path}")
+
+    def load_script(self, file_path: str) -> str:
+        directory, file_name = os.path.split(file_path)
+        dialect_path = os.path.join(directory, self.dialect_directory, file_name)
+        if os.path.exists(dialect_path):
+            return super().load_script(dialect_path)
+        return translate_ddl(super().load_script(file_path))
+
+    def split_script(self, sql_script: str) -> list:
+        return split_sqlite_statements(sql_script)
+
+    def batch_params(self, batch: str, params: dict = None):
+        # The SQLite dialect references the declared parameters by name, as :Name
+        used = {name: value for name, value in (params or {}).items() if re.search(rf":{name}\b", batch)}
+        return used or None
+
+    def run_batches(self, cursor, batches, params: dict = None, name: str = None) -> dict:
+        counts = {}
+        for i, statement in enumerate(batches):
+            label = name if len(batches) == 1 else f"{name}#{i + 1}"
+            run_statement(cursor, statement, self.batch_params(statement, params), name=label)
+            if cursor.description is not None:
+                counts = _row_counts(cursor) or counts
+        return counts
+
+    def truncate_table(self, cursor, table_name: str):
+        run_statement(cursor, f"DELETE FROM {table_name};")
+
+    def fact_window(self, cursor, start_date, end_date):
+        cursor.execute("""
+            SELECT
+                COALESCE(
+                    date(:StartDate),
+                    (SELECT LastOrderDate FROM ETL_HighWaterMark WHERE ProcessName = 'FactOrders'),
+                    (SELECT MIN(OrderDate) FROM Staging_Orders)
+                ),
+                COALESCE(
+                    date(:EndDate),
+                    (SELECT MAX(OrderDate) FROM Staging_Orders)
+                );
+        """, {'StartDate': start_date, 'EndDate': end_date})
+        return tuple(cursor.fetchone())
+
+    def already_applied(self, error) -> bool:
+        return 'duplicate column name' in str(error)
+
+    def reset(self, cursor, kept_tables=()):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite!_%' ESCAPE '!';")
+        for (table_name,) in cursor.fetchall():
+            if table_name not in kept_tables:
+                cursor.execute(f'DROP TABLE IF EXISTS "{table_name}";')
+
+
+BACKENDS = {
+    MSSQL: SqlServerBackend,
+    SQLITE: SQLiteBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> Backend:
+    """
+    Returns the backend selected by the current settings.
+    """
+    global _backend
+    settings = get_settings()
+    with _backend_lock:
+        if _backend is None or _backend.settings is not settings:
+            if settings.backend not in BACKENDS:
+                raise ValueError(f"Unknown backend {settings.backend!r}; expected one of {', '.join(BACKENDS)}")
+            _backend = BACKENDS[settings.backend](settings)
+        return _backend
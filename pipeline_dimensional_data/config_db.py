@@ -1,32 +1,153 @@
 import configparser
 import os
+import threading
+from dataclasses import dataclass, field, asdict
 import pyodbc
 from loggings import logger
 
 
-# Database configuration loader
-def get_db_config(config_file='./sql_server_config.cfg'):
+DEFAULT_CONFIG_FILE = './sql_server_config.cfg'
+
+# Environment variables that override the matching key of the [SQL_SERVER] section
+ENV_OVERRIDES = {
+    'driver': 'SQL_SERVER_DRIVER',
+    'server': 'SQL_SERVER_SERVER',
+    'database': 'SQL_SERVER_DATABASE',
+    'user': 'SQL_SERVER_USER',
+    'password': 'SQL_SERVER_PASSWORD',
+    'pool_size': 'SQL_SERVER_POOL_SIZE',
+    'backend': 'ETL_BACKEND',
+    'sqlite_path': 'ETL_SQLITE_PATH',
+}
+
+# Settings that only the SQL Server backend needs
+SQL_SERVER_KEYS = ('driver', 'server', 'database', 'user', 'password')
+
+
+@dataclass(frozen=True)
+class DBSettings:
+    """
+    Immutable database settings shared by every connection path of the pipeline.
+
+    `backend` selects the engine: "mssql" (SQL Server, the default) or "sqlite", an
+    embedded database stored in `sqlite_path` that needs none of the SQL Server keys.
+    """
+    driver: str = None
+    server: str = None
+    database: str = None
+    user: str = None
+    password: str = field(default=None, repr=False)
+    pool_size: int = 4
+    backend: str = "mssql"
+    sqlite_path: str = "order_dds.sqlite"
+
+    def connection_string(self, database: str = None) -> str:
+        """
+        Builds the ODBC connection string.
+
+        Args:
+            database (str): Database to connect to. Defaults to the configured database.
+
+        Returns:
+            str: ODBC connection string.
+        """
+        return (
+            f"Driver={self.driver};"
+            f"Server={self.server};"
+            f"Database={database or self.database};"
+            f"UID={self.user};"
+            f"PWD={self.password};"
+            f"TrustServerCertificate=yes;"
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def load_settings(config_file: str = None, **overrides) -> DBSettings:
     """
-    Reads database configuration from a config file.
+    Reads the [SQL_SERVER] section of the config file and applies environment overrides.
 
     Args:
-        config_file (str): Path to the configuration file.
+        config_file (str): Path to the configuration file. Defaults to $SQL_SERVER_CONFIG,
+            then ./sql_server_config.cfg.
+        **overrides: Settings taking precedence over the file and the environment
+            (e.g. backend from the command line). None values are ignored.
 
     Returns:
-        dict: Database connection parameters.
+        DBSettings: Parsed settings.
     """
+    config_file = config_file or os.environ.get('SQL_SERVER_CONFIG', DEFAULT_CONFIG_FILE)
     config = configparser.ConfigParser()
     config.read(config_file)
-    if 'SQL_SERVER' not in config:
-        raise KeyError("'SQL_SERVER' section not found in the configuration file.")
-    db_config = {
-        'driver': config['SQL_SERVER']['driver'],
-        'server': config['SQL_SERVER']['server'],
-        'database': config['SQL_SERVER']['database'],
-        'user': config['SQL_SERVER']['user'],
-        'password': config['SQL_SERVER']['password']
-    }
-    return db_config
+    section = config['SQL_SERVER'] if 'SQL_SERVER' in config else {}
+
+    values = {}
+    for key, env_var in ENV_OVERRIDES.items():
+        value = os.environ.get(env_var, section.get(key))
+        if value is not None:
+            values[key] = value
+    values.update({key: value for key, value in overrides.items() if value is not None})
+
+    required = SQL_SERVER_KEYS if values.get('backend', 'mssql') == 'mssql' else ()
+    missing = [key for key in required if key not in values]
+    if missing:
+        if not section:
+            raise KeyError("'SQL_SERVER' section not found in the configuration file.")
+        raise KeyError(f"Missing database settings: {', '.join(missing)}")
+    if 'pool_size' in values:
+        values['pool_size'] = int(values['pool_size'])
+    return DBSettings(**values)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> DBSettings:
+    """
+    Returns the process-wide settings, loading them on first use.
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def reload_settings(config_file: str = None, **overrides) -> DBSettings:
+    """
+    Discards the cached settings and loads them again, e.g. after the config file
+    or environment changed.
+
+    Args:
+        config_file (str): Optional path to the configuration file to load.
+        **overrides: Settings taking precedence over the file and the environment.
+
+    Returns:
+        DBSettings: Freshly loaded settings.
+    """
+    global _settings
+    with _settings_lock:
+        _settings = load_settings(config_file, **overrides)
+    return _settings
+
+
+# Database configuration loader
+def get_db_config(config_file=None):
+    """
+    Returns database configuration as a dictionary.
+
+    Args:
+        config_file (str): Optional path to a configuration file. When omitted, the cached
+            process-wide settings are used.
+
+    Returns:
+        dict: Database connection parameters.
+    """
+    settings = load_settings(config_file) if config_file else get_settings()
+    return settings.as_dict()
 
 
 # Database connection handler
@@ -34,48 +155,29 @@ def get_db_connection(default_db=None):
     """
     Establishes a database connection using config.
     Args:
-        default_db (str): Optional default database to connect to. If not specified, connects to master.
+        default_db (str): Optional default database to connect to. If not specified, connects to
+            the configured database.
     """
-    db_config = get_db_config()
-    database = default_db or db_config['database']
-    connection_string = (
-        f"Driver={db_config['driver']};"
-        f"Server={db_config['server']};"
-        f"Database={database};"
-        f"UID={db_config['user']};"
-        f"PWD={db_config['password']};"
-        f"TrustServerCertificate=yes;"
-    )
-    return pyodbc.connect(connection_string)
+    return pyodbc.connect(get_settings().connection_string(default_db))
 
 
 # Database existence checker / creator
-def ensure_database_exists(db_creation_sql_path='infrastructure_initiation/dimensional_db_creation.sql'):
-    """
-    Ensures the database exists by executing a SQL script.
+def ensure_database_exists(batches):
     """
-    db_config = get_db_config()
+    Ensures the database exists by running the batches of the database creation script
+    on the master database.
 
-    connection_string = (
-        f"Driver={db_config['driver']};"
-        f"Server={db_config['server']};"
-        f"Database=master;"
-        f"UID={db_config['user']};"
-        f"PWD={db_config['password']};"
-        f"TrustServerCertificate=yes;"
-    )
-
-    if not os.path.exists(db_creation_sql_path):
-        raise FileNotFoundError(f"Database creation SQL file not found: {db_creation_sql_path}")
+    Args:
+        batches: Batches of infrastructure_initiation/dimensional_db_creation.sql, from
+            the script registry.
+    """
+    connection_string = get_settings().connection_string('master')
 
     try:
         with pyodbc.connect(connection_string, autocommit=True) as conn:
             cursor = conn.cursor()
-
-            with open(db_creation_sql_path, 'r', encoding='utf-8') as sql_file:
-                sql_script = sql_file.read()
-
-            cursor.execute(sql_script)
+            for batch in batches:
+                cursor.execute(batch)
 
     except pyodbc.Error as e:
         logger.error(f"Error during database creation: {e}")
@@ -0,0 +1,180 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from loggings import logger
+from pipeline_dimensional_data.metrics import get_metrics
+from pipeline_dimensional_data.config_db import get_settings
+from pipeline_dimensional_data.backends import get_backend
+
+# Maximum number of open connections shared by all tasks of a run, unless configured
+DEFAULT_POOL_SIZE = 4
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections shared by every task of a pipeline run.
+    """
+
+    def __init__(self, connect, max_size: int = DEFAULT_POOL_SIZE, health_check_query: str = "SELECT 1",
+                 acquire_timeout: float = 60):
+        """
+        Args:
+            connect (callable): Factory returning a new DB-API connection.
+            max_size (int): Maximum number of connections open at the same time.
+            health_check_query (str): Query used to validate an idle connection before reuse.
+            acquire_timeout (float): Seconds to wait for a free connection before failing.
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.health_check_query = health_check_query
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = False
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Borrows a connection, reusing a healthy idle one or opening a new one.
+
+        Returns:
+            A DB-API connection that must be handed back with release().
+        """
+        if self.closed:
+            raise RuntimeError("Connection pool is closed.")
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No database connection available after {self.acquire_timeout} seconds.")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._is_healthy(conn):
+                    self._record_acquire(started, opened=False)
+                    return conn
+                self._discard(conn)
+
+            conn = self._connect()
+            with self._lock:
+                self.created += 1
+            logger.debug(f"Opened pooled database connection #{self.created}.")
+            self._record_acquire(started, opened=True)
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _record_acquire(self, started: float, opened: bool):
+        get_metrics().record(
+            'connection_acquire', 'pool',
+            duration_seconds=round(time.perf_counter() - started, 6),
+            opened=opened,
+        )
+
+    def release(self, conn, discard: bool = False):
+        """
+        Returns a borrowed connection to the pool, rolling back any uncommitted work.
+
+        Args:
+            conn: Connection obtained from acquire().
+            discard (bool): Close the connection instead of keeping it for reuse.
+        """
+        try:
+            if not discard and not self.closed:
+                try:
+                    if not conn.autocommit:
+                        conn.rollback()
+                    conn.autocommit = False
+                    self._idle.put(conn)
+                    return
+                except Exception as e:
+                    logger.warning(f"Could not reset pooled connection: {e}")
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, autocommit: bool = False):
+        """
+        Borrows a connection for the duration of a with-block and always returns it.
+
+        Args:
+            autocommit (bool): Run the borrowed connection in autocommit mode.
+
+        Yields:
+            A DB-API connection.
+        """
+        conn = self.acquire()
+        failed = False
+        try:
+            conn.autocommit = autocommit
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(conn, discard=failed and not self._is_healthy(conn))
+
+    def close_all(self):
+        """
+        Closes every idle connection and refuses further borrowing.
+        """
+        self.closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    Connections are opened by the configured backend. The database existence check
+    runs once, when the pool is created, instead of before every connection.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            backend = get_backend()
+            backend.ensure_database()
+            _pool = ConnectionPool(backend.connect, max_size=get_settings().pool_size)
+        return _pool
+
+
+def close_pool():
+    """
+    Closes the process-wide connection pool and logs how many connections it opened.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            logger.info(f"Connection pool closed after opening {_pool.created} connections.")
+            _pool = None
@@ -1,13 +1,25 @@
 from pipeline_dimensional_data.tasks import (
     create_tables_task,
+    truncate_staging_tables_task,
+    disable_staging_indexes_task,
+    create_indexes_task,
     load_raw_data_task,
     update_dimensional_tables_task,
+    add_fact_partitions_task,
     ingest_fact_table_task,
-    ingest_fact_error_task,
+    update_aggregates_task,
     populate_dim_sor_task,
+    resolve_fact_window,
 )
+from pipeline_dimensional_data.raw_data_reader import STREAM_CHUNK_SIZE
+from pipeline_dimensional_data.backends import get_backend
+from pipeline_dimensional_data.connection_pool import get_pool
+from pipeline_dimensional_data.sql_registry import get_registry
+from pipeline_dimensional_data.metrics import start_run_metrics
+from pipeline_dimensional_data.run_history import build_task_rows, start_run, finish_run
 from utils import generate_uuid
 from loggings import logger
+from datetime import datetime
 
 
 class DimensionalDataFlow:
@@ -15,46 +27,122 @@ class DimensionalDataFlow:
     Orchestrates the ETL pipeline by defining tasks and their execution order.
     """
 
-    def __init__(self):
+    def __init__(self, raw_data_path: str = "raw_data_source.xlsx", stream: bool = False,
+                 chunk_size: int = STREAM_CHUNK_SIZE, include_columnstore: bool = False, mode: str = None,
+                 load_workers: int = None, partition_facts: bool = False, parse_workers: int = 1):
         """
         Initializes the flow with a unique execution ID and task status tracker.
+
+        Args:
+            raw_data_path (str): Excel workbook or directory of per-sheet CSV files to load.
+            stream (bool): Stream raw data into staging in bounded chunks.
+            chunk_size (int): Maximum number of rows held in memory when streaming.
+            include_columnstore (bool): Maintain a columnstore index on FactOrders.
+            mode (str): Run mode recorded in the run history.
+            load_workers (int): Staging tables loaded at once. Defaults to the pool size.
+            partition_facts (bool): Partition FactOrders and FactError by month and reload
+                windows by partition switching (SQL Server only).
+            parse_workers (int): Processes parsing the workbook sheets when not streaming.
         """
         self.execution_id = generate_uuid()
         self.tasks_status = {}
+        self.raw_data_path = raw_data_path
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.include_columnstore = include_columnstore
+        self.mode = mode
+        self.load_workers = load_workers
+        self.partition_facts = partition_facts
+        self.parse_workers = parse_workers
+        self.metrics = None
+        self.task_history = []
+
+    def _run_task(self, name: str, task, *args, **kwargs):
+        """
+        Runs one task inside its metrics scope, attaches the task's timing summary to its
+        status and keeps its run-history rows.
+        """
+        started_at = datetime.now()
+        with self.metrics.task(name):
+            status = task(*args, **kwargs)
+        status['metrics'] = self.metrics.task_summary(name)
+        self.tasks_status[name] = status
+        self.task_history.extend(build_task_rows(name, status, started_at, datetime.now()))
+        return status
 
-    def exec(self, start_date: str, end_date: str):
+    def _run_required_task(self, name: str, task, *args, **kwargs):
+        """
+        Runs a task the fact load depends on. A failure stops the flow, so the fact
+        tables are not loaded from incomplete staging tables or stale dimensions, and the
+        high-water mark does not move past a window that was never loaded properly.
+        """
+        status = self._run_task(name, task, *args, **kwargs)
+        if not status.get('success'):
+            raise RuntimeError(f"Task {name} failed: {status.get('error')}")
+        return status
+
+    def exec(self, start_date: str = None, end_date: str = None):
         logger.info(f"Starting Dimensional Data Flow Execution ID: {self.execution_id}")
+        self.metrics = start_run_metrics(self.execution_id)
+        started_at = datetime.now()
 
         try:
+            # Every task below borrows its connections from this shared pool and runs its
+            # scripts from the registry, which reads and splits every script once here
+            pool = get_pool()
+            get_registry()
+
             # Task 1: Create Tables
-            self.tasks_status['create_tables'] = create_tables_task()
+            self._run_required_task('create_tables', create_tables_task, self.partition_facts)
             logger.info("Tables created successfully.")
+            start_run(self.execution_id, started_at, self.mode)
+
+            # Task 1b: Start from empty staging tables; the warehouse itself is kept
+            self._run_required_task('truncate_staging', truncate_staging_tables_task)
+            logger.info("Staging tables truncated successfully.")
+            self._run_required_task('disable_staging_indexes', disable_staging_indexes_task)
 
             # Task 2: Load Raw Data
-            self.tasks_status['load_raw_data'] = load_raw_data_task("raw_data_source.xlsx")
+            self._run_required_task(
+                'load_raw_data', load_raw_data_task,
+                self.raw_data_path, stream=self.stream, chunk_size=self.chunk_size,
+                load_workers=self.load_workers, max_workers=self.parse_workers,
+            )
             logger.info("Raw data loaded successfully.")
 
+            # Task 2b: Build indexes only after the bulk load
+            self._run_required_task('create_indexes', create_indexes_task, self.include_columnstore)
+            logger.info("Indexes created successfully.")
+
             # Task 3: Update Dimensional Tables
             # Update Dimensional Tables
             dim_tables_directory = "pipeline_dimensional_data/queries"
-            self.tasks_status['update_dim_tables'] = update_dimensional_tables_task(dim_tables_directory)
+            self._run_required_task('update_dim_tables', update_dimensional_tables_task, dim_tables_directory)
             logger.info("Dimensional tables updated successfully.")
 
-            # Task 4: Ingest Fact Table
+            # Task 4: Ingest Fact Table, routing faulty lines to FactError
+            start_date, end_date = resolve_fact_window(start_date, end_date)
             fact_file = "pipeline_dimensional_data/queries/update_fact.sql"
-            self.tasks_status['ingest_fact'] = ingest_fact_table_task(fact_file, start_date, end_date)
-            logger.info("Fact table ingestion completed successfully.")
+            if self.partition_facts and get_backend().supports_partitioning:
+                # Task 4a: New month partitions, outside the fact load transaction
+                partitions_file = "pipeline_dimensional_data/queries/add_fact_partitions.sql"
+                self._run_required_task('add_fact_partitions', add_fact_partitions_task,
+                                        partitions_file, start_date, end_date)
+                fact_file = "pipeline_dimensional_data/queries/update_fact_partitioned.sql"
+            self._run_task('ingest_fact', ingest_fact_table_task, fact_file, start_date, end_date)
+            logger.info("Fact and FactError table ingestion completed successfully.")
 
-            # Task 5: Ingest FactError Table
-            fact_error_file = "pipeline_dimensional_data/queries/update_fact_error.sql"
-            self.tasks_status['ingest_fact_error'] = ingest_fact_error_task(fact_error_file, start_date, end_date)
-            logger.info("FactError table ingestion completed successfully.")
+            # Task 4b: Apply the fact changes to the aggregate tables
+            aggregates_file = "pipeline_dimensional_data/queries/update_aggregates.sql"
+            self._run_task('update_aggregates', update_aggregates_task, aggregates_file)
+            logger.info("Aggregate tables updated successfully.")
 
-            # Task 6: Populate Dim_SOR
+            # Task 5: Populate Dim_SOR
             dim_sor_file = "pipeline_dimensional_data/queries/update_dim_sor.sql"
-            self.tasks_status['populate_dim_sor'] = populate_dim_sor_task(dim_sor_file)
+            self._run_task('populate_dim_sor', populate_dim_sor_task, dim_sor_file)
             logger.info("Dim_SOR table populated successfully.")
 
+            logger.info(f"Execution {self.execution_id} used {pool.created} database connections.")
             logger.info(f"Execution {self.execution_id} completed successfully!")
             return self.tasks_status
 
@@ -62,3 +150,8 @@ class DimensionalDataFlow:
             logger.error(f"Execution {self.execution_id} failed: {str(e)}", exc_info=True)
             self.tasks_status['error'] = str(e)
             return self.tasks_status
+
+        finally:
+            finish_run(self.execution_id, started_at, datetime.now(), self.task_history,
+                       self.tasks_status.get('error'), self.mode)
+            self.metrics.flush()
@@ -0,0 +1,264 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from loggings import logger
+from pipeline_dimensional_data.backends import get_backend, run_statement
+from pipeline_dimensional_data.metrics import get_metrics
+
+# Work table the resolved order lines are bulk loaded into for update_fact.sql
+FACT_LINES_TABLE = "Staging_FactLines"
+
+# Rows sent per executemany round-trip when writing fact lines and inferred members
+FACT_LINES_BATCH_SIZE = 1000
+
+# Staging_FactLines columns, in insert order
+FACT_LINE_COLUMNS = (
+    'Staging_Raw_ID', 'OrderID', 'CustomerID', 'EmployeeID', 'ShipVia', 'ProductID',
+    'CustomerKey', 'EmployeeKey', 'ShipperKey', 'ProductKey',
+    'OrderDate', 'Quantity', 'TotalAmount', 'Discount', 'ErrorReason',
+)
+
+# Order lines of the load window, before key resolution
+_FACT_LINES_QUERY = """
+    SELECT
+        so.Staging_Raw_ID, so.OrderID, so.CustomerID, so.EmployeeID, so.ShipVia, sod.ProductID,
+        so.OrderDate, sod.Quantity, sod.UnitPrice * sod.Quantity AS TotalAmount, sod.Discount
+    FROM Staging_Orders so
+    JOIN Staging_OrderDetails sod
+        ON sod.OrderID = so.OrderID
+    WHERE so.OrderDate BETWEEN ? AND ?;
+"""
+
+
+class DimensionKeyMap:
+    """
+    Natural key -> surrogate key map of one dimension, loaded once per fact load.
+
+    Text natural keys are matched trimmed and case-insensitively, like SQL Server's
+    default collation compares them.
+    """
+
+    def __init__(self, fact_column: str, key_column: str, dimension: str, natural_key: str,
+                 surrogate_key: str, text: bool = False, active_filter: str = None, inferred_values=None):
+        """
+        Args:
+            fact_column (str): Fact line column holding the natural key.
+            key_column (str): Fact line column the surrogate key is written to.
+            dimension (str): Dimension table.
+            natural_key (str): Natural key column of the dimension.
+            surrogate_key (str): Surrogate key column of the dimension.
+            text (bool): Whether the natural key is text.
+            active_filter (str): Condition selecting the rows fact lines may point to
+                (the active version of an SCD2 dimension).
+            inferred_values (callable): Returns the extra {column: value} of an inferred member.
+        """
+        self.fact_column = fact_column
+        self.key_column = key_column
+        self.dimension = dimension
+        self.natural_key = natural_key
+        self.surrogate_key = surrogate_key
+        self.text = text
+        self.active_filter = active_filter
+        self.inferred_values = inferred_values or dict
+        self.keys = pd.Series(dtype='Int64')
+
+    def normalize(self, values: pd.Series) -> pd.Series:
+        if self.text:
+            return values.astype(object).where(values.notnull()).str.strip().str.casefold()
+        return pd.to_numeric(values, errors='coerce').astype('Int64')
+
+    def load(self, cursor):
+        """
+        Reads the natural -> surrogate pairs of the dimension. When a natural key has
+        several eligible rows, the latest surrogate key wins.
+        """
+        where = f" WHERE {self.active_filter}" if self.active_filter else ""
+        run_statement(
+            cursor,
+            f"SELECT {self.natural_key}, {self.surrogate_key} FROM {self.dimension}{where} "
+            f"ORDER BY {self.surrogate_key};",
+            name=f"load {self.dimension} keys",
+        )
+        pairs = pd.DataFrame.from_records(
+            [tuple(row) for row in cursor.fetchall()], columns=['natural', 'surrogate']
+        )
+        natural = self.normalize(pairs['natural'])
+        keys = pd.Series(pd.to_numeric(pairs['surrogate']).astype('Int64').to_numpy(), index=natural)
+        self.keys = keys[keys.index.notnull()]
+        self.keys = self.keys[~self.keys.index.duplicated(keep='last')]
+        return self
+
+    def lookup(self, natural_keys: pd.Series) -> pd.Series:
+        """
+        Resolves a column of natural keys; unknown and missing keys resolve to <NA>.
+        """
+        positions = self.keys.index.get_indexer(self.normalize(natural_keys))
+        resolved = pd.Series(pd.NA, index=natural_keys.index, dtype='Int64')
+        found = positions >= 0
+        resolved[found] = self.keys.to_numpy()[positions[found]]
+        return resolved
+
+    def add_inferred_members(self, cursor, natural_keys: pd.Series) -> int:
+        """
+        Inserts an inferred member (IsInferred = 1) for every natural key that is present
+        but unknown to the dimension, then reloads the map. The dimension scripts fill
+        in the member once it arrives in staging.
+
+        Returns:
+            int: Number of inferred members inserted.
+        """
+        unknown = natural_keys[natural_keys.notnull() & self.lookup(natural_keys).isna()]
+        unknown = unknown[~self.normalize(unknown).duplicated()]
+        if unknown.empty:
+            return 0
+
+        extra = self.inferred_values()
+        columns = [self.natural_key, 'IsInferred'] + list(extra)
+        placeholders = ", ".join("?" for _ in columns)
+        rows = [(_native(value), 1, *extra.values()) for value in unknown]
+        with get_metrics().timer('statement', f"insert inferred {self.dimension}") as measurements:
+            for start in range(0, len(rows), FACT_LINES_BATCH_SIZE):
+                cursor.executemany(
+                    f"INSERT INTO {self.dimension} ({', '.join(columns)}) VALUES ({placeholders});",
+                    rows[start:start + FACT_LINES_BATCH_SIZE],
+                )
+            measurements['rows_affected'] = len(rows)
+        logger.warning(f"Inserted {len(rows)} inferred members into {self.dimension}.")
+        self.load(cursor)
+        return len(rows)
+
+
+def fact_key_maps():
+    """
+    Returns fresh key maps of the dimensions the fact lines are resolved against, in
+    ErrorReason order. SCD2 customers resolve to their active version only.
+    """
+    return (
+        DimensionKeyMap('CustomerID', 'CustomerKey', 'DimCustomers', 'CustomerID', 'CustomerKey', text=True,
+                        active_filter='ExpirationDate IS NULL',
+                        inferred_values=lambda: {'EffectiveDate': date.today()}),
+        DimensionKeyMap('EmployeeID', 'EmployeeKey', 'DimEmployees', 'EmployeeID', 'EmployeeKey',
+                        inferred_values=lambda: {'IsDeleted': 0}),
+        DimensionKeyMap('ShipVia', 'ShipperKey', 'DimShippers', 'ShipperID', 'ShipperKey',
+                        inferred_values=lambda: {'IsDeleted': 0}),
+        DimensionKeyMap('ProductID', 'ProductKey', 'DimProducts', 'ProductID', 'ProductKey'),
+    )
+
+
+_MISSING_KEY_REASONS = {
+    'CustomerKey': 'Missing Customer',
+    'EmployeeKey': 'Missing Employee',
+    'ShipperKey': 'Missing Shipper',
+    'ProductKey': 'Missing Product',
+}
+
+
+def _native(value):
+    """
+    Converts numpy scalars and missing values to the Python objects the drivers bind.
+    """
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def error_reasons(lines: pd.DataFrame) -> pd.Series:
+    """
+    Returns the ErrorReason of every fact line: the first missing dimension key, then
+    invalid quantity, amount or discount; None for clean lines.
+    """
+    quantity = pd.to_numeric(lines['Quantity'], errors='coerce')
+    amount = pd.to_numeric(lines['TotalAmount'], errors='coerce')
+    discount = pd.to_numeric(lines['Discount'], errors='coerce')
+    conditions = [lines[key_column].isna().to_numpy() for key_column in _MISSING_KEY_REASONS]
+    conditions += [(quantity <= 0).to_numpy(), (amount <= 0).to_numpy(), (discount < 0).to_numpy()]
+    choices = list(_MISSING_KEY_REASONS.values()) + ['Invalid Quantity', 'Invalid Amount', 'Invalid Discount']
+    reasons = np.select(conditions, choices, default='')
+    return pd.Series(reasons, index=lines.index, dtype=object).where(reasons != '', None)
+
+
+def read_fact_lines(cursor, start_date, end_date) -> pd.DataFrame:
+    """
+    Reads the order lines of the load window from staging.
+    """
+    run_statement(cursor, _FACT_LINES_QUERY, (start_date, end_date), name="read fact lines")
+    columns = [column[0] for column in cursor.description]
+    return pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+
+
+def resolve_fact_lines(cursor, lines: pd.DataFrame, infer_members: bool = True):
+    """
+    Adds the surrogate keys and ErrorReason of every fact line. Each dimension map is
+    loaded once and applied to the whole window as a vectorized lookup.
+
+    Args:
+        cursor: Database cursor, in the transaction of the fact load.
+        lines (pd.DataFrame): Lines returned by read_fact_lines.
+        infer_members (bool): Insert inferred members for natural keys the dimensions
+            do not know yet, instead of routing their lines to FactError.
+
+    Returns:
+        tuple: (lines with key columns and ErrorReason, {dimension: inferred members inserted}).
+    """
+    inferred = {}
+    for key_map in fact_key_maps():
+        key_map.load(cursor)
+        if infer_members:
+            inferred[key_map.dimension] = key_map.add_inferred_members(cursor, lines[key_map.fact_column])
+        lines[key_map.key_column] = key_map.lookup(lines[key_map.fact_column])
+    lines['ErrorReason'] = error_reasons(lines)
+    return lines, inferred
+
+
+def check_unique_lines(lines: pd.DataFrame):
+    """
+    Fails the fact load when the window holds an order line, (OrderID, ProductKey), more
+    than once among the lines bound for FactOrders. The partitioned layout's unique index
+    includes OrderDate and no longer rejects such a line, see fact_partitioning.sql.
+
+    Raises:
+        ValueError: With the first duplicated lines.
+    """
+    resolved = lines[list(_MISSING_KEY_REASONS)].notna().all(axis=1)
+    keys = lines.loc[resolved, ['OrderID', 'ProductKey']]
+    duplicated = keys[keys.duplicated(keep=False)].drop_duplicates()
+    if len(duplicated):
+        samples = list(duplicated.head(5).itertuples(index=False, name=None))
+        raise ValueError(f"{len(duplicated)} order lines (OrderID, ProductKey) appear more than once "
+                         f"in the load window, e.g. {samples}")
+
+
+def write_fact_lines(cursor, lines: pd.DataFrame):
+    """
+    Replaces the content of Staging_FactLines with the resolved lines.
+    """
+    get_backend().truncate_table(cursor, FACT_LINES_TABLE)
+    values = lines[list(FACT_LINE_COLUMNS)].astype(object)
+    rows = [tuple(map(_native, row)) for row in values.itertuples(index=False, name=None)]
+    insert_query = (
+        f"INSERT INTO {FACT_LINES_TABLE} ({', '.join(FACT_LINE_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in FACT_LINE_COLUMNS)});"
+    )
+    cursor.fast_executemany = True
+    with get_metrics().timer('statement', f"insert {FACT_LINES_TABLE}") as measurements:
+        for start in range(0, len(rows), FACT_LINES_BATCH_SIZE):
+            cursor.executemany(insert_query, rows[start:start + FACT_LINES_BATCH_SIZE])
+        measurements['rows_affected'] = len(rows)
+    logger.info(f"Staged {len(rows)} resolved fact lines in {FACT_LINES_TABLE}.")
+
+
+def stage_fact_lines(cursor, start_date, end_date, infer_members: bool = True) -> dict:
+    """
+    Reads the order lines of the window, resolves their dimension keys on the Python
+    side and bulk loads them into Staging_FactLines, all on the caller's transaction.
+
+    Returns:
+        dict: {'fact_lines': int, 'inferred_members': {dimension: int}}
+    """
+    lines = read_fact_lines(cursor, start_date, end_date)
+    lines, inferred = resolve_fact_lines(cursor, lines, infer_members)
+    check_unique_lines(lines)
+    write_fact_lines(cursor, lines)
+    return {'fact_lines': len(lines), 'inferred_members': inferred}
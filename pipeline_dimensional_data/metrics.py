@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from loggings import logger
+
+METRICS_LOG_FILE = "logs/run_metrics.jsonl"
+
+
+class RunMetrics:
+    """
+    Collects timing and volume events of a pipeline run (tasks, SQL files, statements,
+    staging inserts, Excel reads and connection acquisition).
+    """
+
+    def __init__(self, execution_id: str = None):
+        self.execution_id = execution_id
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def current_task(self):
+        """
+        Task the events of the calling thread are attributed to.
+        """
+        return getattr(self._local, 'task', None)
+
+    def record(self, kind: str, name: str, **fields):
+        """
+        Records a single event.
+
+        Args:
+            kind (str): Event type, e.g. 'task', 'sql_file', 'statement', 'excel_read'.
+            name (str): What the event is about (task name, file path, table...).
+            **fields: Measurements such as duration_seconds, rows or bytes.
+
+        Returns:
+            dict: The recorded event.
+        """
+        event = {
+            'execution_id': self.execution_id,
+            'task': self.current_task,
+            'kind': kind,
+            'name': name,
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+        }
+        event.update(fields)
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    @contextmanager
+    def timer(self, kind: str, name: str, **fields):
+        """
+        Times a block and records it as one event. The yielded dict can be filled with
+        extra measurements (e.g. rows_affected) inside the block.
+        """
+        measurements = dict(fields)
+        started = time.perf_counter()
+        success = True
+        try:
+            yield measurements
+        except Exception:
+            success = False
+            raise
+        finally:
+            measurements['duration_seconds'] = round(time.perf_counter() - started, 6)
+            measurements.setdefault('success', success)
+            self.record(kind, name, **measurements)
+
+    @contextmanager
+    def task_scope(self, name: str):
+        """
+        Attributes the events the calling thread records inside the block to a task.
+        The task is kept per thread, so a worker thread enters the scope of the task
+        that handed it its work (see scheduler.run_dag).
+        """
+        previous_task = self.current_task
+        self._local.task = name
+        try:
+            yield
+        finally:
+            self._local.task = previous_task
+
+    @contextmanager
+    def task(self, name: str):
+        """
+        Times a pipeline task; events recorded inside the block are attributed to it.
+        """
+        with self.task_scope(name), self.timer('task', name) as measurements:
+            yield measurements
+
+    def task_summary(self, name: str) -> dict:
+        """
+        Aggregates the events recorded for one task.
+
+        Returns:
+            dict: Wall time, SQL statement count/time/rows, connection acquisition and Excel/staging volumes.
+        """
+        with self._lock:
+            events = [event for event in self.events if event['task'] == name]
+
+        def total(kind, field):
+            return sum(e.get(field) or 0 for e in events if e['kind'] == kind and (e.get(field) or 0) > 0)
+
+        wall = [e['duration_seconds'] for e in events if e['kind'] == 'task' and e['name'] == name]
+        return {
+            'wall_seconds': round(wall[-1], 3) if wall else None,
+            'sql_files': sum(1 for e in events if e['kind'] == 'sql_file'),
+            'sql_statements': sum(1 for e in events if e['kind'] == 'statement'),
+            'sql_seconds': round(total('statement', 'duration_seconds'), 3),
+            'rows_affected': total('statement', 'rows_affected'),
+            'connection_acquires': sum(1 for e in events if e['kind'] == 'connection_acquire'),
+            'connection_acquire_seconds': round(total('connection_acquire', 'duration_seconds'), 3),
+            'excel_rows_read': total('excel_read', 'rows'),
+            'excel_bytes_read': total('excel_read', 'bytes'),
+            'staging_rows_inserted': total('staging_insert', 'rows_inserted'),
+            'staging_rows_failed': total('staging_insert', 'rows_failed'),
+        }
+
+    def flush(self, path: str = METRICS_LOG_FILE):
+        """
+        Appends every recorded event to a JSON lines file and clears the buffer.
+        """
+        with self._lock:
+            events, self.events = self.events, []
+        if not events:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as metrics_file:
+            for event in events:
+                metrics_file.write(json.dumps(event, default=str) + '\n')
+        logger.info(f"Wrote {len(events)} metric events to: {path}")
+
+
+_metrics = RunMetrics()
+
+
+def start_run_metrics(execution_id: str) -> RunMetrics:
+    """
+    Starts collecting metrics for a new run and makes them the current metrics.
+    """
+    global _metrics
+    _metrics = RunMetrics(execution_id)
+    return _metrics
+
+
+def get_metrics() -> RunMetrics:
+    """
+    Returns the metrics of the current run.
+    """
+    return _metrics
@@ -0,0 +1,198 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+from contextlib import contextmanager
+from loggings import logger
+from pipeline_dimensional_data.metrics import get_metrics
+
+PROFILE_DIR = os.path.join("logs", "profiles")
+
+# Lines of the pstats report, per sort order
+PROFILE_REPORT_LINES = 40
+
+_EXECUTION_TIME_PATTERN = re.compile(r"CPU time = (\d+) ms,\s*elapsed time = (\d+) ms")
+_TABLE_IO_PATTERN = re.compile(
+    r"Table '([^']+)'\. Scan count (\d+), logical reads (\d+), physical reads (\d+)"
+)
+
+_sql_statistics_enabled = False
+_sql_statistics = []
+_lock = threading.Lock()
+
+# Set while profile_run is active; worker threads then profile themselves into _thread_profiles
+_profiling = False
+_thread_profiles = []
+
+
+def enable_sql_statistics(enabled: bool = True):
+    """
+    Turns SET STATISTICS IO, TIME ON for every statement run through utils.run_statement.
+    """
+    global _sql_statistics_enabled
+    _sql_statistics_enabled = enabled
+
+
+def sql_statistics_enabled() -> bool:
+    return _sql_statistics_enabled
+
+
+def parse_server_messages(messages):
+    """
+    Extracts CPU/elapsed time and per-table I/O from SQL Server STATISTICS messages.
+
+    Args:
+        messages (list): Message texts returned by the server.
+
+    Returns:
+        dict: cpu_ms, elapsed_ms and compile_ms totals, and {table: {scans, logical_reads, physical_reads}}.
+    """
+    statistics = {'cpu_ms': 0, 'elapsed_ms': 0, 'compile_ms': 0, 'tables': {}}
+    for message in messages:
+        for cpu, elapsed in _EXECUTION_TIME_PATTERN.findall(message):
+            if "parse and compile" in message:
+                statistics['compile_ms'] += int(elapsed)
+            else:
+                statistics['cpu_ms'] += int(cpu)
+                statistics['elapsed_ms'] += int(elapsed)
+        for table, scans, logical, physical in _TABLE_IO_PATTERN.findall(message):
+            table_io = statistics['tables'].setdefault(table, {'scans': 0, 'logical_reads': 0, 'physical_reads': 0})
+            table_io['scans'] += int(scans)
+            table_io['logical_reads'] += int(logical)
+            table_io['physical_reads'] += int(physical)
+    return statistics
+
+
+def capture_server_messages(cursor, name: str):
+    """
+    Records the server messages of the cursor's current result set against a statement.
+
+    Does nothing unless SQL statistics are enabled. Call it after execute() and before
+    every nextset(), since the driver only keeps the messages of the current result set.
+
+    Args:
+        cursor: pyodbc cursor.
+        name (str): Statement the messages belong to.
+    """
+    if not _sql_statistics_enabled:
+        return
+    messages = [str(message[-1]) for message in (getattr(cursor, 'messages', None) or [])]
+    if not messages:
+        return
+    statistics = parse_server_messages(messages)
+    event = get_metrics().record(
+        'sql_statistics', name,
+        cpu_ms=statistics['cpu_ms'],
+        elapsed_ms=statistics['elapsed_ms'],
+        compile_ms=statistics['compile_ms'],
+        logical_reads=sum(table_io['logical_reads'] for table_io in statistics['tables'].values()),
+        physical_reads=sum(table_io['physical_reads'] for table_io in statistics['tables'].values()),
+        tables=statistics['tables'],
+        messages=messages,
+    )
+    with _lock:
+        _sql_statistics.append(event)
+
+
+def _write_sql_report(path: str, events):
+    by_statement = {}
+    for event in events:
+        key = (event['task'], event['name'])
+        totals = by_statement.setdefault(key, {'cpu_ms': 0, 'elapsed_ms': 0, 'logical_reads': 0,
+                                               'physical_reads': 0, 'tables': {}})
+        for field in ('cpu_ms', 'elapsed_ms', 'logical_reads', 'physical_reads'):
+            totals[field] += event[field]
+        for table, table_io in event['tables'].items():
+            totals['tables'][table] = totals['tables'].get(table, 0) + table_io['logical_reads']
+
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write(f"{'task':<28} {'cpu_ms':>9} {'elapsed_ms':>11} {'logical':>10} {'physical':>9}  statement\n")
+        for (task, name), totals in sorted(by_statement.items(), key=lambda item: -item[1]['elapsed_ms']):
+            report.write(f"{str(task):<28} {totals['cpu_ms']:>9} {totals['elapsed_ms']:>11} "
+                         f"{totals['logical_reads']:>10} {totals['physical_reads']:>9}  {name}\n")
+            for table, logical_reads in sorted(totals['tables'].items(), key=lambda item: -item[1]):
+                report.write(f"{'':<28} {'':>9} {'':>11} {logical_reads:>10} {'':>9}    {table}\n")
+
+
+@contextmanager
+def profile_thread():
+    """
+    Profiles the calling worker thread while profile_run is active, since cProfile only
+    follows the thread that enabled it. The stats are merged into the run's profile.
+    Does nothing otherwise.
+    """
+    if not _profiling:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler, which then already covers every thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _lock:
+            _thread_profiles.append(profiler)
+
+
+def _write_python_report(path: str, stats: pstats.Stats):
+    output = io.StringIO()
+    stats.stream = output
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_REPORT_LINES)
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write(output.getvalue())
+
+
+@contextmanager
+def profile_run(execution_id: str, profile_dir: str = PROFILE_DIR):
+    """
+    Profiles a pipeline run on both sides.
+
+    The Python side runs under cProfile; the raw stats are dumped to <execution_id>.prof
+    (readable with pstats, snakeviz or flameprof) next to a text report of the top
+    functions. On the SQL side, STATISTICS IO and TIME are enabled for every statement
+    and the parsed server messages are written to <execution_id>_sql.txt, slowest
+    statement first. cProfile only follows the calling thread, so the worker threads
+    of the scheduler (staging loads and dimension scripts, see scheduler.run_dag)
+    profile themselves with profile_thread and their stats are merged in.
+
+    Args:
+        execution_id (str): Execution ID used to name the output files.
+        profile_dir (str): Directory receiving the profiles.
+    """
+    global _profiling
+    os.makedirs(profile_dir, exist_ok=True)
+    with _lock:
+        _sql_statistics.clear()
+        _thread_profiles.clear()
+    enable_sql_statistics()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _profiling = True
+    try:
+        yield profiler
+    finally:
+        _profiling = False
+        profiler.disable()
+        enable_sql_statistics(False)
+
+        base_path = os.path.join(profile_dir, execution_id)
+        with _lock:
+            thread_profiles, _thread_profiles[:] = list(_thread_profiles), []
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profiles:
+            stats.add(thread_profiler)
+        stats.dump_stats(f"{base_path}.prof")
+        _write_python_report(f"{base_path}.txt", stats)
+        with _lock:
+            events, _sql_statistics[:] = list(_sql_statistics), []
+        _write_sql_report(f"{base_path}_sql.txt", events)
+        logger.info(f"Profiles written to: {base_path}.prof, {base_path}.txt and {base_path}_sql.txt "
+                    f"({len(events)} SQL statistics captured)")
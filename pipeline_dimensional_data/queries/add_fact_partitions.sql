@@ -0,0 +1,29 @@
+-- Task 7a: Add the FactOrders/FactError month partitions a partitioned fact load needs
+-- Runs on its own, in autocommit, before update_fact_partitioned.sql. Splitting a
+-- partition takes a schema-modification lock on both fact tables; done here it is
+-- released right away instead of blocking their readers until the fact load commits.
+USE ORDER_DDS;
+SET NOCOUNT ON;
+
+-- Declare Parameters (bound by the pipeline, see resolve_fact_window)
+DECLARE @StartDate DATE = ?;                        -- Start of the load window
+DECLARE @EndDate DATE = ?;                          -- End of the load window
+DECLARE @FirstMonth DATE, @LastMonth DATE;          -- Boundaries to add
+
+-- Every month the window can write to, and the month after the latest loaded one so the
+-- last partition ends with its month and later splits never move rows
+SELECT @FirstMonth = MIN(OrderDate), @LastMonth = MAX(OrderDate)
+FROM dbo.Staging_Orders
+WHERE OrderDate BETWEEN @StartDate AND @EndDate;
+
+SELECT @LastMonth = DATEADD(MONTH, 1, MAX(OrderDate))
+FROM (
+    SELECT @LastMonth AS OrderDate
+    UNION ALL
+    SELECT MAX(OrderDate) FROM dbo.FactOrders
+    UNION ALL
+    SELECT MAX(OrderDate) FROM dbo.FactError
+) AS loaded;
+
+IF @FirstMonth IS NOT NULL
+    EXEC dbo.usp_AddOrderMonthPartitions @FirstMonth, @LastMonth;
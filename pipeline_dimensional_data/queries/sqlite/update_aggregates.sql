@@ -0,0 +1,159 @@
+-- Task 8: Update the aggregate tables read by the Power BI model, SQLite dialect of ../update_aggregates.sql
+DELETE FROM etl_row_counts;
+
+DROP TABLE IF EXISTS temp.aggregate_seed;
+DROP TABLE IF EXISTS temp.day_deltas;
+DROP TABLE IF EXISTS temp.month_deltas;
+DROP TABLE IF EXISTS temp.shipper_deltas;
+
+-- While the aggregates are still empty they are built from the whole of FactOrders
+CREATE TEMP TABLE aggregate_seed AS
+SELECT NOT EXISTS (SELECT 1 FROM AggSalesDayProductCustomer) AS Seed;
+
+DELETE FROM AggSalesMonthEmployee WHERE (SELECT Seed FROM aggregate_seed);
+DELETE FROM AggSalesShipperCountry WHERE (SELECT Seed FROM aggregate_seed);
+
+INSERT INTO AggSalesDayProductCustomer (OrderDate, ProductKey, CustomerKey, OrderLines, Quantity, TotalAmount)
+SELECT OrderDate, ProductKey, CustomerKey, COUNT(*), SUM(Quantity), SUM(TotalAmount)
+FROM FactOrders
+WHERE (SELECT Seed FROM aggregate_seed)
+  AND OrderDate IS NOT NULL AND ProductKey IS NOT NULL AND CustomerKey IS NOT NULL
+GROUP BY OrderDate, ProductKey, CustomerKey;
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+INSERT INTO AggSalesMonthEmployee (MonthStart, EmployeeKey, OrderLines, Quantity, TotalAmount)
+SELECT date(OrderDate, 'start of month'), EmployeeKey, COUNT(*), SUM(Quantity), SUM(TotalAmount)
+FROM FactOrders
+WHERE (SELECT Seed FROM aggregate_seed)
+  AND OrderDate IS NOT NULL AND EmployeeKey IS NOT NULL
+GROUP BY date(OrderDate, 'start of month'), EmployeeKey;
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+INSERT INTO AggSalesShipperCountry (ShipperKey, Country, OrderLines, Quantity, TotalAmount)
+SELECT fo.ShipperKey, COALESCE(dc.Country, 'Unknown'), COUNT(*), SUM(fo.Quantity), SUM(fo.TotalAmount)
+FROM FactOrders fo
+LEFT JOIN DimCustomers dc
+    ON dc.CustomerKey = fo.CustomerKey
+WHERE (SELECT Seed FROM aggregate_seed)
+  AND fo.ShipperKey IS NOT NULL
+GROUP BY fo.ShipperKey, COALESCE(dc.Country, 'Unknown');
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Otherwise add the net change of every touched group (see aggregates.queue_fact_deltas);
+-- a line that moved counts -1 in its old groups and +1 in its new ones. Groups left
+-- without any line are deleted.
+CREATE TEMP TABLE day_deltas AS
+SELECT OrderDate, ProductKey, CustomerKey,
+       SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+FROM ETL_AggregateDeltas
+WHERE NOT (SELECT Seed FROM aggregate_seed)
+GROUP BY OrderDate, ProductKey, CustomerKey
+HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0;
+
+INSERT INTO etl_row_counts
+SELECT
+    CASE
+        WHEN a.OrderLines IS NULL THEN 'RowsInserted'
+        WHEN a.OrderLines + d.OrderLines = 0 THEN 'RowsExpired'
+        ELSE 'RowsUpdated'
+    END,
+    COUNT(*)
+FROM day_deltas d
+LEFT JOIN AggSalesDayProductCustomer a
+    ON a.OrderDate = d.OrderDate AND a.ProductKey = d.ProductKey AND a.CustomerKey = d.CustomerKey
+GROUP BY 1;
+
+INSERT INTO AggSalesDayProductCustomer (OrderDate, ProductKey, CustomerKey, OrderLines, Quantity, TotalAmount)
+SELECT OrderDate, ProductKey, CustomerKey, OrderLines, Quantity, TotalAmount
+FROM day_deltas
+WHERE true
+ON CONFLICT (OrderDate, ProductKey, CustomerKey) DO UPDATE SET
+    OrderLines = OrderLines + excluded.OrderLines,
+    Quantity = COALESCE(Quantity, 0) + COALESCE(excluded.Quantity, 0),
+    TotalAmount = COALESCE(TotalAmount, 0) + COALESCE(excluded.TotalAmount, 0);
+
+DELETE FROM AggSalesDayProductCustomer
+WHERE OrderLines = 0
+  AND (OrderDate, ProductKey, CustomerKey) IN (SELECT OrderDate, ProductKey, CustomerKey FROM day_deltas);
+
+CREATE TEMP TABLE month_deltas AS
+SELECT date(OrderDate, 'start of month') AS MonthStart, EmployeeKey,
+       SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+FROM ETL_AggregateDeltas
+WHERE NOT (SELECT Seed FROM aggregate_seed)
+GROUP BY date(OrderDate, 'start of month'), EmployeeKey
+HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0;
+
+INSERT INTO etl_row_counts
+SELECT
+    CASE
+        WHEN a.OrderLines IS NULL THEN 'RowsInserted'
+        WHEN a.OrderLines + d.OrderLines = 0 THEN 'RowsExpired'
+        ELSE 'RowsUpdated'
+    END,
+    COUNT(*)
+FROM month_deltas d
+LEFT JOIN AggSalesMonthEmployee a
+    ON a.MonthStart = d.MonthStart AND a.EmployeeKey = d.EmployeeKey
+GROUP BY 1;
+
+INSERT INTO AggSalesMonthEmployee (MonthStart, EmployeeKey, OrderLines, Quantity, TotalAmount)
+SELECT MonthStart, EmployeeKey, OrderLines, Quantity, TotalAmount
+FROM month_deltas
+WHERE true
+ON CONFLICT (MonthStart, EmployeeKey) DO UPDATE SET
+    OrderLines = OrderLines + excluded.OrderLines,
+    Quantity = COALESCE(Quantity, 0) + COALESCE(excluded.Quantity, 0),
+    TotalAmount = COALESCE(TotalAmount, 0) + COALESCE(excluded.TotalAmount, 0);
+
+DELETE FROM AggSalesMonthEmployee
+WHERE OrderLines = 0
+  AND (MonthStart, EmployeeKey) IN (SELECT MonthStart, EmployeeKey FROM month_deltas);
+
+CREATE TEMP TABLE shipper_deltas AS
+SELECT ShipperKey, Country,
+       SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+FROM ETL_AggregateDeltas
+WHERE NOT (SELECT Seed FROM aggregate_seed)
+GROUP BY ShipperKey, Country
+HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0;
+
+INSERT INTO etl_row_counts
+SELECT
+    CASE
+        WHEN a.OrderLines IS NULL THEN 'RowsInserted'
+        WHEN a.OrderLines + d.OrderLines = 0 THEN 'RowsExpired'
+        ELSE 'RowsUpdated'
+    END,
+    COUNT(*)
+FROM shipper_deltas d
+LEFT JOIN AggSalesShipperCountry a
+    ON a.ShipperKey = d.ShipperKey AND a.Country = d.Country
+GROUP BY 1;
+
+INSERT INTO AggSalesShipperCountry (ShipperKey, Country, OrderLines, Quantity, TotalAmount)
+SELECT ShipperKey, Country, OrderLines, Quantity, TotalAmount
+FROM shipper_deltas
+WHERE true
+ON CONFLICT (ShipperKey, Country) DO UPDATE SET
+    OrderLines = OrderLines + excluded.OrderLines,
+    Quantity = COALESCE(Quantity, 0) + COALESCE(excluded.Quantity, 0),
+    TotalAmount = COALESCE(TotalAmount, 0) + COALESCE(excluded.TotalAmount, 0);
+
+DELETE FROM AggSalesShipperCountry
+WHERE OrderLines = 0
+  AND (ShipperKey, Country) IN (SELECT ShipperKey, Country FROM shipper_deltas);
+
+-- The applied deltas
+DELETE FROM ETL_AggregateDeltas;
+
+DROP TABLE temp.aggregate_seed;
+DROP TABLE temp.day_deltas;
+DROP TABLE temp.month_deltas;
+DROP TABLE temp.shipper_deltas;
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
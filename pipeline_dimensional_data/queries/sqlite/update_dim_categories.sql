@@ -0,0 +1,23 @@
+-- (SCD1 - Overwrite), SQLite dialect of ../update_dim_categories.sql
+DELETE FROM etl_row_counts;
+
+-- Update existing records whose values changed (NULL-safe)
+UPDATE DimCategories
+SET CategoryName = sc.CategoryName,
+    Description = sc.Description
+FROM Staging_Categories sc
+WHERE DimCategories.CategoryID = sc.CategoryID
+  AND (DimCategories.CategoryName IS NOT sc.CategoryName OR DimCategories.Description IS NOT sc.Description);
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new records
+INSERT INTO DimCategories (CategoryID, CategoryName, Description)
+SELECT sc.CategoryID, sc.CategoryName, sc.Description
+FROM Staging_Categories sc
+WHERE NOT EXISTS (SELECT 1 FROM DimCategories dc WHERE dc.CategoryID = sc.CategoryID);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
@@ -0,0 +1,107 @@
+-- (SCD2 - History), SQLite dialect of ../update_dim_customers.sql
+DELETE FROM etl_row_counts;
+
+-- Lines of the inferred members completed below are already counted in
+-- AggSalesShipperCountry under the country the member had; queue moving them to the
+-- country it gets (see aggregates.queue_fact_deltas). The other aggregates are keyed
+-- by CustomerKey, so the -1 and +1 cancel out there.
+INSERT INTO ETL_AggregateDeltas (
+    OrderDate, ProductKey, CustomerKey, EmployeeKey, ShipperKey, Country, OrderLines, Quantity, TotalAmount
+)
+SELECT
+    fo.OrderDate, fo.ProductKey, fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey,
+    CASE WHEN moved.Sign < 0 THEN COALESCE(dc.Country, 'Unknown') ELSE COALESCE(sc.Country, 'Unknown') END,
+    moved.Sign, moved.Sign * fo.Quantity, moved.Sign * fo.TotalAmount
+FROM DimCustomers dc
+INNER JOIN Staging_Customers sc
+    ON dc.CustomerID = sc.CustomerID
+INNER JOIN FactOrders fo
+    ON fo.CustomerKey = dc.CustomerKey
+CROSS JOIN (SELECT -1 AS Sign UNION ALL SELECT 1) AS moved
+WHERE dc.ExpirationDate IS NULL
+  AND dc.IsInferred = 1
+  AND COALESCE(dc.Country, 'Unknown') <> COALESCE(sc.Country, 'Unknown')
+  AND EXISTS (SELECT 1 FROM AggSalesDayProductCustomer);
+
+-- Step 0: Complete the inferred members the fact load inserted for customers staging did
+-- not have yet. They are filled in place, so the fact rows pointing at them stay attached.
+UPDATE DimCustomers
+SET
+    CustomerName = sc.CompanyName,
+    ContactName = sc.ContactName,
+    ContactTitle = sc.ContactTitle,
+    Address = sc.Address,
+    City = sc.City,
+    Region = sc.Region,
+    PostalCode = sc.PostalCode,
+    Country = sc.Country,
+    Phone = sc.Phone,
+    Fax = sc.Fax,
+    RowHash = sc.RowHash,
+    IsInferred = 0
+FROM Staging_Customers sc
+WHERE DimCustomers.CustomerID = sc.CustomerID
+  AND DimCustomers.ExpirationDate IS NULL
+  AND DimCustomers.IsInferred = 1;
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Step 1: Give active rows loaded before RowHash existed the hash of their staging row,
+-- if none of the tracked attributes changed (one-off, NULL-safe comparison)
+UPDATE DimCustomers
+SET RowHash = sc.RowHash
+FROM Staging_Customers sc
+WHERE DimCustomers.CustomerID = sc.CustomerID
+  AND DimCustomers.ExpirationDate IS NULL
+  AND DimCustomers.RowHash IS NULL
+  AND DimCustomers.CustomerName IS sc.CompanyName
+  AND DimCustomers.ContactName IS sc.ContactName
+  AND DimCustomers.ContactTitle IS sc.ContactTitle
+  AND DimCustomers.Address IS sc.Address
+  AND DimCustomers.City IS sc.City
+  AND DimCustomers.Region IS sc.Region
+  AND DimCustomers.PostalCode IS sc.PostalCode
+  AND DimCustomers.Country IS sc.Country
+  AND DimCustomers.Phone IS sc.Phone
+  AND DimCustomers.Fax IS sc.Fax;
+
+-- Step 2: Expire active rows whose tracked attributes changed (RowHash differs)
+UPDATE DimCustomers
+SET ExpirationDate = date('now', 'localtime')
+FROM Staging_Customers sc
+WHERE DimCustomers.CustomerID = sc.CustomerID
+  AND DimCustomers.ExpirationDate IS NULL -- Active record
+  AND DimCustomers.RowHash IS NOT sc.RowHash;
+
+INSERT INTO etl_row_counts VALUES ('RowsExpired', changes());
+
+-- Step 3: Insert a new active version for new customers and the ones expired above
+INSERT INTO DimCustomers (
+    CustomerID, CustomerName, ContactName, ContactTitle, Address, City, Region,
+    PostalCode, Country, Phone, Fax, RowHash, EffectiveDate, ExpirationDate
+)
+SELECT
+    sc.CustomerID,
+    sc.CompanyName,
+    sc.ContactName,
+    sc.ContactTitle,
+    sc.Address,
+    sc.City,
+    sc.Region,
+    sc.PostalCode,
+    sc.Country,
+    sc.Phone,
+    sc.Fax,
+    sc.RowHash,
+    date('now', 'localtime'),
+    NULL -- New active record
+FROM Staging_Customers sc
+LEFT JOIN DimCustomers dc
+    ON sc.CustomerID = dc.CustomerID
+       AND dc.ExpirationDate IS NULL -- Only match active records
+WHERE dc.CustomerKey IS NULL; -- New or just expired customer
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
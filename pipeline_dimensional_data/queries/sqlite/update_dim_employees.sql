@@ -0,0 +1,60 @@
+-- (SCD1 with Delete), SQLite dialect of ../update_dim_employees.sql
+DELETE FROM etl_row_counts;
+
+-- Update existing records whose tracked attributes changed, reactivating them if
+-- previously marked as deleted (rows loaded before RowHash existed and inferred members
+-- are overwritten once)
+UPDATE DimEmployees
+SET LastName = se.LastName,
+    FirstName = se.FirstName,
+    Title = se.Title,
+    TitleOfCourtesy = se.TitleOfCourtesy,
+    BirthDate = se.BirthDate,
+    HireDate = se.HireDate,
+    Address = se.Address,
+    City = se.City,
+    Region = se.Region,
+    PostalCode = se.PostalCode,
+    Country = se.Country,
+    HomePhone = se.HomePhone,
+    Extension = se.Extension,
+    Notes = se.Notes,
+    ReportsTo = se.ReportsTo,
+    PhotoPath = se.PhotoPath,
+    RowHash = se.RowHash,
+    IsDeleted = 0,
+    IsInferred = 0
+FROM Staging_Employees se
+WHERE DimEmployees.EmployeeID = se.EmployeeID
+  AND (DimEmployees.RowHash IS NOT se.RowHash OR COALESCE(DimEmployees.IsDeleted, 0) = 1);
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new records
+INSERT INTO DimEmployees (
+    EmployeeID, LastName, FirstName, Title, TitleOfCourtesy, BirthDate, HireDate,
+    Address, City, Region, PostalCode, Country, HomePhone, Extension,
+    Notes, ReportsTo, PhotoPath, RowHash, IsDeleted
+)
+SELECT
+    se.EmployeeID, se.LastName, se.FirstName, se.Title, se.TitleOfCourtesy,
+    se.BirthDate, se.HireDate, se.Address, se.City, se.Region, se.PostalCode,
+    se.Country, se.HomePhone, se.Extension, se.Notes, se.ReportsTo,
+    se.PhotoPath, se.RowHash, 0 -- New records are active
+FROM Staging_Employees se
+WHERE NOT EXISTS (SELECT 1 FROM DimEmployees de WHERE de.EmployeeID = se.EmployeeID);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Mark records as deleted if they are not in the source data; inferred members have
+-- not reached staging yet
+UPDATE DimEmployees
+SET IsDeleted = 1
+WHERE COALESCE(IsDeleted, 0) = 0
+  AND COALESCE(IsInferred, 0) = 0
+  AND NOT EXISTS (SELECT 1 FROM Staging_Employees se WHERE se.EmployeeID = DimEmployees.EmployeeID);
+
+INSERT INTO etl_row_counts VALUES ('RowsExpired', changes());
+
+-- Row counts reported to the run history; newly soft-deleted rows count as expired
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
@@ -0,0 +1,39 @@
+-- (SCD1 - Overwrite), SQLite dialect of ../update_dim_products.sql
+DELETE FROM etl_row_counts;
+
+-- Update existing records whose tracked attributes changed (rows loaded before
+-- RowHash existed and inferred members are overwritten once)
+UPDATE DimProducts
+SET ProductName = sp.ProductName,
+    SupplierID = sp.SupplierID,
+    CategoryID = sp.CategoryID,
+    QuantityPerUnit = sp.QuantityPerUnit,
+    UnitPrice = sp.UnitPrice,
+    UnitsInStock = sp.UnitsInStock,
+    UnitsOnOrder = sp.UnitsOnOrder,
+    ReorderLevel = sp.ReorderLevel,
+    Discontinued = sp.Discontinued,
+    RowHash = sp.RowHash,
+    IsInferred = 0
+FROM Staging_Products sp
+WHERE DimProducts.ProductID = sp.ProductID
+  AND DimProducts.RowHash IS NOT sp.RowHash;
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new records
+INSERT INTO DimProducts (
+    ProductID, ProductName, SupplierID, CategoryID, QuantityPerUnit, UnitPrice,
+    UnitsInStock, UnitsOnOrder, ReorderLevel, Discontinued, RowHash
+)
+SELECT
+    sp.ProductID, sp.ProductName, sp.SupplierID, sp.CategoryID,
+    sp.QuantityPerUnit, sp.UnitPrice, sp.UnitsInStock, sp.UnitsOnOrder,
+    sp.ReorderLevel, sp.Discontinued, sp.RowHash
+FROM Staging_Products sp
+WHERE NOT EXISTS (SELECT 1 FROM DimProducts dp WHERE dp.ProductID = sp.ProductID);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
@@ -0,0 +1,35 @@
+-- SCD4 - Snapshot, SQLite dialect of ../update_dim_region.sql
+DELETE FROM etl_row_counts;
+
+-- Insert New Snapshot into DimRegion
+INSERT INTO DimRegion (RegionID, RegionDescription, RegionCategory, RegionImportance, SnapshotDate)
+SELECT
+    sr.RegionID,
+    sr.RegionDescription,
+    sr.RegionCategory,
+    sr.RegionImportance,
+    date('now', 'localtime') AS SnapshotDate
+FROM Staging_Region sr
+LEFT JOIN (
+    SELECT RegionID, MAX(SnapshotDate) AS LatestSnapshot
+    FROM DimRegion
+    GROUP BY RegionID
+) AS dr_latest
+    ON sr.RegionID = dr_latest.RegionID
+WHERE dr_latest.RegionID IS NULL -- New RegionID
+   OR EXISTS (
+        SELECT 1
+        FROM DimRegion dr
+        WHERE dr.RegionID = sr.RegionID
+          AND dr.SnapshotDate = dr_latest.LatestSnapshot
+          AND (
+                dr.RegionDescription <> sr.RegionDescription OR
+                dr.RegionCategory <> sr.RegionCategory OR
+                dr.RegionImportance <> sr.RegionImportance
+              )
+    );
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
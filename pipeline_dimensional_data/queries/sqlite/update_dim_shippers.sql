@@ -0,0 +1,39 @@
+-- SCD1 with Delete, SQLite dialect of ../update_dim_shippers.sql
+DELETE FROM etl_row_counts;
+
+-- Update existing records whose values changed (NULL-safe), reactivating them if
+-- previously marked as deleted and completing inferred members
+UPDATE DimShippers
+SET CompanyName = ss.CompanyName,
+    Phone = ss.Phone,
+    IsDeleted = 0,
+    IsInferred = 0
+FROM Staging_Shippers ss
+WHERE DimShippers.ShipperID = ss.ShipperID
+  AND (DimShippers.CompanyName IS NOT ss.CompanyName
+       OR DimShippers.Phone IS NOT ss.Phone
+       OR COALESCE(DimShippers.IsDeleted, 0) = 1
+       OR COALESCE(DimShippers.IsInferred, 0) = 1);
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new records
+INSERT INTO DimShippers (ShipperID, CompanyName, Phone, IsDeleted)
+SELECT ss.ShipperID, ss.CompanyName, ss.Phone, 0 -- New records are active
+FROM Staging_Shippers ss
+WHERE NOT EXISTS (SELECT 1 FROM DimShippers ds WHERE ds.ShipperID = ss.ShipperID);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Mark records as deleted if they are not in the source data; inferred members have
+-- not reached staging yet
+UPDATE DimShippers
+SET IsDeleted = 1
+WHERE COALESCE(IsDeleted, 0) = 0
+  AND COALESCE(IsInferred, 0) = 0
+  AND NOT EXISTS (SELECT 1 FROM Staging_Shippers ss WHERE ss.ShipperID = DimShippers.ShipperID);
+
+INSERT INTO etl_row_counts VALUES ('RowsExpired', changes());
+
+-- Row counts reported to the run history; newly soft-deleted rows count as expired
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
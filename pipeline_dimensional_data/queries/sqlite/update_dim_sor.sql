@@ -0,0 +1,29 @@
+-- SQLite dialect of ../update_dim_sor.sql
+DELETE FROM etl_row_counts;
+
+-- Insert missing mappings into Dim_SOR
+WITH src (StagingTableName, DimensionTableName) AS (
+    VALUES
+        ('Staging_Products', 'DimProducts'),
+        ('Staging_Customers', 'DimCustomers'),
+        ('Staging_Employees', 'DimEmployees'),
+        ('Staging_Shippers', 'DimShippers'),
+        ('Staging_Suppliers', 'DimSuppliers'),
+        ('Staging_Territories', 'DimTerritories'),
+        ('Staging_Orders', 'FactOrders'),
+        ('Staging_OrderDetails', 'FactOrders'),
+        ('Staging_Categories', 'DimCategories')
+)
+INSERT INTO Dim_SOR (StagingTableName, DimensionTableName)
+SELECT DISTINCT
+    src.StagingTableName,
+    src.DimensionTableName
+FROM src
+LEFT JOIN Dim_SOR dim
+    ON src.StagingTableName = dim.StagingTableName
+WHERE dim.StagingTableName IS NULL; -- Prevent duplicates
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
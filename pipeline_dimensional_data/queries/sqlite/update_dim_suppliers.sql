@@ -0,0 +1,45 @@
+-- (SCD3 - Previous value), SQLite dialect of ../update_dim_suppliers.sql
+DELETE FROM etl_row_counts;
+
+-- Update existing records whose tracked attributes changed, keeping the previous
+-- contact when the contact itself changed. SET expressions read the row's old values
+UPDATE DimSuppliers
+SET PreviousContactInfo = CASE
+        WHEN DimSuppliers.ContactName IS NOT ss.ContactName
+        THEN DimSuppliers.ContactName               -- Store previous contact
+        ELSE DimSuppliers.PreviousContactInfo
+    END,
+    ContactName = ss.ContactName,                   -- Update contact
+    CompanyName = ss.CompanyName,
+    ContactTitle = ss.ContactTitle,
+    Address = ss.Address,
+    City = ss.City,
+    Region = ss.Region,
+    PostalCode = ss.PostalCode,
+    Country = ss.Country,
+    Phone = ss.Phone,
+    Fax = ss.Fax,
+    HomePage = ss.HomePage,
+    RowHash = ss.RowHash
+FROM Staging_Suppliers ss
+WHERE DimSuppliers.SupplierID = ss.SupplierID
+  AND DimSuppliers.RowHash IS NOT ss.RowHash;
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new records
+INSERT INTO DimSuppliers (
+    SupplierID, CompanyName, ContactName, PreviousContactInfo, ContactTitle,
+    Address, City, Region, PostalCode, Country, Phone, Fax, HomePage, RowHash
+)
+SELECT
+    ss.SupplierID, ss.CompanyName, ss.ContactName, NULL, ss.ContactTitle,
+    ss.Address, ss.City, ss.Region, ss.PostalCode, ss.Country,
+    ss.Phone, ss.Fax, ss.HomePage, ss.RowHash
+FROM Staging_Suppliers ss
+WHERE NOT EXISTS (SELECT 1 FROM DimSuppliers ds WHERE ds.SupplierID = ss.SupplierID);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
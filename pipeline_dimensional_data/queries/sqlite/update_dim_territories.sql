@@ -0,0 +1,62 @@
+-- Snapshot Tracking, SQLite dialect of ../update_dim_territories.sql
+DELETE FROM etl_row_counts;
+
+-- Seed the current table from the latest snapshots of a warehouse built before it existed
+INSERT INTO DimTerritoriesCurrent (
+    TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate
+)
+SELECT TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate
+FROM (
+    SELECT
+        dt.*,
+        ROW_NUMBER() OVER (PARTITION BY dt.TerritoryID ORDER BY dt.SnapshotDate DESC, dt.TerritoryKey DESC) AS rn
+    FROM DimTerritories dt
+    WHERE NOT EXISTS (SELECT 1 FROM DimTerritoriesCurrent)
+) AS latest
+WHERE latest.rn = 1;
+
+-- Apply new and changed territories (NULL-safe) to the current table first. Their
+-- TerritoryKey is cleared until the snapshot below is written. Only DimTerritoriesCurrent
+-- is read, so the cost does not grow with the snapshot history.
+INSERT INTO DimTerritoriesCurrent (
+    TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate
+)
+SELECT
+    st.TerritoryID,
+    NULL,
+    st.TerritoryDescription,
+    st.TerritoryCode,
+    st.RegionID,
+    date('now', 'localtime')
+FROM Staging_Territories st
+WHERE true
+ON CONFLICT (TerritoryID) DO UPDATE SET
+    TerritoryKey = NULL,
+    TerritoryDescription = excluded.TerritoryDescription,
+    TerritoryCode = excluded.TerritoryCode,
+    RegionID = excluded.RegionID,
+    SnapshotDate = excluded.SnapshotDate
+WHERE DimTerritoriesCurrent.TerritoryDescription IS NOT excluded.TerritoryDescription
+   OR DimTerritoriesCurrent.TerritoryCode IS NOT excluded.TerritoryCode
+   OR DimTerritoriesCurrent.RegionID IS NOT excluded.RegionID;
+
+-- Insert New Territories Snapshot
+INSERT INTO DimTerritories (TerritoryID, TerritoryDescription, RegionID, TerritoryCode, SnapshotDate)
+SELECT TerritoryID, TerritoryDescription, RegionID, TerritoryCode, SnapshotDate
+FROM DimTerritoriesCurrent
+WHERE TerritoryKey IS NULL;
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+-- Point the current table at the new snapshots
+UPDATE DimTerritoriesCurrent
+SET TerritoryKey = (
+    SELECT MAX(dt.TerritoryKey)
+    FROM DimTerritories dt
+    WHERE dt.TerritoryID = DimTerritoriesCurrent.TerritoryID
+      AND dt.SnapshotDate = DimTerritoriesCurrent.SnapshotDate
+)
+WHERE TerritoryKey IS NULL;
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired FROM etl_row_count_totals;
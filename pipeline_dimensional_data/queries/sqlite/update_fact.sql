@@ -0,0 +1,99 @@
+-- Task 7: Update FactOrders and FactError (incremental, date-windowed), SQLite dialect of ../update_fact.sql
+-- Parameters :StartDate and :EndDate are bound by the pipeline, see resolve_fact_window.
+DELETE FROM etl_row_counts;
+
+-- The order lines of the window are staged in Staging_FactLines by the pipeline, with
+-- their dimension keys already resolved (SCD2 customers to their active version) and
+-- their ErrorReason set, see key_lookup.stage_fact_lines.
+
+-- Lines whose dimension keys all resolve are merged into FactOrders
+DROP VIEW IF EXISTS temp.fact_source;
+
+CREATE TEMP VIEW fact_source AS
+SELECT OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount
+FROM Staging_FactLines
+WHERE CustomerKey IS NOT NULL
+  AND EmployeeKey IS NOT NULL
+  AND ShipperKey IS NOT NULL
+  AND ProductKey IS NOT NULL;
+
+-- Update existing fact table records only when something actually changed (NULL-safe)
+UPDATE FactOrders
+SET CustomerKey = source.CustomerKey,
+    EmployeeKey = source.EmployeeKey,
+    ShipperKey = source.ShipperKey,
+    OrderDate = source.OrderDate,
+    Quantity = source.Quantity,
+    TotalAmount = source.TotalAmount,
+    Discount = source.Discount
+FROM fact_source source
+WHERE FactOrders.OrderID = source.OrderID
+  AND FactOrders.ProductKey = source.ProductKey
+  AND (
+        FactOrders.CustomerKey IS NOT source.CustomerKey OR
+        FactOrders.EmployeeKey IS NOT source.EmployeeKey OR
+        FactOrders.ShipperKey IS NOT source.ShipperKey OR
+        FactOrders.OrderDate IS NOT source.OrderDate OR
+        FactOrders.Quantity IS NOT source.Quantity OR
+        FactOrders.TotalAmount IS NOT source.TotalAmount OR
+        FactOrders.Discount IS NOT source.Discount
+      );
+
+INSERT INTO etl_row_counts VALUES ('RowsUpdated', changes());
+
+-- Insert new fact table records if they do not exist
+INSERT INTO FactOrders (OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount)
+SELECT source.OrderID, source.CustomerKey, source.EmployeeKey, source.ShipperKey, source.ProductKey,
+       source.OrderDate, source.Quantity, source.TotalAmount, source.Discount
+FROM fact_source source
+WHERE NOT EXISTS (
+    SELECT 1 FROM FactOrders fo
+    WHERE fo.OrderID = source.OrderID AND fo.ProductKey = source.ProductKey
+);
+
+INSERT INTO etl_row_counts VALUES ('RowsInserted', changes());
+
+DROP VIEW temp.fact_source;
+
+-- Advance the high-water mark so the next run can start where this one ended
+INSERT INTO ETL_HighWaterMark (ProcessName, LastOrderDate, WindowStart, WindowEnd, RowsMerged, UpdatedAt)
+VALUES (
+    'FactOrders',
+    (SELECT MAX(OrderDate) FROM FactOrders WHERE OrderDate BETWEEN :StartDate AND :EndDate),
+    :StartDate,
+    :EndDate,
+    (SELECT RowsInserted + RowsUpdated FROM etl_row_count_totals),
+    datetime('now', 'localtime')
+)
+ON CONFLICT (ProcessName) DO UPDATE SET
+    LastOrderDate = CASE
+        WHEN LastOrderDate IS NULL OR excluded.LastOrderDate > LastOrderDate THEN excluded.LastOrderDate
+        ELSE LastOrderDate
+    END,
+    WindowStart = excluded.WindowStart,
+    WindowEnd = excluded.WindowEnd,
+    RowsMerged = excluded.RowsMerged,
+    UpdatedAt = excluded.UpdatedAt;
+
+-- Route faulty lines to FactError. Re-processing a window replaces the errors
+-- previously recorded for it.
+DELETE FROM FactError
+WHERE OrderDate BETWEEN :StartDate AND :EndDate;
+
+INSERT INTO FactError (
+    ErrorID, Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason
+)
+SELECT
+    lower(hex(randomblob(16))) AS ErrorID, -- Generate unique ID for each error
+    Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason
+FROM Staging_FactLines
+WHERE ErrorReason IS NOT NULL;
+
+-- FactError rows count as inserted and as errors
+INSERT INTO etl_row_counts VALUES ('ErrorCount', changes());
+INSERT INTO etl_row_counts SELECT 'RowsInserted', ErrorCount FROM etl_row_count_totals;
+
+-- Row counts reported to the run history
+SELECT RowsInserted, RowsUpdated, RowsExpired, ErrorCount FROM etl_row_count_totals;
@@ -0,0 +1,124 @@
+-- Task 8: Update the aggregate tables read by the Power BI model
+-- Applies the FactOrders changes queued by the fact load (see aggregates.queue_fact_deltas),
+-- so only the groups a run touched are read and written. While the aggregates are still
+-- empty (first load, or a warehouse built before they existed) they are built from the
+-- whole of FactOrders instead.
+USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @LastDeltaID INT = (SELECT MAX(DeltaID) FROM dbo.ETL_AggregateDeltas);  -- Deltas applied by this run
+DECLARE @Changes TABLE (Action NVARCHAR(10));     -- MERGE actions, for the run history
+
+IF NOT EXISTS (SELECT 1 FROM dbo.AggSalesDayProductCustomer)
+BEGIN
+    DELETE FROM dbo.AggSalesMonthEmployee;
+    DELETE FROM dbo.AggSalesShipperCountry;
+
+    INSERT INTO dbo.AggSalesDayProductCustomer (OrderDate, ProductKey, CustomerKey, OrderLines, Quantity, TotalAmount)
+    OUTPUT 'INSERT' INTO @Changes
+    SELECT OrderDate, ProductKey, CustomerKey, COUNT(*), SUM(Quantity), SUM(TotalAmount)
+    FROM dbo.FactOrders
+    WHERE OrderDate IS NOT NULL AND ProductKey IS NOT NULL AND CustomerKey IS NOT NULL
+    GROUP BY OrderDate, ProductKey, CustomerKey;
+
+    INSERT INTO dbo.AggSalesMonthEmployee (MonthStart, EmployeeKey, OrderLines, Quantity, TotalAmount)
+    OUTPUT 'INSERT' INTO @Changes
+    SELECT DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1), EmployeeKey, COUNT(*), SUM(Quantity), SUM(TotalAmount)
+    FROM dbo.FactOrders
+    WHERE OrderDate IS NOT NULL AND EmployeeKey IS NOT NULL
+    GROUP BY DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1), EmployeeKey;
+
+    INSERT INTO dbo.AggSalesShipperCountry (ShipperKey, Country, OrderLines, Quantity, TotalAmount)
+    OUTPUT 'INSERT' INTO @Changes
+    SELECT fo.ShipperKey, COALESCE(dc.Country, 'Unknown'), COUNT(*), SUM(fo.Quantity), SUM(fo.TotalAmount)
+    FROM dbo.FactOrders fo
+    LEFT JOIN dbo.DimCustomers dc
+        ON dc.CustomerKey = fo.CustomerKey
+    WHERE fo.ShipperKey IS NOT NULL
+    GROUP BY fo.ShipperKey, COALESCE(dc.Country, 'Unknown');
+END
+ELSE
+BEGIN
+    -- Add the net change of every touched group; a line that moved counts -1 in its
+    -- old groups and +1 in its new ones. Groups left without any line are deleted.
+    MERGE dbo.AggSalesDayProductCustomer AS target
+    USING (
+        SELECT OrderDate, ProductKey, CustomerKey,
+               SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+        FROM dbo.ETL_AggregateDeltas
+        WHERE DeltaID <= @LastDeltaID
+        GROUP BY OrderDate, ProductKey, CustomerKey
+        HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0
+    ) AS source
+    ON target.OrderDate = source.OrderDate
+       AND target.ProductKey = source.ProductKey
+       AND target.CustomerKey = source.CustomerKey
+    WHEN MATCHED AND target.OrderLines + source.OrderLines = 0 THEN
+        DELETE
+    WHEN MATCHED THEN
+        UPDATE SET
+            target.OrderLines = target.OrderLines + source.OrderLines,
+            target.Quantity = ISNULL(target.Quantity, 0) + ISNULL(source.Quantity, 0),
+            target.TotalAmount = ISNULL(target.TotalAmount, 0) + ISNULL(source.TotalAmount, 0)
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT (OrderDate, ProductKey, CustomerKey, OrderLines, Quantity, TotalAmount)
+        VALUES (source.OrderDate, source.ProductKey, source.CustomerKey, source.OrderLines, source.Quantity, source.TotalAmount)
+    OUTPUT $action INTO @Changes;
+
+    MERGE dbo.AggSalesMonthEmployee AS target
+    USING (
+        SELECT DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1) AS MonthStart, EmployeeKey,
+               SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+        FROM dbo.ETL_AggregateDeltas
+        WHERE DeltaID <= @LastDeltaID
+        GROUP BY DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1), EmployeeKey
+        HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0
+    ) AS source
+    ON target.MonthStart = source.MonthStart
+       AND target.EmployeeKey = source.EmployeeKey
+    WHEN MATCHED AND target.OrderLines + source.OrderLines = 0 THEN
+        DELETE
+    WHEN MATCHED THEN
+        UPDATE SET
+            target.OrderLines = target.OrderLines + source.OrderLines,
+            target.Quantity = ISNULL(target.Quantity, 0) + ISNULL(source.Quantity, 0),
+            target.TotalAmount = ISNULL(target.TotalAmount, 0) + ISNULL(source.TotalAmount, 0)
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT (MonthStart, EmployeeKey, OrderLines, Quantity, TotalAmount)
+        VALUES (source.MonthStart, source.EmployeeKey, source.OrderLines, source.Quantity, source.TotalAmount)
+    OUTPUT $action INTO @Changes;
+
+    MERGE dbo.AggSalesShipperCountry AS target
+    USING (
+        SELECT ShipperKey, Country,
+               SUM(OrderLines) AS OrderLines, SUM(Quantity) AS Quantity, SUM(TotalAmount) AS TotalAmount
+        FROM dbo.ETL_AggregateDeltas
+        WHERE DeltaID <= @LastDeltaID
+        GROUP BY ShipperKey, Country
+        HAVING SUM(OrderLines) <> 0 OR SUM(Quantity) <> 0 OR SUM(TotalAmount) <> 0
+    ) AS source
+    ON target.ShipperKey = source.ShipperKey
+       AND target.Country = source.Country
+    WHEN MATCHED AND target.OrderLines + source.OrderLines = 0 THEN
+        DELETE
+    WHEN MATCHED THEN
+        UPDATE SET
+            target.OrderLines = target.OrderLines + source.OrderLines,
+            target.Quantity = ISNULL(target.Quantity, 0) + ISNULL(source.Quantity, 0),
+            target.TotalAmount = ISNULL(target.TotalAmount, 0) + ISNULL(source.TotalAmount, 0)
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT (ShipperKey, Country, OrderLines, Quantity, TotalAmount)
+        VALUES (source.ShipperKey, source.Country, source.OrderLines, source.Quantity, source.TotalAmount)
+    OUTPUT $action INTO @Changes;
+END;
+
+-- The applied deltas; changes queued meanwhile wait for the next run
+DELETE FROM dbo.ETL_AggregateDeltas
+WHERE DeltaID <= @LastDeltaID;
+
+-- Row counts reported to the run history
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END) AS RowsUpdated,
+    COUNT(CASE WHEN Action = 'DELETE' THEN 1 END) AS RowsExpired
+FROM @Changes;
@@ -1,5 +1,8 @@
 -- (SCD1 - Overwrite)
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @Changes TABLE (Action NVARCHAR(10));
 
 MERGE DimCategories AS target
 USING (
@@ -11,8 +14,12 @@ USING (
 ) AS source
 ON target.CategoryID = source.CategoryID
 
--- Update existing records
-WHEN MATCHED THEN
+-- Update existing records whose values changed (NULL-safe)
+WHEN MATCHED AND EXISTS (
+    SELECT source.CategoryName, source.Description
+    EXCEPT
+    SELECT target.CategoryName, target.Description
+) THEN
     UPDATE SET 
         target.CategoryName = source.CategoryName,
         target.Description = source.Description
@@ -21,4 +28,12 @@ WHEN MATCHED THEN
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (CategoryID, CategoryName, Description)
     VALUES (source.CategoryID, source.CategoryName, source.Description)
-;
+
+OUTPUT $action INTO @Changes;
+
+-- Row counts reported to the run history
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END) AS RowsUpdated,
+    0 AS RowsExpired
+FROM @Changes;
@@ -1,26 +1,83 @@
 USE ORDER_DDS;
+SET NOCOUNT ON;
 
--- Step 1: Expire existing rows in DimCustomers
-UPDATE DimCustomers
+DECLARE @RowsExpired INT, @RowsInserted INT, @RowsUpdated INT;
+
+-- Lines of the inferred members completed below are already counted in
+-- AggSalesShipperCountry under the country the member had; queue moving them to the
+-- country it gets (see aggregates.queue_fact_deltas). The other aggregates are keyed
+-- by CustomerKey, so the -1 and +1 cancel out there.
+INSERT INTO ETL_AggregateDeltas (
+    OrderDate, ProductKey, CustomerKey, EmployeeKey, ShipperKey, Country, OrderLines, Quantity, TotalAmount
+)
+SELECT
+    fo.OrderDate, fo.ProductKey, fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey,
+    CASE WHEN moved.Sign < 0 THEN COALESCE(dc.Country, 'Unknown') ELSE COALESCE(sc.Country, 'Unknown') END,
+    moved.Sign, moved.Sign * fo.Quantity, moved.Sign * fo.TotalAmount
+FROM DimCustomers dc
+INNER JOIN Staging_Customers sc
+    ON dc.CustomerID = sc.CustomerID
+INNER JOIN FactOrders fo
+    ON fo.CustomerKey = dc.CustomerKey
+CROSS JOIN (SELECT -1 AS Sign UNION ALL SELECT 1) AS moved
+WHERE dc.ExpirationDate IS NULL
+  AND dc.IsInferred = 1
+  AND COALESCE(dc.Country, 'Unknown') <> COALESCE(sc.Country, 'Unknown')
+  AND EXISTS (SELECT 1 FROM AggSalesDayProductCustomer);
+
+-- Step 0: Complete the inferred members the fact load inserted for customers staging did
+-- not have yet. They are filled in place, so the fact rows pointing at them stay attached.
+UPDATE dc
+SET
+    CustomerName = sc.CompanyName,
+    ContactName = sc.ContactName,
+    ContactTitle = sc.ContactTitle,
+    Address = sc.Address,
+    City = sc.City,
+    Region = sc.Region,
+    PostalCode = sc.PostalCode,
+    Country = sc.Country,
+    Phone = sc.Phone,
+    Fax = sc.Fax,
+    RowHash = sc.RowHash,
+    IsInferred = 0
+FROM DimCustomers dc
+INNER JOIN Staging_Customers sc
+    ON dc.CustomerID = sc.CustomerID
+WHERE dc.ExpirationDate IS NULL
+  AND dc.IsInferred = 1;
+
+SET @RowsUpdated = @@ROWCOUNT;
+
+-- Step 1: Give active rows loaded before RowHash existed the hash of their staging row,
+-- if none of the tracked attributes changed (one-off, NULL-safe comparison)
+UPDATE dc
+SET RowHash = sc.RowHash
+FROM DimCustomers dc
+INNER JOIN Staging_Customers sc
+    ON dc.CustomerID = sc.CustomerID
+WHERE dc.ExpirationDate IS NULL
+  AND dc.RowHash IS NULL
+  AND EXISTS (
+        SELECT dc.CustomerName, dc.ContactName, dc.ContactTitle, dc.Address, dc.City,
+               dc.Region, dc.PostalCode, dc.Country, dc.Phone, dc.Fax
+        INTERSECT
+        SELECT sc.CompanyName, sc.ContactName, sc.ContactTitle, sc.Address, sc.City,
+               sc.Region, sc.PostalCode, sc.Country, sc.Phone, sc.Fax
+      );
+
+-- Step 2: Expire active rows whose tracked attributes changed (RowHash differs)
+UPDATE dc
 SET ExpirationDate = GETDATE()
 FROM DimCustomers dc
 INNER JOIN Staging_Customers sc
     ON dc.CustomerID = sc.CustomerID
 WHERE dc.ExpirationDate IS NULL -- Active record
-  AND (
-        dc.CustomerName <> sc.CompanyName OR
-        dc.ContactName <> sc.ContactName OR
-        dc.ContactTitle <> sc.ContactTitle OR
-        dc.Address <> sc.Address OR
-        dc.City <> sc.City OR
-        dc.Region <> sc.Region OR
-        dc.PostalCode <> sc.PostalCode OR
-        dc.Country <> sc.Country OR
-        dc.Phone <> sc.Phone OR
-        dc.Fax <> sc.Fax
-      );
+  AND (dc.RowHash IS NULL OR dc.RowHash <> sc.RowHash);
+
+SET @RowsExpired = @@ROWCOUNT;
 
--- Step 2: Insert new records for changes or new customers
+-- Step 3: Insert a new active version for new customers and the ones expired above
 INSERT INTO DimCustomers (
     CustomerID,
     CustomerName,
@@ -33,6 +90,7 @@ INSERT INTO DimCustomers (
     Country,
     Phone,
     Fax,
+    RowHash,
     EffectiveDate,
     ExpirationDate
 )
@@ -48,22 +106,16 @@ SELECT
     sc.Country,
     sc.Phone,
     sc.Fax,
+    sc.RowHash,
     GETDATE() AS EffectiveDate,
     NULL AS ExpirationDate -- New active record
 FROM Staging_Customers sc
 LEFT JOIN DimCustomers dc
     ON sc.CustomerID = dc.CustomerID
        AND dc.ExpirationDate IS NULL -- Only match active records
-WHERE dc.CustomerID IS NULL -- New customer
-   OR (
-        dc.CustomerName <> sc.CompanyName OR
-        dc.ContactName <> sc.ContactName OR
-        dc.ContactTitle <> sc.ContactTitle OR
-        dc.Address <> sc.Address OR
-        dc.City <> sc.City OR
-        dc.Region <> sc.Region OR
-        dc.PostalCode <> sc.PostalCode OR
-        dc.Country <> sc.Country OR
-        dc.Phone <> sc.Phone OR
-        dc.Fax <> sc.Fax
-      );
+WHERE dc.CustomerKey IS NULL; -- New or just expired customer
+
+SET @RowsInserted = @@ROWCOUNT;
+
+-- Row counts reported to the run history
+SELECT @RowsInserted AS RowsInserted, @RowsUpdated AS RowsUpdated, @RowsExpired AS RowsExpired;
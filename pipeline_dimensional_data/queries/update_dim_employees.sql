@@ -1,5 +1,8 @@
 -- (SCD1 with Delete)
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @Changes TABLE (Action NVARCHAR(10), IsDeleted BIT, WasDeleted BIT);
 
 MERGE DimEmployees AS target
 USING (
@@ -20,13 +23,17 @@ USING (
         se.Extension,
         se.Notes,
         se.ReportsTo,
-        se.PhotoPath
+        se.PhotoPath,
+        se.RowHash
     FROM Staging_Employees se
 ) AS source
 ON target.EmployeeID = source.EmployeeID
 
--- Update existing records
-WHEN MATCHED THEN
+-- Update existing records whose tracked attributes changed or that were marked as deleted
+-- (rows loaded before RowHash existed and inferred members are overwritten once)
+WHEN MATCHED AND (
+    target.RowHash IS NULL OR target.RowHash <> source.RowHash OR ISNULL(target.IsDeleted, 0) = 1
+) THEN
     UPDATE SET
         target.LastName = source.LastName,
         target.FirstName = source.FirstName,
@@ -44,22 +51,34 @@ WHEN MATCHED THEN
         target.Notes = source.Notes,
         target.ReportsTo = source.ReportsTo,
         target.PhotoPath = source.PhotoPath,
-        target.IsDeleted = 0 -- Reactivate if previously marked as deleted
+        target.RowHash = source.RowHash,
+        target.IsDeleted = 0, -- Reactivate if previously marked as deleted
+        target.IsInferred = 0 -- Inferred members are completed by their staging row
 
 -- Insert new records
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (
         EmployeeID, LastName, FirstName, Title, TitleOfCourtesy, BirthDate, HireDate,
         Address, City, Region, PostalCode, Country, HomePhone, Extension,
-        Notes, ReportsTo, PhotoPath, IsDeleted
+        Notes, ReportsTo, PhotoPath, RowHash, IsDeleted
     )
     VALUES (
         source.EmployeeID, source.LastName, source.FirstName, source.Title, source.TitleOfCourtesy,
         source.BirthDate, source.HireDate, source.Address, source.City, source.Region, source.PostalCode,
         source.Country, source.HomePhone, source.Extension, source.Notes, source.ReportsTo,
-        source.PhotoPath, 0 -- New records are active
+        source.PhotoPath, source.RowHash, 0 -- New records are active
     )
 
--- Mark records as deleted if they are not in the source data
-WHEN NOT MATCHED BY SOURCE THEN
-    UPDATE SET target.IsDeleted = 1;
+-- Mark records as deleted if they are not in the source data; inferred members have
+-- not reached staging yet
+WHEN NOT MATCHED BY SOURCE AND ISNULL(target.IsDeleted, 0) = 0 AND ISNULL(target.IsInferred, 0) = 0 THEN
+    UPDATE SET target.IsDeleted = 1
+
+OUTPUT $action, inserted.IsDeleted, deleted.IsDeleted INTO @Changes;
+
+-- Row counts reported to the run history; newly soft-deleted rows count as expired
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' AND IsDeleted = 0 THEN 1 END) AS RowsUpdated,
+    COUNT(CASE WHEN Action = 'UPDATE' AND IsDeleted = 1 AND ISNULL(WasDeleted, 0) = 0 THEN 1 END) AS RowsExpired
+FROM @Changes;
@@ -1,5 +1,8 @@
 -- (SCD1 - Overwrite)
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @Changes TABLE (Action NVARCHAR(10));
 
 MERGE DimProducts AS target
 USING (
@@ -13,13 +16,15 @@ USING (
         sp.UnitsInStock,
         sp.UnitsOnOrder,
         sp.ReorderLevel,
-        sp.Discontinued
+        sp.Discontinued,
+        sp.RowHash
     FROM Staging_Products sp
 ) AS source
 ON target.ProductID = source.ProductID
 
--- Update existing records
-WHEN MATCHED THEN
+-- Update existing records whose tracked attributes changed (rows loaded before
+-- RowHash existed and inferred members are overwritten once)
+WHEN MATCHED AND (target.RowHash IS NULL OR target.RowHash <> source.RowHash) THEN
     UPDATE SET
         target.ProductName = source.ProductName,
         target.SupplierID = source.SupplierID,
@@ -29,16 +34,27 @@ WHEN MATCHED THEN
         target.UnitsInStock = source.UnitsInStock,
         target.UnitsOnOrder = source.UnitsOnOrder,
         target.ReorderLevel = source.ReorderLevel,
-        target.Discontinued = source.Discontinued
+        target.Discontinued = source.Discontinued,
+        target.RowHash = source.RowHash,
+        target.IsInferred = 0 -- Inferred members are completed by their staging row
 
 -- Insert new records
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (
         ProductID, ProductName, SupplierID, CategoryID, QuantityPerUnit, UnitPrice,
-        UnitsInStock, UnitsOnOrder, ReorderLevel, Discontinued
+        UnitsInStock, UnitsOnOrder, ReorderLevel, Discontinued, RowHash
     )
     VALUES (
         source.ProductID, source.ProductName, source.SupplierID, source.CategoryID,
         source.QuantityPerUnit, source.UnitPrice, source.UnitsInStock, source.UnitsOnOrder,
-        source.ReorderLevel, source.Discontinued
-    );
+        source.ReorderLevel, source.Discontinued, source.RowHash
+    )
+
+OUTPUT $action INTO @Changes;
+
+-- Row counts reported to the run history
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END) AS RowsUpdated,
+    0 AS RowsExpired
+FROM @Changes;
@@ -1,5 +1,8 @@
 -- SCD4 - Snapshot
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @RowsInserted INT;
 
 -- Insert New Snapshot into DimRegion
 INSERT INTO DimRegion (RegionID, RegionDescription, RegionCategory, RegionImportance, SnapshotDate)
@@ -28,3 +31,8 @@ WHERE dr_latest.RegionID IS NULL -- New RegionID
                 dr.RegionImportance <> sr.RegionImportance
               )
     );
+
+SET @RowsInserted = @@ROWCOUNT;
+
+-- Row counts reported to the run history
+SELECT @RowsInserted AS RowsInserted, 0 AS RowsUpdated, 0 AS RowsExpired;
@@ -1,5 +1,8 @@
 -- SCD1 with Delete
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @Changes TABLE (Action NVARCHAR(10), IsDeleted BIT, WasDeleted BIT);
 
 MERGE DimShippers AS target
 USING (
@@ -11,19 +14,39 @@ USING (
 ) AS source
 ON target.ShipperID = source.ShipperID
 
--- Update existing records
-WHEN MATCHED THEN
+-- Update existing records whose values changed (NULL-safe), reactivating deleted ones
+-- and completing inferred members
+WHEN MATCHED AND (
+    EXISTS (
+        SELECT source.CompanyName, source.Phone
+        EXCEPT
+        SELECT target.CompanyName, target.Phone
+    )
+    OR ISNULL(target.IsDeleted, 0) = 1
+    OR ISNULL(target.IsInferred, 0) = 1
+) THEN
     UPDATE SET
         target.CompanyName = source.CompanyName,
         target.Phone = source.Phone,
-        target.IsDeleted = 0 -- Reactivate if previously marked as deleted
+        target.IsDeleted = 0, -- Reactivate if previously marked as deleted
+        target.IsInferred = 0 -- Inferred members are completed by their staging row
 
 -- Insert new records
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (ShipperID, CompanyName, Phone, IsDeleted)
     VALUES (source.ShipperID, source.CompanyName, source.Phone, 0) -- New records are active
 
--- Mark records as deleted if they are not in the source data
-WHEN NOT MATCHED BY SOURCE THEN
-    UPDATE SET target.IsDeleted = 1;
+-- Mark records as deleted if they are not in the source data; inferred members have
+-- not reached staging yet
+WHEN NOT MATCHED BY SOURCE AND ISNULL(target.IsInferred, 0) = 0 THEN
+    UPDATE SET target.IsDeleted = 1
+
+OUTPUT $action, inserted.IsDeleted, deleted.IsDeleted INTO @Changes;
+
+-- Row counts reported to the run history; newly soft-deleted rows count as expired
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' AND IsDeleted = 0 THEN 1 END) AS RowsUpdated,
+    COUNT(CASE WHEN Action = 'UPDATE' AND IsDeleted = 1 AND ISNULL(WasDeleted, 0) = 0 THEN 1 END) AS RowsExpired
+FROM @Changes;
 
@@ -1,4 +1,7 @@
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @RowsInserted INT;
 
 -- Insert missing mappings into Dim_SOR
 INSERT INTO Dim_SOR (StagingTableName, DimensionTableName)
@@ -20,3 +23,8 @@ FROM (
 LEFT JOIN Dim_SOR dim 
     ON src.StagingTableName = dim.StagingTableName
 WHERE dim.StagingTableName IS NULL; -- Prevent duplicates
+
+SET @RowsInserted = @@ROWCOUNT;
+
+-- Row counts reported to the run history
+SELECT @RowsInserted AS RowsInserted, 0 AS RowsUpdated, 0 AS RowsExpired;
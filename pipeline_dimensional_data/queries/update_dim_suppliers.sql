@@ -1,4 +1,7 @@
 USE ORDER_DDS;
+SET NOCOUNT ON;
+
+DECLARE @Changes TABLE (Action NVARCHAR(10));
 
 MERGE DimSuppliers AS target
 USING (
@@ -14,15 +17,21 @@ USING (
         ss.Country,
         ss.Phone,
         ss.Fax,
-        ss.HomePage
+        ss.HomePage,
+        ss.RowHash
     FROM Staging_Suppliers ss
 ) AS source
 ON target.SupplierID = source.SupplierID
 
--- Update existing records with history
-WHEN MATCHED AND target.ContactName <> source.ContactName THEN
+-- Update existing records whose tracked attributes changed, keeping the previous
+-- contact when the contact itself changed (NULL-safe)
+WHEN MATCHED AND (target.RowHash IS NULL OR target.RowHash <> source.RowHash) THEN
     UPDATE SET
-        target.PreviousContactInfo = target.ContactName, -- Store previous contact
+        target.PreviousContactInfo = CASE
+            WHEN EXISTS (SELECT target.ContactName EXCEPT SELECT source.ContactName)
+            THEN target.ContactName                     -- Store previous contact
+            ELSE target.PreviousContactInfo
+        END,
         target.ContactName = source.ContactName,        -- Update contact
         target.CompanyName = source.CompanyName,
         target.ContactTitle = source.ContactTitle,
@@ -33,17 +42,27 @@ WHEN MATCHED AND target.ContactName <> source.ContactName THEN
         target.Country = source.Country,
         target.Phone = source.Phone,
         target.Fax = source.Fax,
-        target.HomePage = source.HomePage
+        target.HomePage = source.HomePage,
+        target.RowHash = source.RowHash
 
 -- Insert new records
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (
         SupplierID, CompanyName, ContactName, PreviousContactInfo, ContactTitle,
-        Address, City, Region, PostalCode, Country, Phone, Fax, HomePage
+        Address, City, Region, PostalCode, Country, Phone, Fax, HomePage, RowHash
     )
     VALUES (
         source.SupplierID, source.CompanyName, source.ContactName, NULL, source.ContactTitle,
         source.Address, source.City, source.Region, source.PostalCode, source.Country,
-        source.Phone, source.Fax, source.HomePage
-    );
+        source.Phone, source.Fax, source.HomePage, source.RowHash
+    )
+
+OUTPUT $action INTO @Changes;
+
+-- Row counts reported to the run history
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END) AS RowsUpdated,
+    0 AS RowsExpired
+FROM @Changes;
 
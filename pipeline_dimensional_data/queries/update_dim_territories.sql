@@ -1,8 +1,39 @@
 -- Snapshot Tracking
 USE ORDER_DDS;
+SET NOCOUNT ON;
 
--- Insert New Territories Snapshot
+DECLARE @RowsInserted INT;
+DECLARE @NewSnapshots TABLE (
+    TerritoryKey INT,
+    TerritoryID INT,
+    TerritoryDescription NVARCHAR(255),
+    TerritoryCode NVARCHAR(255),
+    RegionID INT,
+    SnapshotDate DATE
+);
+
+-- Seed the current table from the latest snapshots of a warehouse built before it existed
+IF NOT EXISTS (SELECT 1 FROM DimTerritoriesCurrent) AND EXISTS (SELECT 1 FROM DimTerritories)
+INSERT INTO DimTerritoriesCurrent (
+    TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate
+)
+SELECT TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate
+FROM (
+    SELECT
+        dt.*,
+        ROW_NUMBER() OVER (PARTITION BY dt.TerritoryID ORDER BY dt.SnapshotDate DESC, dt.TerritoryKey DESC) AS rn
+    FROM DimTerritories dt
+) AS latest
+WHERE latest.rn = 1;
+
+-- Insert New Territories Snapshot: new territories, and territories whose latest
+-- snapshot differs from staging (NULL-safe). Only DimTerritoriesCurrent is read,
+-- so the cost does not grow with the snapshot history.
 INSERT INTO DimTerritories (TerritoryID, TerritoryDescription, RegionID, TerritoryCode, SnapshotDate)
+OUTPUT
+    inserted.TerritoryKey, inserted.TerritoryID, inserted.TerritoryDescription,
+    inserted.TerritoryCode, inserted.RegionID, inserted.SnapshotDate
+INTO @NewSnapshots
 SELECT
     st.TerritoryID,
     st.TerritoryDescription,
@@ -10,23 +41,34 @@ SELECT
     st.TerritoryCode,
     GETDATE() AS SnapshotDate
 FROM Staging_Territories st
-LEFT JOIN (
-    SELECT
-        TerritoryID, RegionID, MAX(SnapshotDate) AS LatestSnapshot
-    FROM DimTerritories
-    GROUP BY TerritoryID, RegionID
-) AS latest_snapshot
-    ON st.TerritoryID = latest_snapshot.TerritoryID
-    AND st.RegionID = latest_snapshot.RegionID
-WHERE latest_snapshot.TerritoryID IS NULL -- New TerritoryID
+LEFT JOIN DimTerritoriesCurrent cur
+    ON st.TerritoryID = cur.TerritoryID
+WHERE cur.TerritoryID IS NULL -- New TerritoryID
    OR EXISTS (
-        SELECT 1
-        FROM DimTerritories dt
-        WHERE dt.TerritoryID = st.TerritoryID
-          AND dt.RegionID = st.RegionID
-          AND dt.SnapshotDate = latest_snapshot.LatestSnapshot
-          AND (
-                dt.TerritoryDescription <> st.TerritoryDescription OR
-                dt.TerritoryCode <> st.TerritoryCode
-              )
+        SELECT st.TerritoryDescription, st.TerritoryCode, st.RegionID
+        EXCEPT
+        SELECT cur.TerritoryDescription, cur.TerritoryCode, cur.RegionID
     );
+
+SET @RowsInserted = @@ROWCOUNT;
+
+-- Point the current table at the new snapshots
+MERGE DimTerritoriesCurrent AS target
+USING @NewSnapshots AS source
+ON target.TerritoryID = source.TerritoryID
+WHEN MATCHED THEN
+    UPDATE SET
+        target.TerritoryKey = source.TerritoryKey,
+        target.TerritoryDescription = source.TerritoryDescription,
+        target.TerritoryCode = source.TerritoryCode,
+        target.RegionID = source.RegionID,
+        target.SnapshotDate = source.SnapshotDate
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT (TerritoryID, TerritoryKey, TerritoryDescription, TerritoryCode, RegionID, SnapshotDate)
+    VALUES (
+        source.TerritoryID, source.TerritoryKey, source.TerritoryDescription,
+        source.TerritoryCode, source.RegionID, source.SnapshotDate
+    );
+
+-- Row counts reported to the run history
+SELECT @RowsInserted AS RowsInserted, 0 AS RowsUpdated, 0 AS RowsExpired;
@@ -1,56 +1,44 @@
--- Task 7: Update FactOrders
+-- Task 7: Update FactOrders and FactError (incremental, date-windowed)
 USE ORDER_DDS;
+SET NOCOUNT ON;
 
--- Declare Parameters
-DECLARE @DatabaseName NVARCHAR(255) = 'ORDER_DDS';  -- Database name
-DECLARE @SchemaName NVARCHAR(255) = 'dbo';          -- Schema name
-DECLARE @FactTableName NVARCHAR(255) = 'FactOrders';-- Fact table name
-DECLARE @StartDate DATE;                            -- Start date parameter
-DECLARE @EndDate DATE;                              -- End date parameter
+-- Declare Parameters (bound by the pipeline, see resolve_fact_window)
+DECLARE @StartDate DATE = ?;                        -- Start of the load window
+DECLARE @EndDate DATE = ?;                          -- End of the load window
+DECLARE @RowsMerged INT;                            -- Rows inserted or updated by this run
+DECLARE @ErrorRows INT;                             -- Rows routed to FactError by this run
+DECLARE @LoadedThrough DATE;                        -- Latest OrderDate present after this run
+DECLARE @Changes TABLE (Action NVARCHAR(10));      -- MERGE actions, for the run history
 
--- Set the start and end date parameters dynamically
-SELECT 
-    @StartDate = MIN(OrderDate), 
-    @EndDate = MAX(OrderDate)
-FROM dbo.Staging_Orders;
+-- The order lines of the window are staged in Staging_FactLines by the pipeline, with
+-- their dimension keys already resolved (SCD2 customers to their active version) and
+-- their ErrorReason set, see key_lookup.stage_fact_lines.
 
--- MERGE new data into the FactOrders table
+-- MERGE new and changed lines whose dimension keys all resolve into the FactOrders table
 MERGE dbo.FactOrders AS target
 USING (
-    -- Select new data from staging table and map it to the corresponding dimension keys
-    SELECT
-        so.OrderID,                       -- Natural Key for orders
-        dc.CustomerKey,                   -- Foreign Key from DimCustomers
-        de.EmployeeKey,                   -- Foreign Key from DimEmployees
-        ds.ShipperKey,                    -- Foreign Key from DimShippers
-        dp.ProductKey,                    -- Foreign Key from DimProducts
-        so.OrderDate,                     -- Date of the order
-        sod.Quantity,                     -- Quantity of products ordered
-        sod.UnitPrice * sod.Quantity AS TotalAmount, -- Total amount (calculated)
-        sod.Discount                      -- Discount applied to the order
-    FROM dbo.Staging_Orders so            -- Staging table containing raw order data
-    JOIN dbo.Staging_OrderDetails sod
-        ON sod.OrderID = so.OrderID
-    JOIN dbo.DimCustomers dc
-        ON so.CustomerID = dc.CustomerID          -- Match CustomerID with DimCustomers
-    JOIN dbo.DimEmployees de
-        ON so.EmployeeID = de.EmployeeID          -- Match EmployeeID with DimEmployees
-    JOIN dbo.DimShippers ds
-        ON so.ShipVia = ds.ShipperID              -- Match ShipperID with DimShippers
-    JOIN dbo.DimProducts dp
-        ON sod.ProductID = dp.ProductID           -- Match ProductID with DimProducts
-    WHERE so.OrderDate BETWEEN @StartDate AND @EndDate -- Dynamic date range for filtering
+    SELECT OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount
+    FROM dbo.Staging_FactLines
+    WHERE CustomerKey IS NOT NULL
+      AND EmployeeKey IS NOT NULL
+      AND ShipperKey IS NOT NULL
+      AND ProductKey IS NOT NULL
 ) AS source
 ON target.OrderID = source.OrderID               -- Match by OrderID
    AND target.ProductKey = source.ProductKey     -- Match by ProductKey
 
--- Update existing fact table records if they already exist
-WHEN MATCHED THEN
+-- Update existing fact table records only when something actually changed (NULL-safe)
+WHEN MATCHED AND EXISTS (
+    SELECT source.CustomerKey, source.EmployeeKey, source.ShipperKey, source.OrderDate,
+           source.Quantity, source.TotalAmount, source.Discount
+    EXCEPT
+    SELECT target.CustomerKey, target.EmployeeKey, target.ShipperKey, target.OrderDate,
+           target.Quantity, target.TotalAmount, target.Discount
+) THEN
     UPDATE SET
         target.CustomerKey = source.CustomerKey, -- Update CustomerKey
         target.EmployeeKey = source.EmployeeKey, -- Update EmployeeKey
         target.ShipperKey = source.ShipperKey,   -- Update ShipperKey
-        target.ProductKey = source.ProductKey,   -- Update ProductKey
         target.OrderDate = source.OrderDate,     -- Update OrderDate
         target.Quantity = source.Quantity,       -- Update Quantity
         target.TotalAmount = source.TotalAmount, -- Update TotalAmount
@@ -59,4 +47,54 @@ WHEN MATCHED THEN
 -- Insert new fact table records if they do not exist
 WHEN NOT MATCHED BY TARGET THEN
     INSERT (OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount)
-    VALUES (source.OrderID, source.CustomerKey, source.EmployeeKey, source.ShipperKey, source.ProductKey, source.OrderDate, source.Quantity, source.TotalAmount, source.Discount);
+    VALUES (source.OrderID, source.CustomerKey, source.EmployeeKey, source.ShipperKey, source.ProductKey, source.OrderDate, source.Quantity, source.TotalAmount, source.Discount)
+
+OUTPUT $action INTO @Changes;
+
+SET @RowsMerged = @@ROWCOUNT;
+
+-- Route faulty lines to FactError. Re-processing a window replaces the errors
+-- previously recorded for it.
+DELETE FROM dbo.FactError
+WHERE OrderDate BETWEEN @StartDate AND @EndDate;
+
+INSERT INTO dbo.FactError (
+    ErrorID, Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason
+)
+SELECT
+    NEWID() AS ErrorID,                   -- Generate unique ID for each error
+    Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason
+FROM dbo.Staging_FactLines
+WHERE ErrorReason IS NOT NULL;
+
+SET @ErrorRows = @@ROWCOUNT;
+
+-- Advance the high-water mark so the next run can start where this one ended
+SELECT @LoadedThrough = MAX(OrderDate)
+FROM dbo.FactOrders
+WHERE OrderDate BETWEEN @StartDate AND @EndDate;
+
+UPDATE dbo.ETL_HighWaterMark
+SET LastOrderDate = CASE
+        WHEN LastOrderDate IS NULL OR @LoadedThrough > LastOrderDate THEN @LoadedThrough
+        ELSE LastOrderDate
+    END,
+    WindowStart = @StartDate,
+    WindowEnd = @EndDate,
+    RowsMerged = @RowsMerged,
+    UpdatedAt = GETDATE()
+WHERE ProcessName = 'FactOrders';
+
+IF @@ROWCOUNT = 0
+    INSERT INTO dbo.ETL_HighWaterMark (ProcessName, LastOrderDate, WindowStart, WindowEnd, RowsMerged, UpdatedAt)
+    VALUES ('FactOrders', @LoadedThrough, @StartDate, @EndDate, @RowsMerged, GETDATE());
+
+-- Row counts reported to the run history; FactError rows count as inserted and as errors
+SELECT
+    COUNT(CASE WHEN Action = 'INSERT' THEN 1 END) + @ErrorRows AS RowsInserted,
+    COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END) AS RowsUpdated,
+    0 AS RowsExpired,
+    @ErrorRows AS ErrorCount
+FROM @Changes;
@@ -0,0 +1,258 @@
+-- Task 7: Update FactOrders and FactError (incremental, date-windowed), partitioned layout
+-- Used instead of update_fact.sql when the fact tables are partitioned by month, see
+-- infrastructure_initiation/fact_partitioning.sql. Every month the window changes is
+-- rebuilt in a *_Switch table and swapped in with a metadata-only partition switch, so
+-- reprocessing a month reads and writes that month only.
+USE ORDER_DDS;
+SET NOCOUNT ON;
+SET XACT_ABORT ON;
+
+-- Declare Parameters (bound by the pipeline, see resolve_fact_window)
+DECLARE @StartDate DATE = ?;                        -- Start of the load window
+DECLARE @EndDate DATE = ?;                          -- End of the load window
+DECLARE @RowsInserted INT;                          -- Lines added to FactOrders by this run
+DECLARE @RowsUpdated INT;                           -- Lines changed in FactOrders by this run
+DECLARE @RowsMerged INT;                            -- Rows inserted or updated by this run
+DECLARE @ErrorRows INT;                             -- Rows routed to FactError by this run
+DECLARE @LoadedThrough DATE;                        -- Latest OrderDate present after this run
+DECLARE @LastKey INT;                               -- Last OrderKey handed out before this run
+DECLARE @sql NVARCHAR(MAX);
+DECLARE @OrderMonths TABLE (MonthStart DATE PRIMARY KEY);  -- FactOrders months to rebuild
+DECLARE @ErrorMonths TABLE (MonthStart DATE PRIMARY KEY);  -- FactError months to rebuild
+
+-- The order lines of the window are staged in Staging_FactLines by the pipeline, with
+-- their dimension keys already resolved (SCD2 customers to their active version) and
+-- their ErrorReason set, see key_lookup.stage_fact_lines.
+
+-- Lines whose dimension keys all resolve, with the OrderKey and OrderDate of the row
+-- they replace. Action is NULL for lines that did not change (NULL-safe).
+IF OBJECT_ID(N'tempdb..#FactLines') IS NOT NULL
+    DROP TABLE #FactLines;
+
+SELECT
+    fo.OrderKey,
+    l.OrderID, l.CustomerKey, l.EmployeeKey, l.ShipperKey, l.ProductKey, l.OrderDate,
+    l.Quantity, l.TotalAmount, l.Discount,
+    fo.OrderDate AS PreviousOrderDate,
+    CASE
+        WHEN fo.OrderKey IS NULL THEN 'INSERT'
+        WHEN EXISTS (
+            SELECT l.CustomerKey, l.EmployeeKey, l.ShipperKey, l.OrderDate,
+                   l.Quantity, l.TotalAmount, l.Discount
+            EXCEPT
+            SELECT fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey, fo.OrderDate,
+                   fo.Quantity, fo.TotalAmount, fo.Discount
+        ) THEN 'UPDATE'
+    END AS Action
+INTO #FactLines
+FROM dbo.Staging_FactLines l
+LEFT JOIN dbo.FactOrders fo
+    ON fo.OrderID = l.OrderID                       -- Match by OrderID
+   AND fo.ProductKey = l.ProductKey                 -- Match by ProductKey
+WHERE l.CustomerKey IS NOT NULL
+  AND l.EmployeeKey IS NOT NULL
+  AND l.ShipperKey IS NOT NULL
+  AND l.ProductKey IS NOT NULL;
+
+SELECT
+    @RowsInserted = COUNT(CASE WHEN Action = 'INSERT' THEN 1 END),
+    @RowsUpdated = COUNT(CASE WHEN Action = 'UPDATE' THEN 1 END)
+FROM #FactLines;
+SET @RowsMerged = @RowsInserted + @RowsUpdated;
+
+-- New lines get the keys after the last one handed out; the identity is reseeded below
+SELECT @LastKey = CAST(ISNULL(last_value, CAST(seed_value AS INT) - 1) AS INT)
+FROM sys.identity_columns
+WHERE object_id = OBJECT_ID(N'dbo.FactOrders') AND name = N'OrderKey';
+
+WITH new_lines AS (
+    SELECT OrderKey, ROW_NUMBER() OVER (ORDER BY OrderID, ProductKey) AS LineNumber
+    FROM #FactLines
+    WHERE Action = 'INSERT'
+)
+UPDATE new_lines SET OrderKey = @LastKey + LineNumber;
+
+-- Months to rebuild: those a changed line lands in or moves out of. Errors recorded
+-- for the window are replaced, so every month holding one is rebuilt as well.
+INSERT INTO @OrderMonths (MonthStart)
+SELECT DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1) FROM #FactLines WHERE Action IS NOT NULL
+UNION
+SELECT DATEFROMPARTS(YEAR(PreviousOrderDate), MONTH(PreviousOrderDate), 1) FROM #FactLines
+WHERE Action = 'UPDATE' AND PreviousOrderDate IS NOT NULL;
+
+INSERT INTO @ErrorMonths (MonthStart)
+SELECT DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1) FROM dbo.Staging_FactLines
+WHERE ErrorReason IS NOT NULL AND OrderDate IS NOT NULL
+UNION
+SELECT DATEFROMPARTS(YEAR(OrderDate), MONTH(OrderDate), 1) FROM dbo.FactError
+WHERE OrderDate BETWEEN @StartDate AND @EndDate;
+
+-- Every rebuilt month needs its own partition, and the month after it a boundary so
+-- the partition ends with the month. They are added ahead of this transaction by
+-- add_fact_partitions.sql, as a split here would block the fact tables' readers.
+IF EXISTS (
+    SELECT 1
+    FROM (
+        SELECT MonthStart FROM @OrderMonths
+        UNION SELECT DATEADD(MONTH, 1, MonthStart) FROM @OrderMonths
+        UNION SELECT MonthStart FROM @ErrorMonths
+        UNION SELECT DATEADD(MONTH, 1, MonthStart) FROM @ErrorMonths
+    ) AS months
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM sys.partition_range_values rv
+        INNER JOIN sys.partition_functions pf ON pf.function_id = rv.function_id
+        WHERE pf.name = N'PF_OrderMonth' AND CAST(rv.value AS DATE) = months.MonthStart
+    )
+)
+    THROW 50000, N'PF_OrderMonth lacks boundaries for the load window; run add_fact_partitions.sql first.', 1;
+
+-- Build the rebuilt months of FactOrders aside: the rows the window leaves alone, plus
+-- the lines of the window with their kept or new OrderKey
+IF OBJECT_ID(N'dbo.FactOrders_Switch', N'U') IS NOT NULL
+    DROP TABLE dbo.FactOrders_Switch;
+SELECT TOP (0) * INTO dbo.FactOrders_Switch FROM dbo.FactOrders;
+
+SET IDENTITY_INSERT dbo.FactOrders_Switch ON;
+
+INSERT INTO dbo.FactOrders_Switch (
+    OrderKey, OrderID, CustomerKey, EmployeeKey, ShipperKey, ProductKey, OrderDate, Quantity, TotalAmount, Discount
+)
+SELECT fo.OrderKey, fo.OrderID, fo.CustomerKey, fo.EmployeeKey, fo.ShipperKey, fo.ProductKey,
+       fo.OrderDate, fo.Quantity, fo.TotalAmount, fo.Discount
+FROM dbo.FactOrders fo
+INNER JOIN @OrderMonths m
+    ON fo.OrderDate >= m.MonthStart AND fo.OrderDate < DATEADD(MONTH, 1, m.MonthStart)
+WHERE NOT EXISTS (
+    SELECT 1 FROM #FactLines l WHERE l.OrderID = fo.OrderID AND l.ProductKey = fo.ProductKey
+)
+UNION ALL
+SELECT l.OrderKey, l.OrderID, l.CustomerKey, l.EmployeeKey, l.ShipperKey, l.ProductKey,
+       l.OrderDate, l.Quantity, l.TotalAmount, l.Discount
+FROM #FactLines l
+INNER JOIN @OrderMonths m
+    ON l.OrderDate >= m.MonthStart AND l.OrderDate < DATEADD(MONTH, 1, m.MonthStart);
+
+SET IDENTITY_INSERT dbo.FactOrders_Switch OFF;
+
+-- Same for FactError: the errors outside the window, plus the faulty lines of the window
+IF OBJECT_ID(N'dbo.FactError_Switch', N'U') IS NOT NULL
+    DROP TABLE dbo.FactError_Switch;
+SELECT TOP (0) * INTO dbo.FactError_Switch FROM dbo.FactError;
+
+INSERT INTO dbo.FactError_Switch (
+    ErrorID, Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason, SORKey
+)
+SELECT fe.ErrorID, fe.Staging_Raw_ID, fe.OrderID, fe.CustomerID, fe.EmployeeID, fe.ShipVia, fe.ProductID,
+       fe.OrderDate, fe.Quantity, fe.TotalAmount, fe.Discount, fe.ErrorReason, fe.SORKey
+FROM dbo.FactError fe
+INNER JOIN @ErrorMonths m
+    ON fe.OrderDate >= m.MonthStart AND fe.OrderDate < DATEADD(MONTH, 1, m.MonthStart)
+WHERE fe.OrderDate NOT BETWEEN @StartDate AND @EndDate
+UNION ALL
+SELECT
+    NEWID() AS ErrorID,                   -- Generate unique ID for each error
+    Staging_Raw_ID, OrderID, CustomerID, EmployeeID, ShipVia, ProductID,
+    OrderDate, Quantity, TotalAmount, Discount, ErrorReason, NULL
+FROM dbo.Staging_FactLines
+WHERE ErrorReason IS NOT NULL;
+
+SET @ErrorRows = (SELECT COUNT(*) FROM dbo.Staging_FactLines WHERE ErrorReason IS NOT NULL);
+
+-- A partition switch needs the same indexes and trusted foreign keys on both tables.
+-- They are built on the rebuilt months only, clustered index first.
+SELECT @sql = STRING_AGG(CAST(
+    N'CREATE ' + CASE WHEN i.is_unique = 1 THEN N'UNIQUE ' ELSE N'' END + i.type_desc + N' INDEX '
+    + QUOTENAME(i.name) + N' ON dbo.' + QUOTENAME(OBJECT_NAME(i.object_id) + N'_Switch')
+    + N' (' + columns.key_columns + N')'
+    + ISNULL(N' INCLUDE (' + columns.included_columns + N')', N'')
+    + N' ON PS_OrderMonth (OrderDate);' AS NVARCHAR(MAX)), NCHAR(10))
+    WITHIN GROUP (ORDER BY i.object_id, i.index_id)
+FROM sys.indexes i
+CROSS APPLY (
+    SELECT
+        STRING_AGG(CASE WHEN ic.key_ordinal > 0 OR i.type = 6 THEN QUOTENAME(c.name)
+                        + CASE WHEN ic.is_descending_key = 1 THEN N' DESC' ELSE N'' END END, N', ')
+            WITHIN GROUP (ORDER BY ic.key_ordinal, ic.index_column_id) AS key_columns,
+        STRING_AGG(CASE WHEN ic.is_included_column = 1 AND i.type <> 6 THEN QUOTENAME(c.name) END, N', ')
+            AS included_columns
+    FROM sys.index_columns ic
+    INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE ic.object_id = i.object_id AND ic.index_id = i.index_id
+) AS columns
+WHERE i.object_id IN (OBJECT_ID(N'dbo.FactOrders'), OBJECT_ID(N'dbo.FactError')) AND i.type IN (1, 2, 6);
+EXEC sp_executesql @sql;
+
+SET @sql = N'';
+SELECT @sql += N'ALTER TABLE dbo.' + QUOTENAME(OBJECT_NAME(fk.parent_object_id) + N'_Switch')
+    + N' WITH CHECK ADD FOREIGN KEY (' + columns.parent_columns + N') REFERENCES '
+    + QUOTENAME(OBJECT_SCHEMA_NAME(fk.referenced_object_id)) + N'.' + QUOTENAME(OBJECT_NAME(fk.referenced_object_id))
+    + N' (' + columns.referenced_columns + N');'
+FROM sys.foreign_keys fk
+CROSS APPLY (
+    SELECT
+        STRING_AGG(QUOTENAME(COL_NAME(fkc.parent_object_id, fkc.parent_column_id)), N', ')
+            WITHIN GROUP (ORDER BY fkc.constraint_column_id) AS parent_columns,
+        STRING_AGG(QUOTENAME(COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id)), N', ')
+            WITHIN GROUP (ORDER BY fkc.constraint_column_id) AS referenced_columns
+    FROM sys.foreign_key_columns fkc
+    WHERE fkc.constraint_object_id = fk.object_id
+) AS columns
+WHERE fk.parent_object_id IN (OBJECT_ID(N'dbo.FactOrders'), OBJECT_ID(N'dbo.FactError'));
+EXEC sp_executesql @sql;
+
+-- Swap the rebuilt months in. Emptying a partition and switching one in are both
+-- metadata-only, so readers only wait for the end of the transaction from here on.
+SELECT @sql = STRING_AGG(CAST(
+    N'TRUNCATE TABLE dbo.' + TableName + N' WITH (PARTITIONS (' + PartitionNumber + N'));'
+    + N' ALTER TABLE dbo.' + TableName + N'_Switch SWITCH PARTITION ' + PartitionNumber
+    + N' TO dbo.' + TableName + N' PARTITION ' + PartitionNumber + N';' AS NVARCHAR(MAX)), NCHAR(10))
+FROM (
+    SELECT N'FactOrders' AS TableName, CAST($PARTITION.PF_OrderMonth(MonthStart) AS NVARCHAR(10)) AS PartitionNumber
+    FROM @OrderMonths
+    UNION ALL
+    SELECT N'FactError', CAST($PARTITION.PF_OrderMonth(MonthStart) AS NVARCHAR(10))
+    FROM @ErrorMonths
+) AS switches;
+
+IF @sql IS NOT NULL
+    EXEC sp_executesql @sql;
+
+DROP TABLE dbo.FactOrders_Switch;
+DROP TABLE dbo.FactError_Switch;
+DROP TABLE #FactLines;
+
+-- Explicit keys do not move the identity; continue after the last one handed out
+IF @RowsInserted > 0
+BEGIN
+    SET @LastKey += @RowsInserted;
+    DBCC CHECKIDENT (N'dbo.FactOrders', RESEED, @LastKey) WITH NO_INFOMSGS;
+END;
+
+-- Advance the high-water mark so the next run can start where this one ended
+SELECT @LoadedThrough = MAX(OrderDate)
+FROM dbo.FactOrders
+WHERE OrderDate BETWEEN @StartDate AND @EndDate;
+
+UPDATE dbo.ETL_HighWaterMark
+SET LastOrderDate = CASE
+        WHEN LastOrderDate IS NULL OR @LoadedThrough > LastOrderDate THEN @LoadedThrough
+        ELSE LastOrderDate
+    END,
+    WindowStart = @StartDate,
+    WindowEnd = @EndDate,
+    RowsMerged = @RowsMerged,
+    UpdatedAt = GETDATE()
+WHERE ProcessName = 'FactOrders';
+
+IF @@ROWCOUNT = 0
+    INSERT INTO dbo.ETL_HighWaterMark (ProcessName, LastOrderDate, WindowStart, WindowEnd, RowsMerged, UpdatedAt)
+    VALUES ('FactOrders', @LoadedThrough, @StartDate, @EndDate, @RowsMerged, GETDATE());
+
+-- Row counts reported to the run history; FactError rows count as inserted and as errors
+SELECT
+    @RowsInserted + @ErrorRows AS RowsInserted,
+    @RowsUpdated AS RowsUpdated,
+    0 AS RowsExpired,
+    @ErrorRows AS ErrorCount;
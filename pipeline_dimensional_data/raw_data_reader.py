@@ -0,0 +1,229 @@
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from openpyxl import load_workbook
+from loggings import logger
+from pipeline_dimensional_data.metrics import get_metrics
+
+# Excel sheet name -> staging table it is loaded into, in load order
+STAGING_SHEETS = {
+    'Products': 'Staging_Products',
+    'Region': 'Staging_Region',
+    'Shippers': 'Staging_Shippers',
+    'Suppliers': 'Staging_Suppliers',
+    'Territories': 'Staging_Territories',
+    'Orders': 'Staging_Orders',
+    'Customers': 'Staging_Customers',
+    'Employees': 'Staging_Employees',
+    'OrderDetails': 'Staging_OrderDetails',
+    'Categories': 'Staging_Categories',
+}
+
+RAW_DATA_CACHE_DIR = os.path.join(".cache", "raw_data")
+
+# Rows held in memory per sheet when streaming raw data into staging
+STREAM_CHUNK_SIZE = 10000
+
+
+def workbook_fingerprint(raw_data_path: str) -> str:
+    """
+    Builds a cache key from the size, modification time and content hash of a file.
+
+    Args:
+        raw_data_path (str): Path to the workbook.
+
+    Returns:
+        str: Key that changes whenever the workbook changes.
+    """
+    stat = os.stat(raw_data_path)
+    digest = hashlib.sha256()
+    with open(raw_data_path, 'rb') as raw_file:
+        for block in iter(lambda: raw_file.read(1 << 20), b''):
+            digest.update(block)
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{digest.hexdigest()[:16]}"
+
+
+def _source_cache_dir(cache_dir: str, raw_data_path: str) -> str:
+    """
+    Directory holding the cached versions of one workbook, named after its file and a
+    hash of its absolute path.
+    """
+    path = os.path.abspath(raw_data_path)
+    path_key = hashlib.sha256(path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{path_key}")
+
+
+def _prune_cache(source_dir: str, kept_path: str):
+    """
+    Deletes the cached versions of a workbook other than kept_path, so the cache holds
+    one version per source instead of growing with every edit of the workbook.
+    """
+    for entry in os.listdir(source_dir):
+        path = os.path.join(source_dir, entry)
+        if path != kept_path and os.path.isdir(path) and not entry.endswith(".tmp"):
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug(f"Removed outdated raw data cache: {path}")
+
+
+def _parse_sheets(raw_data_path: str, sheet_names):
+    """
+    Opens the workbook once and parses the requested sheets from it.
+    """
+    with pd.ExcelFile(raw_data_path) as workbook:
+        return {sheet: workbook.parse(sheet) for sheet in sheet_names}
+
+
+def _read_cache(cache_path: str, sheet_names):
+    try:
+        return {
+            sheet: pd.read_parquet(os.path.join(cache_path, f"{sheet}.parquet"))
+            for sheet in sheet_names
+        }
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable raw data cache {cache_path}: {e}")
+        return None
+
+
+def _write_cache(cache_path: str, frames):
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(tmp_path, exist_ok=True)
+        for sheet, df in frames.items():
+            df.to_parquet(os.path.join(tmp_path, f"{sheet}.parquet"), index=False)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Cached parsed workbook in: {cache_path}")
+    except Exception as e:
+        logger.warning(f"Could not cache parsed workbook: {e}")
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def read_workbook(raw_data_path: str, sheet_names=None, max_workers: int = 1,
+                  cache_dir: str = RAW_DATA_CACHE_DIR, use_cache: bool = True):
+    """
+    Parses all staging sheets of a workbook in a single pass.
+
+    Parsed frames are cached as Parquet files keyed by the workbook fingerprint,
+    so re-runs against an unchanged workbook skip Excel parsing entirely. Only the
+    latest version of each workbook is kept.
+
+    Args:
+        raw_data_path (str): Path to the Excel workbook.
+        sheet_names (list): Sheets to read. Defaults to every sheet in STAGING_SHEETS.
+        max_workers (int): Number of processes used to parse sheets. 1 parses in-process.
+        cache_dir (str): Directory holding the parsed-workbook cache.
+        use_cache (bool): Whether to read from and write to the cache.
+
+    Returns:
+        dict: {sheet_name: pd.DataFrame}
+    """
+    sheet_names = list(sheet_names or STAGING_SHEETS)
+    cache_path = None
+    started = time.perf_counter()
+
+    if use_cache:
+        source_dir = _source_cache_dir(cache_dir, raw_data_path)
+        cache_path = os.path.join(source_dir, workbook_fingerprint(raw_data_path))
+        if os.path.isdir(cache_path):
+            frames = _read_cache(cache_path, sheet_names)
+            if frames is not None:
+                logger.info(f"Loaded {len(frames)} sheets from cache: {cache_path}")
+                _record_read(raw_data_path, frames, started, from_cache=True)
+                return frames
+
+    if max_workers > 1 and len(sheet_names) > 1:
+        groups = [sheet_names[i::max_workers] for i in range(min(max_workers, len(sheet_names)))]
+        frames = {}
+        with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+            for parsed in executor.map(_parse_sheets, [raw_data_path] * len(groups), groups):
+                frames.update(parsed)
+        frames = {sheet: frames[sheet] for sheet in sheet_names}
+    else:
+        frames = _parse_sheets(raw_data_path, sheet_names)
+    logger.info(f"Parsed {len(frames)} sheets from: {raw_data_path}")
+    _record_read(raw_data_path, frames, started, from_cache=False)
+
+    if cache_path:
+        _write_cache(cache_path, frames)
+        if os.path.isdir(cache_path):
+            _prune_cache(source_dir, cache_path)
+    return frames
+
+
+def _record_read(raw_data_path: str, frames, started: float, from_cache: bool):
+    get_metrics().record(
+        'excel_read', raw_data_path,
+        duration_seconds=round(time.perf_counter() - started, 6),
+        rows=sum(len(df) for df in frames.values()),
+        bytes=os.path.getsize(raw_data_path),
+        from_cache=from_cache,
+    )
+
+
+def _iter_excel_chunks(raw_data_path: str, sheet_name: str, chunk_size: int):
+    workbook = load_workbook(raw_data_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # Pick values by header position: a blank header cell drops its column only
+        kept = [(index, str(name)) for index, name in enumerate(header) if name is not None]
+        columns = [name for _, name in kept]
+        chunk = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            chunk.append([row[index] if index < len(row) else None for index, _ in kept])
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_sheet_chunks(raw_data_path: str, sheet_name: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Streams a sheet as DataFrames of at most chunk_size rows.
+
+    A workbook is iterated with openpyxl in read-only mode. A directory is treated as a
+    CSV drop holding one <sheet_name>.csv file per sheet; CSV values are read as text
+    and typed by the staging schema when cleaned.
+
+    Args:
+        raw_data_path (str): Path to the Excel workbook or to a directory of CSV files.
+        sheet_name (str): Sheet to stream.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    started = time.perf_counter()
+    rows = 0
+    if os.path.isdir(raw_data_path):
+        source_path = os.path.join(raw_data_path, f"{sheet_name}.csv")
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"CSV file not found for sheet {sheet_name}: {source_path}")
+        chunks = pd.read_csv(source_path, chunksize=chunk_size, dtype=str)
+        source_bytes = os.path.getsize(source_path)
+    else:
+        source_path = raw_data_path
+        chunks = _iter_excel_chunks(raw_data_path, sheet_name, chunk_size)
+        source_bytes = 0
+
+    for chunk in chunks:
+        rows += len(chunk)
+        yield chunk
+
+    get_metrics().record(
+        'excel_read', f"{source_path}:{sheet_name}",
+        duration_seconds=round(time.perf_counter() - started, 6),
+        rows=rows,
+        bytes=source_bytes,
+        streamed=True,
+    )
@@ -0,0 +1,157 @@
+from datetime import datetime
+from loggings import logger
+from pipeline_dimensional_data.connection_pool import get_pool
+
+# Run and task statuses stored in ETL_RunHistory / ETL_TaskHistory
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Kept by reset_db so runs stay comparable across full refreshes
+HISTORY_TABLES = ("ETL_RunHistory", "ETL_TaskHistory")
+
+ROW_COUNT_FIELDS = ('rows_inserted', 'rows_updated', 'rows_expired', 'error_count')
+
+
+def _task_status(status: dict) -> str:
+    if not status.get('success'):
+        return FAILED
+    return SKIPPED if status.get('skipped') else SUCCEEDED
+
+
+def _seconds(started_at: datetime, ended_at: datetime):
+    if started_at is None or ended_at is None:
+        return None
+    return round((ended_at - started_at).total_seconds(), 3)
+
+
+def build_task_rows(task_name: str, status: dict, started_at: datetime, ended_at: datetime):
+    """
+    Turns the status of a finished task into ETL_TaskHistory rows.
+
+    Tasks that run several scripts (update_dimensional_tables_task) get one row per
+    script plus a task row holding their totals. Rejected staging rows reported by the
+    task metrics count as errors.
+
+    Args:
+        task_name (str): Name of the task in tasks_status.
+        status (dict): Status returned by the task.
+        started_at (datetime): When the task started.
+        ended_at (datetime): When the task ended.
+
+    Returns:
+        list: Row dicts, task row first.
+    """
+    children = []
+    for name, child in status.items():
+        if isinstance(child, dict) and 'success' in child:
+            child_row = {
+                'task_name': name,
+                'parent_task_name': task_name,
+                'started_at': child.get('started_at'),
+                'ended_at': child.get('ended_at'),
+                'status': _task_status(child),
+                'duration_seconds': child.get('duration_seconds'),
+                'error_message': child.get('error'),
+            }
+            child_row.update({field: (child.get('rows') or {}).get(field, 0) for field in ROW_COUNT_FIELDS})
+            children.append(child_row)
+
+    rows = status.get('rows') or {}
+    task_row = {
+        'task_name': task_name,
+        'parent_task_name': None,
+        'started_at': started_at,
+        'ended_at': ended_at,
+        'status': _task_status(status),
+        'duration_seconds': _seconds(started_at, ended_at),
+        'error_message': status.get('error'),
+    }
+    for field in ROW_COUNT_FIELDS:
+        task_row[field] = rows.get(field, 0) + sum(child[field] for child in children)
+    task_row['error_count'] += (status.get('metrics') or {}).get('staging_rows_failed', 0)
+    return [task_row] + children
+
+
+def start_run(execution_id: str, started_at: datetime, mode: str = None):
+    """
+    Records the start of a run in ETL_RunHistory.
+
+    Failures are logged and ignored so the history never stops a load.
+    """
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO ETL_RunHistory (ExecutionID, Mode, StartTime, Status)
+                VALUES (?, ?, ?, ?);
+            """, (execution_id, mode, started_at, RUNNING))
+            conn.commit()
+            cursor.close()
+        logger.info(f"Run {execution_id} recorded in ETL_RunHistory.")
+    except Exception as e:
+        logger.warning(f"Could not record the start of run {execution_id}: {e}")
+
+
+def finish_run(execution_id: str, started_at: datetime, ended_at: datetime, task_rows,
+               error_message: str = None, mode: str = None):
+    """
+    Stores the task rows of a run in ETL_TaskHistory and completes its ETL_RunHistory row
+    with the end time, status and totals, in one transaction.
+
+    The run row is created here if start_run could not write it (e.g. the history
+    tables did not exist yet when the run started). Failures are logged and ignored.
+
+    Args:
+        execution_id (str): Execution ID of the run.
+        started_at (datetime): When the run started.
+        ended_at (datetime): When the run ended.
+        task_rows (list): Rows built with build_task_rows.
+        error_message (str): Error that stopped the run, if any.
+        mode (str): Run mode (full-refresh or incremental).
+    """
+    task_rows = list(task_rows)
+    top_rows = [row for row in task_rows if row['parent_task_name'] is None]
+    failed_tasks = sum(1 for row in top_rows if row['status'] == FAILED)
+    status = FAILED if error_message or failed_tasks else SUCCEEDED
+    totals = {field: sum(row[field] for row in top_rows) for field in ROW_COUNT_FIELDS}
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            if task_rows:
+                cursor.executemany("""
+                    INSERT INTO ETL_TaskHistory (
+                        ExecutionID, TaskName, ParentTaskName, StartTime, EndTime, Status, DurationSeconds,
+                        RowsInserted, RowsUpdated, RowsExpired, ErrorCount, ErrorMessage
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """, [
+                    (execution_id, row['task_name'], row['parent_task_name'], row['started_at'], row['ended_at'],
+                     row['status'], row['duration_seconds'], row['rows_inserted'], row['rows_updated'],
+                     row['rows_expired'], row['error_count'], row['error_message'])
+                    for row in task_rows
+                ])
+
+            run_values = (ended_at, status, _seconds(started_at, ended_at), totals['rows_inserted'],
+                          totals['rows_updated'], totals['rows_expired'], totals['error_count'],
+                          failed_tasks, error_message)
+            cursor.execute("""
+                UPDATE ETL_RunHistory
+                SET EndTime = ?, Status = ?, DurationSeconds = ?, RowsInserted = ?, RowsUpdated = ?,
+                    RowsExpired = ?, ErrorCount = ?, FailedTasks = ?, ErrorMessage = ?
+                WHERE ExecutionID = ?;
+            """, run_values + (execution_id,))
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                    INSERT INTO ETL_RunHistory (
+                        EndTime, Status, DurationSeconds, RowsInserted, RowsUpdated,
+                        RowsExpired, ErrorCount, FailedTasks, ErrorMessage, ExecutionID, Mode, StartTime
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """, run_values + (execution_id, mode, started_at))
+            conn.commit()
+            cursor.close()
+        logger.info(f"Run {execution_id} {status}: {totals} ({failed_tasks} failed tasks).")
+    except Exception as e:
+        logger.warning(f"Could not record the end of run {execution_id}: {e}")
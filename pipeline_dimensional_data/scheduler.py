@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from loggings import logger
+from pipeline_dimensional_data.metrics import get_metrics
+from pipeline_dimensional_data.profiling import profile_thread
+
+
+def _check_dependencies(nodes, dependencies):
+    """
+    Validates that every dependency is a known node and that the graph has no cycles.
+    """
+    for node in nodes:
+        for dependency in dependencies.get(node, ()):
+            if dependency not in nodes:
+                raise ValueError(f"{node} depends on unknown node {dependency}")
+
+    visiting, done = set(), set()
+
+    def visit(node):
+        if node in done:
+            return
+        if node in visiting:
+            raise ValueError(f"Dependency cycle detected at {node}")
+        visiting.add(node)
+        for dependency in dependencies.get(node, ()):
+            visit(dependency)
+        visiting.discard(node)
+        done.add(node)
+
+    for node in nodes:
+        visit(node)
+
+
+def _run_in_worker(run_node, node, task):
+    with get_metrics().task_scope(task), profile_thread():
+        return run_node(node)
+
+
+def run_dag(nodes, dependencies, run_node, max_workers: int = 4):
+    """
+    Runs nodes concurrently while respecting their dependencies.
+
+    A node starts as soon as all of its dependencies have succeeded. Nodes whose
+    dependencies failed are skipped. Metrics a node records are attributed to the task
+    that called run_dag, and while a run is profiled every node is profiled on its
+    worker thread, see profiling.profile_thread.
+
+    Args:
+        nodes (list): Nodes to run.
+        dependencies (dict): {node: [nodes it depends on]}. Dependencies outside `nodes` are ignored.
+        run_node (callable): Function executing one node and returning a status dict with a 'success' key.
+        max_workers (int): Maximum number of nodes running at the same time.
+
+    Returns:
+        dict: {node: status dict}
+    """
+    nodes = list(nodes)
+    dependencies = {
+        node: [dependency for dependency in dependencies.get(node, ()) if dependency in nodes]
+        for node in nodes
+    }
+    _check_dependencies(nodes, dependencies)
+
+    task = get_metrics().current_task
+    results = {}
+    pending = list(nodes)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for node in list(pending):
+                node_dependencies = dependencies[node]
+                failed = [d for d in node_dependencies if d in results and not results[d].get('success')]
+                if failed:
+                    pending.remove(node)
+                    results[node] = {'success': False, 'error': f"Skipped: dependency {failed[0]} failed"}
+                    logger.error(f"Skipping {node}: dependency {failed[0]} failed.")
+                elif all(d in results for d in node_dependencies):
+                    pending.remove(node)
+                    running[executor.submit(_run_in_worker, run_node, node, task)] = node
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                try:
+                    results[node] = future.result()
+                except Exception as e:
+                    logger.error(f"{node} failed: {e}", exc_info=True)
+                    results[node] = {'success': False, 'error': str(e)}
+
+    return {node: results[node] for node in nodes}
@@ -0,0 +1,146 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from loggings import logger
+from pipeline_dimensional_data.backends import PARAMETER_DECLARATION, get_backend
+
+# Directories whose T-SQL scripts are loaded when the registry is created
+SCRIPT_DIRECTORIES = ("infrastructure_initiation", "pipeline_dimensional_data/queries")
+
+# Python type every bound value is converted to, by declared SQL type
+_PARAMETER_TYPES = {
+    'date': lambda value: value if type(value) is date else datetime.fromisoformat(str(value)).date(),
+    'datetime': lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(str(value)),
+    'int': int,
+    'bigint': int,
+    'bit': lambda value: int(bool(value)),
+    'decimal': lambda value: Decimal(str(value)),
+    'nvarchar': str,
+    'varchar': str,
+}
+
+
+@dataclass(frozen=True)
+class ScriptParameter:
+    """
+    Named, typed parameter of a script, bound through the driver.
+    """
+    name: str
+    sql_type: str
+
+    def coerce(self, value):
+        if value is None:
+            return None
+        convert = _PARAMETER_TYPES.get(self.sql_type.lower())
+        try:
+            return convert(value) if convert else value
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise ValueError(f"Parameter {self.name} expects {self.sql_type}, got {value!r}") from e
+
+
+@dataclass(frozen=True)
+class SqlScript:
+    """
+    A script read and split once, in the dialect of the backend it was loaded for.
+
+    `batches` are the units sent to the server: the GO-separated batches on SQL Server,
+    the individual statements on SQLite. `parameters` are read from the T-SQL script for
+    both dialects.
+    """
+    path: str
+    text: str
+    batches: tuple
+    parameters: tuple = field(default=())
+
+    def bind(self, params: dict = None) -> dict:
+        """
+        Checks the parameters against the script's declarations and converts them to
+        the declared types.
+
+        Args:
+            params (dict): {name: value} of every declared parameter.
+
+        Returns:
+            dict: Converted values in declaration order, as Backend.run_batches expects them.
+
+        Raises:
+            ValueError: If a declared parameter is missing or an unknown one is given.
+        """
+        params = params or {}
+        declared = [parameter.name for parameter in self.parameters]
+        missing = [name for name in declared if name not in params]
+        unknown = [name for name in params if name not in declared]
+        if missing or unknown:
+            raise ValueError(f"{self.path}: missing parameters {missing}, unknown parameters {unknown}")
+        return {parameter.name: parameter.coerce(params[parameter.name]) for parameter in self.parameters}
+
+    def run(self, cursor, params: dict = None) -> dict:
+        """
+        Binds the parameters and executes the batches of the script, each with the
+        parameters it declares.
+
+        Returns:
+            dict: {'rows_inserted': int, ...}, empty if the script reports none.
+        """
+        return get_backend().run_batches(cursor, list(self.batches), self.bind(params), name=self.path)
+
+
+class SqlRegistry:
+    """
+    Every SQL script of the pipeline, read, translated and split once per backend.
+    """
+
+    def __init__(self, backend, directories=SCRIPT_DIRECTORIES):
+        self.backend = backend
+        self._scripts = {}
+        self._lock = threading.Lock()
+        for directory in directories:
+            for file_name in sorted(os.listdir(directory)):
+                if file_name.endswith('.sql'):
+                    self.get(os.path.join(directory, file_name))
+        logger.info(f"Loaded {len(self._scripts)} SQL scripts for the {backend.name} backend.")
+
+    def _compile(self, path: str) -> SqlScript:
+        with open(path, 'r', encoding='utf-8') as sql_file:
+            declarations = PARAMETER_DECLARATION.findall(sql_file.read())
+        parameters = tuple(ScriptParameter(name, sql_type) for name, sql_type in declarations)
+        text = self.backend.load_script(path)
+        return SqlScript(path=path, text=text, batches=tuple(self.backend.split_script(text)), parameters=parameters)
+
+    def get(self, path: str) -> SqlScript:
+        """
+        Returns the compiled script at path (a T-SQL script path, as shipped with the
+        pipeline), loading it on first use if it was not found at startup.
+        """
+        path = os.path.normpath(path)
+        with self._lock:
+            script = self._scripts.get(path)
+            if script is None:
+                script = self._scripts[path] = self._compile(path)
+            return script
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SqlRegistry:
+    """
+    Returns the script registry of the configured backend, loading every script on
+    first use and again whenever the backend changes.
+    """
+    global _registry
+    backend = get_backend()
+    with _registry_lock:
+        if _registry is None or _registry.backend is not backend:
+            _registry = SqlRegistry(backend)
+        return _registry
+
+
+def get_script(path: str) -> SqlScript:
+    """
+    Shortcut for get_registry().get(path).
+    """
+    return get_registry().get(path)
@@ -0,0 +1,399 @@
+import math
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from loggings import logger
+from infrastructure_initiation.staging_schema import get_staging_column_types
+from pipeline_dimensional_data.raw_data_reader import STAGING_SHEETS
+
+# Rows per sheet at scale 1, the size of raw_data_source.xlsx
+BASE_ROWS = {
+    'Region': 4,
+    'Shippers': 3,
+    'Categories': 8,
+    'Employees': 9,
+    'Suppliers': 29,
+    'Territories': 53,
+    'Products': 77,
+    'Customers': 91,
+    'Orders': 830,
+}
+
+# Lookup sheets keep their size at every scale
+FIXED_SHEETS = ('Region', 'Shippers', 'Categories')
+
+# Order lines per order are drawn uniformly from this range (about 2.6 on average in the sample)
+LINES_PER_ORDER = (1, 5)
+
+FIRST_ORDER_DATE = datetime(1996, 7, 4)
+ORDER_HISTORY_DAYS = 671
+# Days of new orders appended by every generation after the first
+GENERATION_DAYS = 30
+
+# Defects given to dirty order lines; order defects taint every line of their order.
+# Late defects reference members the dimensions do not have yet, so their lines load
+# against inferred members instead of going to FactError. The late customer of a
+# generation arrives with the next one, which completes its inferred member.
+ORDER_DEFECTS = ('Missing Customer', 'Missing Employee', 'Missing Shipper', 'Late Customer')
+LINE_DEFECTS = ('Missing Product', 'Invalid Quantity', 'Invalid Discount', 'Late Product')
+
+# Largest sheet an .xlsx workbook can hold, header included
+EXCEL_MAX_ROWS = 1048576
+
+_COUNTRIES = ('Germany', 'USA', 'France', 'Brazil', 'UK', 'Mexico', 'Spain', 'Italy', 'Sweden', 'Canada')
+_TITLES = ('Owner', 'Sales Representative', 'Marketing Manager', 'Accounting Manager', 'Order Administrator')
+
+
+def _rows(sheet: str, scale: float) -> int:
+    if sheet in FIXED_SHEETS:
+        return BASE_ROWS[sheet]
+    return max(1, int(round(BASE_ROWS[sheet] * scale)))
+
+
+def _labels(prefix: str, ids) -> np.ndarray:
+    return np.char.add(prefix, np.asarray(ids).astype(str))
+
+
+def _pick(rng: np.random.Generator, values, size: int) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def _phones(rng: np.random.Generator, size: int) -> np.ndarray:
+    return np.char.add('(555) ', rng.integers(1000000, 9999999, size).astype(str))
+
+
+def _dimensions(rng: np.random.Generator, scale: float):
+    """
+    Builds the nine dimension sheets, with every foreign key pointing at an existing row.
+    """
+    region_ids = np.arange(1, _rows('Region', scale) + 1)
+    shipper_ids = np.arange(1, _rows('Shippers', scale) + 1)
+    category_ids = np.arange(1, _rows('Categories', scale) + 1)
+    employee_ids = np.arange(1, _rows('Employees', scale) + 1)
+    supplier_ids = np.arange(1, _rows('Suppliers', scale) + 1)
+    territory_ids = np.arange(1, _rows('Territories', scale) + 1) + 1000
+    product_ids = np.arange(1, _rows('Products', scale) + 1)
+    customer_count = _rows('Customers', scale)
+
+    frames = {}
+    frames['Region'] = pd.DataFrame({
+        'RegionID': region_ids,
+        'RegionDescription': _labels('Region ', region_ids),
+        'RegionCategory': _pick(rng, ('Gold', 'Silver', 'Bronze'), len(region_ids)),
+        'RegionImportance': _pick(rng, ('High', 'Medium', 'Low'), len(region_ids)),
+    })
+    frames['Shippers'] = pd.DataFrame({
+        'ShipperID': shipper_ids,
+        'CompanyName': _labels('Shipper ', shipper_ids),
+        'Phone': _phones(rng, len(shipper_ids)),
+    })
+    frames['Categories'] = pd.DataFrame({
+        'CategoryID': category_ids,
+        'CategoryName': _labels('Category ', category_ids),
+        'Description': _labels('Products of category ', category_ids),
+    })
+    frames['Employees'] = pd.DataFrame({
+        'EmployeeID': employee_ids,
+        'LastName': _labels('Last', employee_ids),
+        'FirstName': _labels('First', employee_ids),
+        'Title': _pick(rng, _TITLES, len(employee_ids)),
+        'TitleOfCourtesy': _pick(rng, ('Mr.', 'Ms.', 'Dr.'), len(employee_ids)),
+        'BirthDate': FIRST_ORDER_DATE - pd.to_timedelta(rng.integers(8000, 20000, len(employee_ids)), unit='D'),
+        'HireDate': FIRST_ORDER_DATE - pd.to_timedelta(rng.integers(30, 2000, len(employee_ids)), unit='D'),
+        'Address': _labels('Employee Street ', employee_ids),
+        'City': _pick(rng, ('Seattle', 'Tacoma', 'London', 'Kirkland'), len(employee_ids)),
+        'Region': _pick(rng, ('WA', None), len(employee_ids)),
+        'PostalCode': rng.integers(10000, 99999, len(employee_ids)).astype(str),
+        'Country': _pick(rng, ('USA', 'UK'), len(employee_ids)),
+        'HomePhone': _phones(rng, len(employee_ids)),
+        'Extension': rng.integers(100, 9999, len(employee_ids)).astype(str),
+        'Notes': _labels('Synthetic employee ', employee_ids),
+        # The first employee reports to nobody, everyone else to an earlier employee
+        'ReportsTo': pd.array([None] + list(rng.integers(1, employee_ids[1:], len(employee_ids) - 1)), dtype='Int64'),
+        'PhotoPath': _labels('http://accweb/employees/', employee_ids),
+    })
+    frames['Suppliers'] = pd.DataFrame({
+        'SupplierID': supplier_ids,
+        'CompanyName': _labels('Supplier ', supplier_ids),
+        'ContactName': _labels('Supplier Contact ', supplier_ids),
+        'ContactTitle': _pick(rng, _TITLES, len(supplier_ids)),
+        'Address': _labels('Supplier Street ', supplier_ids),
+        'City': _labels('City ', rng.integers(1, 500, len(supplier_ids))),
+        'Region': None,
+        'PostalCode': rng.integers(10000, 99999, len(supplier_ids)).astype(str),
+        'Country': _pick(rng, _COUNTRIES, len(supplier_ids)),
+        'Phone': _phones(rng, len(supplier_ids)),
+        'Fax': None,
+        'HomePage': None,
+    })
+    frames['Territories'] = pd.DataFrame({
+        'TerritoryID': territory_ids,
+        'TerritoryDescription': _labels('Territory ', territory_ids),
+        'TerritoryCode': _labels('T', territory_ids),
+        'RegionID': rng.choice(region_ids, len(territory_ids)),
+    })
+    frames['Products'] = pd.DataFrame({
+        'ProductID': product_ids,
+        'ProductName': _labels('Product ', product_ids),
+        'SupplierID': rng.choice(supplier_ids, len(product_ids)),
+        'CategoryID': rng.choice(category_ids, len(product_ids)),
+        'QuantityPerUnit': _labels('units x ', rng.integers(1, 48, len(product_ids))),
+        'UnitPrice': np.round(rng.uniform(2.5, 260.0, len(product_ids)), 2),
+        'UnitsInStock': rng.integers(0, 125, len(product_ids)),
+        'UnitsOnOrder': rng.integers(0, 100, len(product_ids)),
+        'ReorderLevel': rng.integers(0, 30, len(product_ids)),
+        'Discontinued': rng.random(len(product_ids)) < 0.1,
+    })
+    frames['Customers'] = pd.DataFrame({
+        'CustomerID': np.char.add('C', np.char.zfill(np.arange(1, customer_count + 1).astype(str), 7)),
+        'CompanyName': _labels('Customer ', np.arange(1, customer_count + 1)),
+        'ContactName': _labels('Customer Contact ', np.arange(1, customer_count + 1)),
+        'ContactTitle': _pick(rng, _TITLES, customer_count),
+        'Address': _labels('Customer Street ', rng.integers(1, 10000, customer_count)),
+        'City': _labels('City ', rng.integers(1, 500, customer_count)),
+        'Region': _labels('R', rng.integers(1, 50, customer_count)),
+        'PostalCode': rng.integers(10000, 99999, customer_count).astype(str),
+        'Country': _pick(rng, _COUNTRIES, customer_count),
+        'Phone': _phones(rng, customer_count),
+        'Fax': _phones(rng, customer_count),
+    })
+    return frames
+
+
+def _orders(rng: np.random.Generator, frames, first_order_id: int, order_count: int,
+            first_date: datetime, days: int, dirty_rate: float, late_customer: str):
+    """
+    Builds order_count orders dated within [first_date, first_date + days) and their lines.
+    A dirty_rate share of the lines gets one of ORDER_DEFECTS or LINE_DEFECTS; 'Late
+    Customer' orders go to late_customer.
+    """
+    order_ids = np.arange(first_order_id, first_order_id + order_count)
+    customers = frames['Customers']['CustomerID'].to_numpy()
+    employees = frames['Employees']['EmployeeID'].to_numpy()
+    shippers = frames['Shippers']['ShipperID'].to_numpy()
+    territories = frames['Territories']['TerritoryID'].to_numpy()
+    products = frames['Products']['ProductID'].to_numpy()
+    prices = frames['Products']['UnitPrice'].to_numpy()
+
+    order_dates = first_date + pd.to_timedelta(np.sort(rng.integers(0, days, order_count)), unit='D')
+    customer_ids = rng.choice(customers, order_count).astype(object)
+    orders = pd.DataFrame({
+        'OrderID': order_ids,
+        'CustomerID': customer_ids,
+        'EmployeeID': rng.choice(employees, order_count),
+        'OrderDate': order_dates,
+        'RequiredDate': order_dates + pd.to_timedelta(rng.integers(7, 42, order_count), unit='D'),
+        'ShippedDate': order_dates + pd.to_timedelta(rng.integers(1, 30, order_count), unit='D'),
+        'ShipVia': rng.choice(shippers, order_count),
+        'Freight': np.round(rng.uniform(0.1, 1000.0, order_count), 2),
+        'ShipName': customer_ids,
+        'ShipAddress': _labels('Ship Street ', rng.integers(1, 10000, order_count)),
+        'ShipCity': _labels('City ', rng.integers(1, 500, order_count)),
+        'ShipRegion': None,
+        'ShipPostalCode': rng.integers(10000, 99999, order_count).astype(str),
+        'ShipCountry': _pick(rng, _COUNTRIES, order_count),
+        'TerritoryID': rng.choice(territories, order_count),
+    })
+
+    # Consecutive products from a random offset keep (OrderID, ProductID) unique per order
+    line_counts = rng.integers(LINES_PER_ORDER[0], min(LINES_PER_ORDER[1], len(products)) + 1, order_count)
+    line_order_ids = np.repeat(order_ids, line_counts)
+    line_numbers = np.arange(len(line_order_ids)) - np.repeat(np.cumsum(line_counts) - line_counts, line_counts)
+    product_positions = (np.repeat(rng.integers(0, len(products), order_count), line_counts) + line_numbers) % len(products)
+    details = pd.DataFrame({
+        'OrderID': line_order_ids,
+        'ProductID': products[product_positions],
+        'UnitPrice': prices[product_positions],
+        'Quantity': rng.integers(1, 120, len(line_order_ids)),
+        'Discount': _pick(rng, (0.0, 0.0, 0.0, 0.05, 0.1, 0.15, 0.2, 0.25), len(line_order_ids)).astype(float),
+    })
+
+    dirty = np.flatnonzero(rng.random(len(details)) < dirty_rate)
+    defects = _pick(rng, ORDER_DEFECTS + LINE_DEFECTS, len(dirty))
+    for defect, positions in pd.Series(dirty).groupby(defects):
+        positions = positions.to_numpy()
+        order_mask = orders['OrderID'].isin(details['OrderID'].to_numpy()[positions])
+        if defect == 'Missing Customer':
+            orders.loc[order_mask, 'CustomerID'] = None
+        elif defect == 'Missing Employee':
+            orders.loc[order_mask, 'EmployeeID'] = None
+        elif defect == 'Missing Shipper':
+            orders.loc[order_mask, 'ShipVia'] = None
+        elif defect == 'Late Customer':
+            orders.loc[order_mask, 'CustomerID'] = late_customer
+        elif defect == 'Missing Product':
+            details.loc[positions, 'ProductID'] = None
+        elif defect == 'Late Product':
+            details.loc[positions, 'ProductID'] = products.max() + 1 + np.arange(len(positions))
+        elif defect == 'Invalid Quantity':
+            details.loc[positions, 'Quantity'] = 0
+        elif defect == 'Invalid Discount':
+            details.loc[positions, 'Discount'] = -0.1
+    return orders, details
+
+
+def _apply_scd_changes(rng: np.random.Generator, frames, generation: int, change_rate: float):
+    """
+    Changes the tracked attributes of a change_rate share of every dimension, so the next
+    load exercises each SCD type: SCD1 overwrites, SCD2 new versions, SCD3 previous
+    values and SCD4 snapshots.
+    """
+    changes = {
+        'Customers': ('ContactName', 'Customer Contact'),   # SCD2
+        'Suppliers': ('ContactName', 'Supplier Contact'),   # SCD3
+        'Employees': ('Title', 'Title'),                    # SCD1 with delete
+        'Shippers': ('Phone', 'Phone'),                     # SCD1 with delete
+        'Categories': ('Description', 'Description'),       # SCD1
+        'Region': ('RegionImportance', 'Importance'),       # SCD4
+        'Territories': ('TerritoryDescription', 'Territory'),  # SCD4
+    }
+    changed = {}
+    for sheet, (column, label) in changes.items():
+        df = frames[sheet]
+        mask = rng.random(len(df)) < change_rate
+        df.loc[mask, column] = _labels(f'{label} g{generation} ', np.flatnonzero(mask))
+        changed[sheet] = int(mask.sum())
+
+    products = frames['Products']
+    mask = rng.random(len(products)) < change_rate
+    products.loc[mask, 'UnitPrice'] = np.round(products.loc[mask, 'UnitPrice'] * 1.05, 2)
+    changed['Products'] = int(mask.sum())
+    return changed
+
+
+def _late_customer(generation: int) -> str:
+    """CustomerID the 'Late Customer' orders of a generation reference."""
+    return f'LATE{generation}'
+
+
+def _arrived_customer(generation: int) -> pd.DataFrame:
+    """
+    The Customers row of the late customer of a generation, as it arrives one generation
+    later. Its country differs from the 'Unknown' the inferred member was aggregated under.
+    """
+    customer_id = _late_customer(generation)
+    return pd.DataFrame({
+        'CustomerID': [customer_id],
+        'CompanyName': [f'Customer {customer_id}'],
+        'ContactName': [f'Customer Contact {customer_id}'],
+        'ContactTitle': [_TITLES[generation % len(_TITLES)]],
+        'Address': [f'Customer Street {customer_id}'],
+        'City': [f'City {customer_id}'],
+        'Region': [None],
+        'PostalCode': [f'{10000 + generation}'],
+        'Country': [_COUNTRIES[generation % len(_COUNTRIES)]],
+        'Phone': [None],
+        'Fax': [None],
+    })
+
+
+def generate_raw_data(scale: float = 1.0, generation: int = 0, seed: int = 0, dirty_rate: float = 0.01,
+                      scd_change_rate: float = 0.05, new_order_rate: float = 0.1):
+    """
+    Generates the ten raw data sheets at a multiple of the sample workbook's size.
+
+    Generation 0 holds ORDER_HISTORY_DAYS of orders. Every later generation is the source
+    as it looks one load later: a scd_change_rate share of the dimension rows changed and
+    new_order_rate times the initial orders appended over the next GENERATION_DAYS days.
+    The same arguments always produce the same data, and generation n+1 contains every
+    order of generation n, so consecutive generations can be loaded incrementally.
+
+    Args:
+        scale (float): Multiple of the sample's row counts; lookup sheets keep their size.
+        generation (int): Number of loads since the initial one.
+        seed (int): Random seed.
+        dirty_rate (float): Share of new order lines given a defect that routes them to FactError.
+        scd_change_rate (float): Share of dimension rows changed per generation.
+        new_order_rate (float): Orders added per generation, relative to generation 0.
+
+    Returns:
+        dict: {sheet_name: pd.DataFrame} in STAGING_SHEETS order, with the staging columns.
+    """
+    rng = np.random.default_rng([seed, 0])
+    frames = _dimensions(rng, scale)
+    order_count = _rows('Orders', scale)
+    orders, details = _orders(rng, frames, 10248, order_count, FIRST_ORDER_DATE, ORDER_HISTORY_DAYS, dirty_rate,
+                              _late_customer(0))
+    order_parts, detail_parts = [orders], [details]
+
+    next_date = FIRST_ORDER_DATE + timedelta(days=ORDER_HISTORY_DAYS)
+    for current in range(1, generation + 1):
+        rng = np.random.default_rng([seed, current])
+        changed = _apply_scd_changes(rng, frames, current, scd_change_rate)
+        logger.debug(f"Generation {current}: changed dimension rows {changed}")
+        frames['Customers'] = pd.concat([frames['Customers'], _arrived_customer(current - 1)], ignore_index=True)
+        new_orders = max(1, int(math.ceil(order_count * new_order_rate)))
+        next_id = int(order_parts[-1]['OrderID'].max()) + 1
+        orders, details = _orders(rng, frames, next_id, new_orders, next_date, GENERATION_DAYS, dirty_rate,
+                                  _late_customer(current))
+        order_parts.append(orders)
+        detail_parts.append(details)
+        next_date += timedelta(days=GENERATION_DAYS)
+
+    frames['Orders'] = pd.concat(order_parts, ignore_index=True)
+    frames['OrderDetails'] = pd.concat(detail_parts, ignore_index=True)
+
+    # Same columns, in the same order, as the staging tables
+    result = {}
+    for sheet, table in STAGING_SHEETS.items():
+        columns = list(get_staging_column_types(table))
+        result[sheet] = frames[sheet].reindex(columns=columns)
+    return result
+
+
+def expected_load_counts(frames) -> dict:
+    """
+    Counts the FactOrders and FactError rows update_fact.sql should produce from the
+    generated sheets, using the same joins and conditions.
+
+    Lines that carry all four natural keys become FactOrders rows, since unknown keys
+    resolve to inferred members; faulty lines (missing key, or invalid quantity, amount
+    or discount) become FactError rows, so lines that only have invalid measures are
+    counted in both.
+
+    Args:
+        frames (dict): Sheets returned by generate_raw_data.
+
+    Returns:
+        dict: {'fact_rows': int, 'fact_error_rows': int}
+    """
+    orders = frames['Orders']
+    lines = frames['OrderDetails'].merge(
+        orders[['OrderID', 'CustomerID', 'EmployeeID', 'ShipVia']], on='OrderID', how='inner'
+    )
+    resolved = lines[['CustomerID', 'EmployeeID', 'ShipVia', 'ProductID']].notnull().all(axis=1)
+    invalid = (
+        (lines['Quantity'] <= 0)
+        | (lines['UnitPrice'] * lines['Quantity'] <= 0)
+        | (lines['Discount'] < 0)
+    )
+    return {'fact_rows': int(resolved.sum()), 'fact_error_rows': int((~resolved | invalid).sum())}
+
+
+def write_raw_data(frames, raw_data_path: str):
+    """
+    Writes generated sheets as an .xlsx workbook, or as one <Sheet>.csv file per sheet
+    in a directory (the format load_raw_data_task streams).
+
+    Args:
+        frames (dict): Sheets returned by generate_raw_data.
+        raw_data_path (str): Workbook path ending in .xlsx, or a directory.
+
+    Returns:
+        str: raw_data_path.
+    """
+    if raw_data_path.lower().endswith('.xlsx'):
+        too_large = [sheet for sheet, df in frames.items() if len(df) >= EXCEL_MAX_ROWS]
+        if too_large:
+            raise ValueError(f"Sheets too large for an .xlsx workbook, write CSV files instead: {too_large}")
+        os.makedirs(os.path.dirname(raw_data_path) or '.', exist_ok=True)
+        with pd.ExcelWriter(raw_data_path) as writer:
+            for sheet, df in frames.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+    else:
+        os.makedirs(raw_data_path, exist_ok=True)
+        for sheet, df in frames.items():
+            df.to_csv(os.path.join(raw_data_path, f"{sheet}.csv"), index=False)
+    logger.info(f"Wrote {sum(len(df) for df in frames.values())} synthetic rows to: {raw_data_path}")
+    return raw_data_path
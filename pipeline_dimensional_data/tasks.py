@@ -1,227 +1,337 @@
-from pipeline_dimensional_data.config_db import get_db_connection, ensure_database_exists
-from utils import execute_sql_script_from_file, load_raw_data_to_staging
+from pipeline_dimensional_data.connection_pool import get_pool
+from pipeline_dimensional_data.backends import get_backend
+from pipeline_dimensional_data.key_lookup import stage_fact_lines
+from pipeline_dimensional_data.aggregates import queue_fact_deltas
+from pipeline_dimensional_data.sql_registry import get_script
+from utils import execute_sql_script_from_file, load_raw_data_to_staging, stream_raw_data_to_staging
+from pipeline_dimensional_data.raw_data_reader import STREAM_CHUNK_SIZE, STAGING_SHEETS
+from pipeline_dimensional_data.scheduler import run_dag
+from pipeline_dimensional_data.run_history import HISTORY_TABLES
 from loggings import logger
 import os
+import time
+from datetime import datetime
 
 # Task 1: Create Tables
-def create_tables_task():
+def create_tables_task(partition_facts: bool = False):
+    """
+    Creates the database and every missing table.
+
+    Args:
+        partition_facts (bool): Also move FactOrders and FactError onto the monthly
+            partition scheme that update_fact_partitioned.sql switches months into.
+    """
     try:
         logger.info("Creating database and tables...")
         execute_sql_script_from_file("infrastructure_initiation/dimensional_db_creation.sql")
         execute_sql_script_from_file("infrastructure_initiation/staging_raw_table_creation.sql")
         execute_sql_script_from_file("infrastructure_initiation/dimensional_db_table_creation.sql")
+        if partition_facts:
+            if get_backend().supports_partitioning:
+                execute_sql_script_from_file("infrastructure_initiation/fact_partitioning.sql")
+            else:
+                logger.warning(f"The {get_backend().name} backend cannot partition the fact tables; "
+                               f"keeping the unpartitioned layout.")
         logger.info("Tables created successfully.")
         return {'success': True}
     except Exception as e:
         logger.error(f"Table creation failed: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-# Task 2: Load Raw Data
-def load_raw_data_task(raw_data_path: str):
+# Task 1b: Truncate Staging Tables
+def truncate_staging_tables_task():
+    """
+    Empties every staging table so a run only stages the current raw data, while
+    dimension, fact and bookkeeping tables are kept.
+    """
     try:
-        if not os.path.exists(raw_data_path):
-            raise FileNotFoundError(f"Raw data file not found: {raw_data_path}")
-
-        logger.info(f"Loading raw data from: {raw_data_path}")
-        load_raw_data_to_staging(raw_data_path)
-        logger.info("Raw data loaded successfully.")
+        backend = get_backend()
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            for table_name in STAGING_SHEETS.values():
+                backend.truncate_table(cursor, table_name)
+            conn.commit()
+            cursor.close()
+        logger.info("Staging tables truncated successfully.")
         return {'success': True}
     except Exception as e:
-        logger.error(f"Failed to load raw data: {e}", exc_info=True)
+        logger.error(f"Staging table truncation failed: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-# Task 3: Ingest Data into Fact Table
-def ingest_fact_table_task(sql_file_path: str, start_date: str, end_date: str):
+# Task 1c: Defer Staging Index Maintenance
+def disable_staging_indexes_task():
+    """
+    Disables the nonclustered indexes of the staging tables so the bulk load does not
+    maintain them row by row. create_indexes_task rebuilds them after the load.
+    Backends without disabled indexes (SQLite) skip this step.
+    """
     try:
-        conn = get_db_connection()
-        with open(sql_file_path, 'r', encoding='utf-8') as sql_file:
-            sql_script = sql_file.read()
-
-        with conn.cursor() as cursor:
-            cursor.execute(sql_script.format(start_date=start_date, end_date=end_date))
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            get_backend().disable_staging_indexes(cursor)
             conn.commit()
-            logger.info(f"Data successfully ingested from: {sql_file_path}")
+            cursor.close()
+        logger.info("Staging indexes disabled for the bulk load.")
         return {'success': True}
     except Exception as e:
-        logger.error(f"Data ingestion failed: {e}", exc_info=True)
+        logger.error(f"Disabling staging indexes failed: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-# Task 4: Ingest Faulty Rows into FactError Table
-def ingest_fact_error_task(sql_file_path: str, start_date: str, end_date: str):
+# Task 2: Load Raw Data
+def load_raw_data_task(raw_data_path: str, max_workers: int = 1, use_cache: bool = True,
+                       stream: bool = False, chunk_size: int = STREAM_CHUNK_SIZE, load_workers: int = None):
     """
-    Ingests faulty rows into the FactError table.
+    Loads the raw workbook (or a directory of per-sheet CSV files) into the staging tables.
+
+    Args:
+        raw_data_path (str): Path to the Excel workbook or CSV directory.
+        max_workers (int): Number of processes used to parse the workbook sheets.
+        use_cache (bool): Whether to reuse the parsed-workbook cache.
+        stream (bool): Stream rows in bounded chunks instead of loading whole sheets.
+            CSV directories are always streamed.
+        chunk_size (int): Maximum number of rows held in memory per sheet when streaming.
+        load_workers (int): Maximum number of staging tables, or slices of a large one,
+            loaded at once, each on its own connection. Defaults to the pool size.
     """
     try:
-        conn = get_db_connection()
-        with open(sql_file_path, 'r', encoding='utf-8') as sql_file:
-            sql_script = sql_file.read()
+        if not os.path.exists(raw_data_path):
+            raise FileNotFoundError(f"Raw data file not found: {raw_data_path}")
 
-        # Use parameterized queries to prevent injection and handle date ranges
-        with conn.cursor() as cursor:
-            cursor.execute(sql_script.format(start_date=start_date, end_date=end_date))
-            conn.commit()
-            logger.info(f"Faulty rows ingested from: {sql_file_path}")
-        return {'success': True}
+        logger.info(f"Loading raw data from: {raw_data_path}")
+        if stream or os.path.isdir(raw_data_path):
+            tables = stream_raw_data_to_staging(raw_data_path, chunk_size=chunk_size, load_workers=load_workers)
+        else:
+            tables = load_raw_data_to_staging(raw_data_path, max_workers=max_workers, use_cache=use_cache,
+                                              load_workers=load_workers)
+        logger.info("Raw data loaded successfully.")
+        return {'success': True, 'tables': tables}
     except Exception as e:
-        logger.error(f"FactError ingestion failed: {e}", exc_info=True)
+        logger.error(f"Failed to load raw data: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-# Task 5: Populate Dim_SOR Table
-def populate_dim_sor_task(sql_file_path: str):
-    try:
-        conn = get_db_connection()
-        with open(sql_file_path, 'r', encoding='utf-8') as sql_file:
-            sql_script = sql_file.read()
+# Task 2b: Create Indexes
+def create_indexes_task(include_columnstore: bool = False):
+    """
+    Rebuilds the staging indexes disabled before the bulk load and creates any missing
+    index of the index pack. Runs after the staging load so loads stay fast.
 
-        with conn.cursor() as cursor:
-            cursor.execute(sql_script)
+    Args:
+        include_columnstore (bool): Also create the nonclustered columnstore index on FactOrders.
+    """
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            get_backend().rebuild_staging_indexes(cursor)
             conn.commit()
-            logger.info(f"Dim_SOR table populated from: {sql_file_path}")
+            cursor.close()
+
+        execute_sql_script_from_file("infrastructure_initiation/index_creation.sql")
+        if include_columnstore:
+            execute_sql_script_from_file("infrastructure_initiation/columnstore_index_creation.sql")
+        logger.info("Indexes created successfully.")
         return {'success': True}
     except Exception as e:
-        logger.error(f"Dim_SOR population failed: {e}", exc_info=True)
+        logger.error(f"Index creation failed: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-# Task 6: Update Dimensional Tables
-def update_dimensional_tables_task(query_directory: str):
+# Fact load window resolution
+def resolve_fact_window(start_date: str = None, end_date: str = None):
     """
-    Executes all SQL scripts in the specified directory to update dimensional tables.
+    Resolves the date window of an incremental fact load.
+
+    A missing start date resumes from the FactOrders high-water mark, or from the
+    earliest staged order on the first run. A missing end date extends to the latest
+    staged order.
 
     Args:
-        query_directory (str): Path to the directory containing SQL query files for dimensional tables.
+        start_date (str): Requested start date (YYYY-MM-DD) or None.
+        end_date (str): Requested end date (YYYY-MM-DD) or None.
 
     Returns:
-        dict: Task execution status for each file.
+        tuple: (start_date, end_date) as dates, either of which is None when staging is empty.
     """
-    tasks_status = {}
-    try:
-        sql_files = [
-            os.path.join(query_directory, file)
-            for file in os.listdir(query_directory)
-            if file.startswith("update_dim_") and file.endswith(".sql")
-        ]
-
-        if not sql_files:
-            logger.warning(f"No SQL scripts found in directory: {query_directory}")
-            return {"success": False, "error": "No SQL scripts found"}
-
-        conn = get_db_connection()
+    with get_pool().connection() as conn:
         cursor = conn.cursor()
+        window_start, window_end = get_backend().fact_window(cursor, start_date, end_date)
+        cursor.close()
+    logger.info(f"Fact load window resolved to {window_start} - {window_end}.")
+    return window_start, window_end
 
-        for sql_file in sql_files:
-            try:
-                with open(sql_file, "r", encoding="utf-8") as file:
-                    sql_script = file.read()
+# Task 3a: Add Fact Partitions
+def add_fact_partitions_task(sql_file_path: str, start_date, end_date):
+    """
+    Adds the month partitions a partitioned fact load of the date window writes to, in
+    autocommit ahead of ingest_fact_table_task, so the schema-modification lock of each
+    partition split is held for the split only rather than until the fact load commits.
+    """
+    try:
+        if not start_date or not end_date:
+            return {'success': True, 'skipped': True}
+
+        script = get_script(sql_file_path)
+        with get_pool().connection(autocommit=True) as conn:
+            with conn.cursor() as cursor:
+                script.run(cursor, {'StartDate': start_date, 'EndDate': end_date})
+        logger.info(f"Fact partitions added for {start_date} - {end_date}.")
+        return {'success': True}
+    except Exception as e:
+        logger.error(f"Adding fact partitions failed: {e}", exc_info=True)
+        return {'success': False, 'error': str(e)}
 
-                logger.info(f"Executing script: {sql_file}")
-                cursor.execute(sql_script)
+# Task 3: Ingest Data into Fact Table and FactError Table
+def ingest_fact_table_task(sql_file_path: str, start_date, end_date):
+    """
+    Resolves the dimension keys of the order lines of the date window in memory and
+    stages them in Staging_FactLines, inserting inferred members for unknown natural
+    keys, then merges new and changed lines into FactOrders, routes faulty lines to
+    FactError and advances the FactOrders high-water mark, all in one transaction.
+    The FactOrders changes are queued for update_aggregates_task on the way.
+    """
+    try:
+        if not start_date or not end_date:
+            logger.warning("No valid date range provided. Skipping FactOrders and FactError update.")
+            return {'success': True, 'skipped': True}
+
+        script = get_script(sql_file_path)
+        params = script.bind({'StartDate': start_date, 'EndDate': end_date})
+
+        with get_pool().connection() as conn:
+            with conn.cursor() as cursor:
+                staged = stage_fact_lines(cursor, params['StartDate'], params['EndDate'])
+                queue_fact_deltas(cursor)
+                rows = script.run(cursor, params)
                 conn.commit()
-                tasks_status[os.path.basename(sql_file)] = {"success": True}
-                logger.info(f"Successfully executed: {sql_file}")
-
-            except Exception as e:
-                logger.error(f"Failed to execute script {sql_file}: {e}", exc_info=True)
-                tasks_status[os.path.basename(sql_file)] = {"success": False, "error": str(e)}
+                logger.info(f"Data successfully ingested from: {sql_file_path} for {start_date} - {end_date}: {rows}")
+        return {'success': True, 'rows': rows, 'inferred_members': staged['inferred_members']}
+    except Exception as e:
+        logger.error(f"Data ingestion failed: {e}", exc_info=True)
+        return {'success': False, 'error': str(e)}
 
-        conn.close()
-        return tasks_status
+# Task 3b: Update Aggregate Tables
+def update_aggregates_task(sql_file_path: str):
+    """
+    Applies the FactOrders changes queued by ingest_fact_table_task to the aggregate
+    tables, or builds them from FactOrders while they are empty.
+    """
+    try:
+        script = get_script(sql_file_path)
 
+        with get_pool().connection() as conn:
+            with conn.cursor() as cursor:
+                rows = script.run(cursor)
+                conn.commit()
+                logger.info(f"Aggregate tables updated from: {sql_file_path}: {rows}")
+        return {'success': True, 'rows': rows}
     except Exception as e:
-        logger.error(f"Error during dimensional tables update: {e}", exc_info=True)
-        return {"success": False, "error": str(e)}
+        logger.error(f"Aggregate table update failed: {e}", exc_info=True)
+        return {'success': False, 'error': str(e)}
 
-# Main Pipeline Execution
-def run_pipeline(start_date: str, end_date: str):
+# Task 4: Populate Dim_SOR Table
+def populate_dim_sor_task(sql_file_path: str):
     try:
-        # Ensure the database exists
-        ensure_database_exists()
+        script = get_script(sql_file_path)
+
+        with get_pool().connection() as conn:
+            with conn.cursor() as cursor:
+                rows = script.run(cursor)
+                conn.commit()
+                logger.info(f"Dim_SOR table populated from: {sql_file_path}")
+        return {'success': True, 'rows': rows}
     except Exception as e:
-        logger.error(f"Pipeline terminated: Database creation/check failed. {e}")
+        logger.error(f"Dim_SOR population failed: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
 
-    # Define SQL script file paths
-    create_tables_directory = "infrastructure_initiation"
-    raw_data_file = "raw_data_source.xlsx"
-    queries_directory = "pipeline_dimensional_data/queries"
-    update_fact_file = os.path.join(queries_directory, "update_fact.sql")
-    update_fact_error_file = os.path.join(queries_directory, "update_fact_error.sql")
-    update_dim_sor_file = os.path.join(queries_directory, "update_dim_sor.sql")
+# Dimension scripts that must finish before another one starts
+DIM_SCRIPT_DEPENDENCIES = {
+    "update_dim_territories.sql": ["update_dim_region.sql"],
+    "update_dim_products.sql": ["update_dim_categories.sql", "update_dim_suppliers.sql"],
+}
 
-    tasks_status = {}
 
-    logger.info("Starting ETL pipeline...")
+def _run_dim_script(sql_file: str):
+    """
+    Executes one dimension script on its own pooled connection and times it.
+    """
+    started = time.perf_counter()
+    started_at = datetime.now()
+    try:
+        script = get_script(sql_file)
+
+        logger.info(f"Executing script: {sql_file}")
+        with get_pool().connection() as conn:
+            with conn.cursor() as cursor:
+                rows = script.run(cursor)
+                conn.commit()
+        duration = round(time.perf_counter() - started, 3)
+        logger.info(f"Successfully executed: {sql_file} in {duration}s: {rows}")
+        return {"success": True, "duration_seconds": duration, "started_at": started_at,
+                "ended_at": datetime.now(), "rows": rows}
 
-    # Task 1: Create Tables
-    tasks_status['create_tables'] = create_tables_task()
-    if not tasks_status['create_tables']['success']:
-        logger.error("Pipeline terminated: Table creation failed.")
-        return tasks_status
+    except Exception as e:
+        duration = round(time.perf_counter() - started, 3)
+        logger.error(f"Failed to execute script {sql_file}: {e}", exc_info=True)
+        return {"success": False, "error": str(e), "duration_seconds": duration,
+                "started_at": started_at, "ended_at": datetime.now()}
 
-    # Task 2: Load Raw Data
-    tasks_status['load_raw_data'] = load_raw_data_task(raw_data_file)
-    if not tasks_status['load_raw_data']['success']:
-        logger.error("Pipeline terminated: Raw data loading failed.")
-        return tasks_status
 
-    # Task 3: Ingest Fact Table
-    tasks_status['ingest_fact'] = ingest_fact_table_task(update_fact_file, start_date, end_date)
-    if not tasks_status['ingest_fact']['success']:
-        logger.error("Pipeline terminated: Fact table ingestion failed.")
-        return tasks_status
+# Task 5: Update Dimensional Tables
+def update_dimensional_tables_task(query_directory: str, max_workers: int = None):
+    """
+    Executes all update_dim_*.sql scripts in the specified directory. Independent
+    scripts run concurrently on separate pooled connections, while the scripts
+    listed in DIM_SCRIPT_DEPENDENCIES wait for the scripts they depend on.
 
-    # Task 4: Ingest FactError Table
-    # Add FactError ingestion task
-    tasks_status['ingest_fact_error'] = ingest_fact_error_task(update_fact_error_file, start_date, end_date)
-    if not tasks_status['ingest_fact_error']['success']:
-        logger.error("Pipeline terminated: FactError ingestion failed.")
-        return tasks_status
+    Args:
+        query_directory (str): Path to the directory containing SQL query files for dimensional tables.
+        max_workers (int): Maximum number of scripts running at once. Defaults to the pool size.
 
+    Returns:
+        dict: Task execution status and wall time for each file, plus the overall
+            'success' flag and 'duration_seconds'.
+    """
+    try:
+        sql_files = sorted(
+            file for file in os.listdir(query_directory)
+            if file.startswith("update_dim_") and file.endswith(".sql")
+        )
 
-    # Task 5: Populate Dim_SOR Table
-    tasks_status['populate_dim_sor'] = populate_dim_sor_task(update_dim_sor_file)
-    if not tasks_status['populate_dim_sor']['success']:
-        logger.error("Pipeline terminated: Dim_SOR population failed.")
-        return tasks_status
+        if not sql_files:
+            logger.warning(f"No SQL scripts found in directory: {query_directory}")
+            return {"success": False, "error": "No SQL scripts found"}
 
-    # Task 6: Update Dimensional Tables
-    tasks_status['update_dimensional_tables'] = update_dimensional_tables_task(queries_directory)
-    if not tasks_status['update_dimensional_tables']['success']:
-        logger.error("Pipeline terminated: Dimensional tables update failed.")
+        started = time.perf_counter()
+        tasks_status = run_dag(
+            sql_files,
+            DIM_SCRIPT_DEPENDENCIES,
+            lambda file: _run_dim_script(os.path.join(query_directory, file)),
+            max_workers=max_workers or get_pool().max_size,
+        )
+        duration = round(time.perf_counter() - started, 3)
+        total = round(sum(status.get("duration_seconds", 0) for status in tasks_status.values()), 3)
+        logger.info(f"Dimension scripts finished in {duration}s wall time ({total}s of script time).")
+
+        failed = [file for file, status in tasks_status.items() if not status["success"]]
+        tasks_status["success"] = not failed
+        if failed:
+            tasks_status["error"] = f"Dimension scripts failed: {', '.join(failed)}"
+        tasks_status["duration_seconds"] = duration
         return tasks_status
 
-    logger.info("Pipeline completed successfully!")
-    return tasks_status
+    except Exception as e:
+        logger.error(f"Error during dimensional tables update: {e}", exc_info=True)
+        return {"success": False, "error": str(e)}
 
 
 def reset_db():
     """
-    Drops all tables and constraints from the database.
+    Drops all tables and constraints from the database, except the run-history tables.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Drop all constraints
-        cursor.execute("""
-            DECLARE @sql NVARCHAR(MAX) = N'';
-            SELECT @sql += N'ALTER TABLE ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) +
-                          ' DROP CONSTRAINT ' + QUOTENAME(fk.name) + ';'
-            FROM sys.foreign_keys fk
-            INNER JOIN sys.tables t ON fk.parent_object_id = t.object_id
-            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id;
-            EXEC sp_executesql @sql;
-        """)
-
-        # Drop all tables
-        cursor.execute("""
-            DECLARE @sql NVARCHAR(MAX) = N'';
-            SELECT @sql += N'DROP TABLE ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) + ';'
-            FROM sys.tables t
-            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id;
-            EXEC sp_executesql @sql;
-        """)
-
-        conn.commit()
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            get_backend().reset(cursor, HISTORY_TABLES)
+            conn.commit()
+            cursor.close()
         logger.info("Database reset successfully.")
     except Exception as e:
         logger.error(f"Failed to reset the database: {e}", exc_info=True)
@@ -0,0 +1,114 @@
+import sqlite3
+import pandas as pd
+import pytest
+from pipeline_dimensional_data.key_lookup import DimensionKeyMap, check_unique_lines, error_reasons
+
+
+@pytest.fixture
+def cursor():
+    connection = sqlite3.connect(':memory:')
+    cursor = connection.cursor()
+    cursor.executescript("""
+        CREATE TABLE DimCustomers (
+            CustomerKey INTEGER PRIMARY KEY AUTOINCREMENT,
+            CustomerID TEXT,
+            ExpirationDate TEXT,
+            IsInferred INTEGER DEFAULT 0
+        );
+        INSERT INTO DimCustomers (CustomerID, ExpirationDate) VALUES ('ALFKI', '2024-01-01');
+        INSERT INTO DimCustomers (CustomerID, ExpirationDate) VALUES ('ALFKI', NULL);
+        INSERT INTO DimCustomers (CustomerID, ExpirationDate) VALUES ('BONAP', NULL);
+        INSERT INTO DimCustomers (CustomerID, ExpirationDate) VALUES ('OLDCO', '2023-06-30');
+
+        CREATE TABLE DimProducts (
+            ProductKey INTEGER PRIMARY KEY AUTOINCREMENT,
+            ProductID INTEGER,
+            IsInferred INTEGER DEFAULT 0
+        );
+        INSERT INTO DimProducts (ProductID) VALUES (11);
+        INSERT INTO DimProducts (ProductID) VALUES (42);
+    """)
+    yield cursor
+    connection.close()
+
+
+def _customers():
+    return DimensionKeyMap('CustomerID', 'CustomerKey', 'DimCustomers', 'CustomerID', 'CustomerKey',
+                           text=True, active_filter='ExpirationDate IS NULL')
+
+
+def _products():
+    return DimensionKeyMap('ProductID', 'ProductKey', 'DimProducts', 'ProductID', 'ProductKey')
+
+
+def test_text_keys_match_trimmed_and_case_insensitively(cursor):
+    keys = _customers().load(cursor).lookup(pd.Series([' alfki ', 'Bonap', 'ALFKI']))
+
+    assert keys.tolist() == [2, 3, 2]
+
+
+def test_scd2_keys_resolve_to_the_active_version_only(cursor):
+    keys = _customers().load(cursor).lookup(pd.Series(['ALFKI', 'OLDCO']))
+
+    assert keys[0] == 2
+    assert keys.isna().tolist() == [False, True]
+
+
+def test_numeric_keys_accept_text_and_float_values(cursor):
+    keys = _products().load(cursor).lookup(pd.Series(['42', 11.0, None, 'n/a', 7]))
+
+    assert keys.iloc[:2].tolist() == [2, 1]
+    assert keys.iloc[2:].isna().all()
+
+
+def test_inferred_members_are_added_once_per_normalized_key(cursor):
+    key_map = _customers().load(cursor)
+
+    added = key_map.add_inferred_members(cursor, pd.Series(['NEWCO', ' newco', 'ALFKI', None]))
+
+    assert added == 1
+    cursor.execute("SELECT CustomerID, IsInferred FROM DimCustomers WHERE CustomerKey = 5;")
+    assert cursor.fetchall() == [('NEWCO', 1)]
+    assert key_map.lookup(pd.Series(['newco', None])).tolist()[0] == 5
+    assert key_map.add_inferred_members(cursor, pd.Series(['NEWCO'])) == 0
+
+
+def test_inferred_members_carry_the_extra_values(cursor):
+    key_map = DimensionKeyMap('CustomerID', 'CustomerKey', 'DimCustomers', 'CustomerID', 'CustomerKey',
+                              text=True, active_filter='ExpirationDate IS NULL',
+                              inferred_values=lambda: {'ExpirationDate': None}).load(cursor)
+
+    key_map.add_inferred_members(cursor, pd.Series(['LATE']))
+
+    assert key_map.lookup(pd.Series(['late'])).tolist() == [5]
+
+
+def _lines(**columns):
+    base = {
+        'OrderID': [1, 1], 'CustomerKey': [1, 1], 'EmployeeKey': [1, 1], 'ShipperKey': [1, 1],
+        'ProductKey': [1, 2], 'Quantity': [1, 1], 'TotalAmount': [10.0, 10.0], 'Discount': [0.0, 0.0],
+    }
+    base.update(columns)
+    return pd.DataFrame({name: pd.array(values, dtype='Int64') if name.endswith('Key') else values
+                         for name, values in base.items()})
+
+
+def test_error_reasons_report_the_first_defect_of_a_line():
+    lines = _lines(OrderID=[1, 2, 3, 4], CustomerKey=[1, None, 1, 1], EmployeeKey=[1, None, 1, 1],
+                   ShipperKey=[1, 1, 1, 1], ProductKey=[1, 2, 3, 4], Quantity=[1, 1, 0, 1],
+                   TotalAmount=[10.0, 10.0, 10.0, 10.0], Discount=[0.0, 0.0, 0.0, -0.1])
+
+    assert error_reasons(lines).tolist() == [None, 'Missing Customer', 'Invalid Quantity', 'Invalid Discount']
+
+
+def test_unique_lines_pass():
+    check_unique_lines(_lines())
+
+
+def test_a_line_staged_twice_fails_the_load():
+    with pytest.raises(ValueError, match=r"1 order lines .* e\.g\. \[\(1, 2\)\]"):
+        check_unique_lines(_lines(ProductKey=[2, 2]))
+
+
+def test_duplicates_of_unresolved_lines_are_left_to_fact_error():
+    check_unique_lines(_lines(ProductKey=[None, None]))
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from pipeline_dimensional_data.metrics import start_run_metrics
+from pipeline_dimensional_data.scheduler import run_dag
+
+
+def _succeed(node):
+    return {'success': True}
+
+
+def test_runs_every_node_after_its_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def run_node(node):
+        with lock:
+            order.append(node)
+        return {'success': True}
+
+    dependencies = {'b': ['a'], 'c': ['a'], 'd': ['b', 'c']}
+    results = run_dag(['d', 'c', 'b', 'a'], dependencies, run_node, max_workers=3)
+
+    assert list(results) == ['d', 'c', 'b', 'a']
+    assert all(status['success'] for status in results.values())
+    assert order[0] == 'a' and order[-1] == 'd'
+
+
+def test_rejects_a_dependency_cycle():
+    with pytest.raises(ValueError, match="cycle"):
+        run_dag(['a', 'b', 'c'], {'a': ['c'], 'b': ['a'], 'c': ['b']}, _succeed)
+
+
+def test_rejects_a_node_depending_on_itself():
+    with pytest.raises(ValueError, match="cycle"):
+        run_dag(['a'], {'a': ['a']}, _succeed)
+
+
+def test_ignores_dependencies_outside_the_nodes():
+    results = run_dag(['b'], {'b': ['a']}, _succeed)
+
+    assert results == {'b': {'success': True}}
+
+
+def test_skips_the_dependents_of_a_failed_node():
+    ran = []
+
+    def run_node(node):
+        ran.append(node)
+        return {'success': node != 'a', 'error': 'boom' if node == 'a' else None}
+
+    results = run_dag(['a', 'b', 'c', 'd'], {'b': ['a'], 'c': ['b'], 'd': []}, run_node, max_workers=1)
+
+    assert sorted(ran) == ['a', 'd']
+    assert results['b'] == {'success': False, 'error': "Skipped: dependency a failed"}
+    assert results['c'] == {'success': False, 'error': "Skipped: dependency b failed"}
+    assert results['d']['success']
+
+
+def test_turns_a_raised_exception_into_a_failed_status():
+    def run_node(node):
+        if node == 'a':
+            raise RuntimeError("connection lost")
+        return {'success': True}
+
+    results = run_dag(['a', 'b'], {'b': ['a']}, run_node)
+
+    assert results['a'] == {'success': False, 'error': "connection lost"}
+    assert not results['b']['success']
+
+
+def test_attributes_worker_metrics_to_the_calling_task():
+    metrics = start_run_metrics('test-run')
+
+    def run_node(node):
+        metrics.record('statement', node)
+        return {'success': True}
+
+    with metrics.task('update_dim_tables'):
+        run_dag(['a', 'b'], {}, run_node, max_workers=2)
+
+    statements = [event for event in metrics.events if event['kind'] == 'statement']
+    assert {event['task'] for event in statements} == {'update_dim_tables'}
+    assert metrics.current_task is None
@@ -0,0 +1,127 @@
+from datetime import date
+from types import SimpleNamespace
+from decimal import Decimal
+import pytest
+from pipeline_dimensional_data.backends import (
+    SQLiteBackend,
+    SqlServerBackend,
+    split_tsql_batches,
+    split_tsql_statements,
+)
+from pipeline_dimensional_data.sql_registry import ScriptParameter, SqlRegistry, SqlScript
+
+
+def test_splits_batches_on_go_lines():
+    script = "CREATE TABLE a (id INT);\nGO\n  go  \nCREATE TABLE b (id INT);\nGO\n"
+
+    assert split_tsql_batches(script) == ["CREATE TABLE a (id INT);", "CREATE TABLE b (id INT);"]
+
+
+def test_script_without_go_is_one_batch():
+    script = "SELECT 1;\nSELECT 2;\n"
+
+    assert split_tsql_batches(script) == ["SELECT 1;\nSELECT 2;"]
+
+
+def test_go_inside_a_string_does_not_end_the_batch():
+    script = "INSERT INTO notes VALUES (N'first line\nGO\nlast line');\nGO\nSELECT 1;"
+
+    assert split_tsql_batches(script) == [
+        "INSERT INTO notes VALUES (N'first line\nGO\nlast line');",
+        "SELECT 1;",
+    ]
+
+
+def test_go_inside_a_block_comment_does_not_end_the_batch():
+    script = "/* setup\nGO\n*/\nSELECT 1;\nGO\nSELECT 2;"
+
+    assert split_tsql_batches(script) == ["/* setup\nGO\n*/\nSELECT 1;", "SELECT 2;"]
+
+
+def test_go_within_a_line_does_not_end_the_batch():
+    script = "SELECT 1 AS GO;\n-- GO\nSELECT 2;"
+
+    assert split_tsql_batches(script) == [script]
+
+
+def test_comment_only_batches_are_dropped():
+    script = "-- header\nGO\n/* nothing */\nGO\nSELECT 1;"
+
+    assert split_tsql_batches(script) == ["SELECT 1;"]
+
+
+def test_splits_statements_outside_strings_identifiers_and_comments():
+    batch = ("INSERT INTO t VALUES ('a;b', 'it''s;');\n"
+             "-- no; split\n"
+             "SELECT [odd;name] FROM t /* ; */;\n")
+
+    assert split_tsql_statements(batch) == [
+        "INSERT INTO t VALUES ('a;b', 'it''s;');",
+        "-- no; split\nSELECT [odd;name] FROM t /* ; */;",
+    ]
+
+
+def _script(*parameters):
+    return SqlScript(path='load.sql', text='', batches=(),
+                     parameters=tuple(ScriptParameter(name, sql_type) for name, sql_type in parameters))
+
+
+def test_bind_converts_to_the_declared_types_in_declaration_order():
+    script = _script(('StartDate', 'DATE'), ('Limit', 'INT'), ('Rate', 'DECIMAL'))
+
+    bound = script.bind({'Rate': 0.1, 'Limit': '5', 'StartDate': '2024-01-31'})
+
+    assert list(bound) == ['StartDate', 'Limit', 'Rate']
+    assert bound == {'StartDate': date(2024, 1, 31), 'Limit': 5, 'Rate': Decimal('0.1')}
+
+
+def test_bind_rejects_missing_and_unknown_parameters():
+    script = _script(('StartDate', 'DATE'), ('EndDate', 'DATE'))
+
+    with pytest.raises(ValueError, match=r"missing parameters \['EndDate'\], unknown parameters \['End'\]"):
+        script.bind({'StartDate': '2024-01-01', 'End': '2024-01-31'})
+
+
+def test_bind_rejects_a_value_of_the_wrong_type():
+    with pytest.raises(ValueError, match="Limit expects INT"):
+        _script(('Limit', 'INT')).bind({'Limit': 'many'})
+
+
+def test_registry_reads_declarations_from_the_tsql_script(tmp_path):
+    (tmp_path / 'load.sql').write_text(
+        "DECLARE @StartDate DATE = ?;\nDECLARE @Label NVARCHAR(50) = ?;\nSELECT @StartDate, @Label;\nGO\nSELECT 1;\n",
+        encoding='utf-8',
+    )
+
+    script = SqlRegistry(SqlServerBackend(None), directories=[str(tmp_path)]).get(str(tmp_path / 'load.sql'))
+
+    assert script.parameters == (ScriptParameter('StartDate', 'DATE'), ScriptParameter('Label', 'NVARCHAR'))
+    assert len(script.batches) == 2
+
+
+def test_batch_params_follow_the_declarations_of_the_batch():
+    backend = SqlServerBackend(None)
+    batch = "DECLARE @EndDate DATE = ?;\nDECLARE @StartDate DATE = ?;\nSELECT '?' -- ?\n/* ? */;"
+
+    params = backend.batch_params(batch, {'StartDate': date(2024, 1, 1), 'EndDate': date(2024, 1, 31)})
+
+    assert params == (date(2024, 1, 31), date(2024, 1, 1))
+
+
+def test_batch_without_markers_takes_no_parameters():
+    assert SqlServerBackend(None).batch_params("SELECT '?';", {'StartDate': date(2024, 1, 1)}) is None
+
+
+def test_batch_params_reject_markers_that_are_not_declarations():
+    batch = "DECLARE @StartDate DATE = ?;\nSELECT * FROM t WHERE id = ?;"
+
+    with pytest.raises(ValueError, match="2 parameter markers"):
+        SqlServerBackend(None).batch_params(batch, {'StartDate': date(2024, 1, 1)})
+
+
+def test_sqlite_batch_params_bind_only_the_names_the_statement_uses():
+    backend = SQLiteBackend(SimpleNamespace(sqlite_path=':memory:'))
+    params = {'StartDate': '2024-01-01', 'EndDate': '2024-01-31'}
+
+    assert backend.batch_params("SELECT * FROM t WHERE d >= :StartDate;", params) == {'StartDate': '2024-01-01'}
+    assert backend.batch_params("SELECT 1;", params) is None
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from utils import _clean_column, _row_hashes
+
+
+def test_int_columns_are_truncated_and_invalid_values_become_none():
+    assert _clean_column(pd.Series([1.9, '7', 'x', None]), 'int') == [1, 7, None, None]
+
+
+def test_decimal_columns_are_rounded_to_cents():
+    assert _clean_column(pd.Series(['18.005', 4.5, np.nan]), 'decimal') == [18.0, 4.5, None]
+
+
+def test_bit_columns_accept_text_and_numbers():
+    cleaned = _clean_column(pd.Series(['True', ' false ', 1, 0, None]), 'bit')
+
+    assert cleaned == [True, False, True, False, None]
+
+
+def test_str_columns_are_stripped_and_keep_missing_values():
+    assert _clean_column(pd.Series(['  ALFKI ', 42, None]), 'str') == ['ALFKI', '42', None]
+
+
+def test_date_columns_drop_the_time_of_day():
+    cleaned = _clean_column(pd.Series(['2024-01-31 13:45:00', datetime(2024, 2, 1, 8), 'soon']), 'date')
+
+    assert cleaned == [date(2024, 1, 31), date(2024, 2, 1), None]
+
+
+def test_unknown_kinds_clean_to_none():
+    assert _clean_column(pd.Series(['a', 'b']), 'geography') == [None, None]
+
+
+def test_workbook_and_csv_values_hash_alike():
+    from_workbook = _row_hashes([[18.0], ['Chai'], [True]])
+    from_csv = _row_hashes([[18], ['Chai'], [1]])
+
+    assert from_workbook == from_csv
+    assert len(from_workbook[0]) == 16
+
+
+def test_row_hash_changes_with_any_tracked_attribute():
+    hashes = _row_hashes([[18.0, 18.0, 18.0, 19.0], ['Chai', 'Chang', 'Chai', 'Chai']])
+
+    assert hashes[0] == hashes[2]
+    assert len({hashes[0], hashes[1], hashes[3]}) == 3
+
+
+def test_missing_values_hash_apart_from_empty_text_and_neighbours():
+    missing, empty = _row_hashes([[None, ''], ['x', 'x']])
+    shifted = _row_hashes([['ab', 'a'], ['', 'b']])
+
+    assert missing != empty
+    assert shifted[0] != shifted[1]
@@ -1,11 +1,26 @@
-import os
+import hashlib
+import time
 import pyodbc
 import uuid
 import pandas as pd
-from loggings import logger
-from pipeline_dimensional_data.config_db import get_db_config, ensure_database_exists
+from loggings import logger, ROW_ERROR_SAMPLES
+from pipeline_dimensional_data.connection_pool import get_pool
+from pipeline_dimensional_data.metrics import get_metrics
+from pipeline_dimensional_data.scheduler import run_dag
+from pipeline_dimensional_data.sql_registry import get_script
+from pipeline_dimensional_data.backends import get_backend, split_tsql_statements
+from pipeline_dimensional_data.raw_data_reader import (
+    read_workbook,
+    iter_sheet_chunks,
+    STAGING_SHEETS,
+    STREAM_CHUNK_SIZE,
+)
+from infrastructure_initiation.staging_schema import (
+    get_staging_column_types,
+    get_row_hash_attributes,
+    ROW_HASH_COLUMN,
+)
 import numpy as np
-from decimal import Decimal
 
 # Generate unique UUID for task execution tracking
 def generate_uuid() -> str:
@@ -16,68 +31,43 @@ def generate_uuid() -> str:
     """
     return str(uuid.uuid4())
 
-# Database connection handler
-def get_db_connection():
-    """Establishes a database connection using config."""
-    ensure_database_exists()
-    db_config = get_db_config()
-    connection_string = (
-        f"Driver={db_config['driver']};"
-        f"Server={db_config['server']};"
-        f"Database={db_config['database']};"
-        f"UID={db_config['user']};"
-        f"PWD={db_config['password']};"
-        f"TrustServerCertificate=yes;"
-    )
-    return pyodbc.connect(connection_string)
-
 # SQL execution utility
-def execute_sql_script_from_file(file_path: str, config_file='sql_server_config.cfg'):
+def execute_sql_script_from_file(file_path: str):
     """
-    Reads an SQL script from a file and executes it using a database connection.
+    Executes an SQL script from the script registry, in the dialect of the configured
+    backend, on a pooled autocommit connection.
+
+    Each batch goes over in one round-trip. When a batch fails, its statements are run
+    one by one so every failing statement is logged and the others still apply.
 
     Args:
         file_path (str): Path to the .sql file.
-        config_file (str): Path to the configuration file.
 
     Returns:
         None: Executes the SQL script without returning a result.
     """
-    ensure_database_exists()
-
-    db_config = get_db_config(config_file)
-
-    connection_string = (
-        f"Driver={db_config['driver']};"
-        f"Server={db_config['server']};"
-        f"Database={db_config['database']};"
-        f"UID={db_config['user']};"
-        f"PWD={db_config['password']};"
-        f"TrustServerCertificate=yes;"
-    )
-
     try:
-        logger.info("Connecting to the database...")
-        with pyodbc.connect(connection_string, autocommit=True) as conn:
-            logger.info("Connection established successfully.")
-
-            with open(file_path, 'r', encoding='utf-8') as sql_file:
-                sql_script = sql_file.read()
-                logger.info(f"Loaded SQL script from: {file_path}")
-
-            sql_statements = sql_script.split(';')
-            logger.info(f"SQL script contains {len(sql_statements)} statements.")
-
-            with conn.cursor() as cursor:
-                for i, statement in enumerate(sql_statements):
-                    statement = statement.strip()
-                    if statement:
-                        logger.debug(f"Executing statement {i + 1}: {statement[:50]}...")
-                        try:
-                            cursor.execute(statement)
-                            logger.info(f"Statement {i + 1} executed successfully.")
-                        except pyodbc.Error as e:
-                            logger.error(f"Error executing statement {i + 1}: {str(e)}", exc_info=True)
+        backend = get_backend()
+        with get_metrics().timer('sql_file', file_path), get_pool().connection(autocommit=True) as conn:
+            script = get_script(file_path)
+            logger.debug(f"SQL script {file_path} holds {len(script.batches)} batches.")
+
+            cursor = conn.cursor()
+            for i, batch in enumerate(script.batches):
+                logger.debug(f"Executing batch {i + 1}: {batch[:50]}...")
+                try:
+                    backend.run_batches(cursor, [batch], name=f"{file_path}#{i + 1}")
+                except backend.Error as e:
+                    if backend.already_applied(e):
+                        logger.debug(f"Batch {i + 1} already applied: {str(e)}")
+                        continue
+                    statements = split_tsql_statements(batch)
+                    if len(statements) == 1:
+                        logger.error(f"Error executing batch {i + 1}: {str(e)}", exc_info=True)
+                        continue
+                    logger.warning(f"Batch {i + 1} of {file_path} failed ({e}); running its statements one by one.")
+                    _execute_statements(backend, cursor, statements, f"{file_path}#{i + 1}")
+            cursor.close()
 
             logger.info(f"All statements executed successfully from: {file_path}")
 
@@ -89,269 +79,381 @@ def execute_sql_script_from_file(file_path: str, config_file='sql_server_config.
         logger.error(f"An unexpected error occurred: {str(e)}", exc_info=True)
 
 
-def execute_sql_inserts(df, table_name, conn):
-    cursor = conn.cursor()
-    for index, row in df.iterrows():
-        try:
-            cleaned_row = []
-            for col, x, dtype in zip(df.columns, row, df.dtypes):
-                if table_name == "Staging_Customers" and col == "CustomerID":
-                    cleaned_row.append(str(x).strip() if pd.notnull(x) else None)
-                elif table_name == "Staging_Employees" and col in ["EmployeeID", "ReportsTo"]:
-                    cleaned_row.append(int(x) if pd.notnull(x) else None)
-                elif table_name == "Staging_Employees" and col in ["BirthDate", "HireDate"]:
-                    cleaned_row.append(pd.to_datetime(x, errors='coerce') if pd.notnull(x) else None)
-                elif table_name == "Staging_OrderDetails" and col in ["OrderID", "ProductID", "Quantity"]:
-                    cleaned_row.append(int(x) if pd.notnull(x) else None)
-                elif table_name == "Staging_Orders" and col in ["OrderDate", "ShippedDate", "RequiredDate"]:
-                    cleaned_row.append(pd.to_datetime(x, errors='coerce') if pd.notnull(x) else None)
-                elif dtype.kind == 'i':
-                    cleaned_row.append(int(x) if pd.notnull(x) else None)
-                elif dtype.kind == 'f':
-                    cleaned_row.append(Decimal(str(x)).quantize(Decimal("0.00")) if pd.notnull(x) else None)
-                elif dtype.kind == 'O':
-                    cleaned_row.append(str(x).strip() if pd.notnull(x) else None)
-                elif table_name == "Staging_Categories" and col == "CategoryID":
-                    cleaned_row.append(int(x) if pd.notnull(x) else None)
-                elif table_name == "Staging_Categories" and col in ["CategoryName", "Description"]:
-                    cleaned_row.append(str(x).strip() if pd.notnull(x) else None)
-
-                else:
-                    cleaned_row.append(None)
-            placeholders = ", ".join(["?" for _ in cleaned_row])
-            insert_query = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
-            cursor.execute(insert_query, tuple(cleaned_row))
-        except Exception as e:
-            logger.error(f"Failed to insert row {index} into {table_name}: {e}", exc_info=True)
-    conn.commit()
-    logger.info(f"Inserted {len(df)} rows into {table_name}.")
-
-#Loading raw data in db
-def load_raw_data_to_staging(raw_data_path: str):
+def _execute_statements(backend, cursor, statements, name: str):
     """
-    Loads raw data from an Excel file into staging tables in the database.
+    Runs the statements of a failed batch one at a time, logging the ones that fail.
     """
-    conn = get_db_connection()
-    try:
-        # Load data from Excel sheets
-        df_products = pd.read_excel(raw_data_path, sheet_name='Products')
-        df_region = pd.read_excel(raw_data_path, sheet_name='Region')
-        df_shippers = pd.read_excel(raw_data_path, sheet_name='Shippers')
-        df_suppliers = pd.read_excel(raw_data_path, sheet_name='Suppliers')
-        df_suppliers.sort_values(by='Phone', ascending=True, na_position='first', inplace=True)
-        df_suppliers['Phone'] = df_suppliers['Phone'].astype(str)
-        df_suppliers.replace({np.nan: None, np.inf: None, -np.inf: None}, inplace=True)
-        df_territories = pd.read_excel(raw_data_path, sheet_name='Territories')
-        df_orders = pd.read_excel(raw_data_path, sheet_name='Orders')
-        df_customers = pd.read_excel(raw_data_path, sheet_name='Customers')
-        df_employees = pd.read_excel(raw_data_path, sheet_name='Employees')
-        df_order_details = pd.read_excel(raw_data_path, sheet_name='OrderDetails')
-        df_categories = pd.read_excel(raw_data_path, sheet_name='Categories')
-
-        # Insert data into respective tables
-        execute_sql_inserts(df_products, 'Staging_Products', conn)
-        execute_sql_inserts(df_region, 'Staging_Region', conn)
-        execute_sql_inserts(df_shippers, 'Staging_Shippers', conn)
-        execute_sql_inserts(df_suppliers, 'Staging_Suppliers', conn)
-        execute_sql_inserts(df_territories, 'Staging_Territories', conn)
-        execute_sql_inserts(df_orders, 'Staging_Orders', conn)
-        execute_sql_inserts(df_customers, 'Staging_Customers', conn)
-        execute_sql_inserts(df_employees, 'Staging_Employees', conn)
-        execute_sql_inserts(df_order_details, 'Staging_OrderDetails', conn)
-        execute_sql_inserts(df_categories, 'Staging_Categories', conn)
+    for i, statement in enumerate(statements):
+        try:
+            backend.run_batches(cursor, [statement], name=f"{name}.{i + 1}")
+        except backend.Error as e:
+            if backend.already_applied(e):
+                logger.debug(f"Statement {i + 1} of {name} already applied: {str(e)}")
+                continue
+            logger.error(f"Error executing statement {i + 1} of {name}: {str(e)}", exc_info=True)
+
+
+# Number of rows sent per executemany() round-trip when loading staging tables
+INSERT_BATCH_SIZE = 1000
 
-    except Exception as e:
-        logger.error(f"Error loading raw data to staging: {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
 
+# Fallback cleaning rule for sheet columns that are not declared in the staging DDL
+_DTYPE_KINDS = {'i': 'int', 'u': 'int', 'f': 'decimal', 'b': 'bit', 'M': 'datetime', 'O': 'str'}
 
 
-def update_dimensional_tables(query_directory: str = "pipeline_dimensional_data/queries"):
+def _clean_column(series, kind):
     """
-    Automatically updates dimensional tables by executing all SQL scripts in the specified directory.
+    Converts a whole column to the representation expected by its staging type.
 
     Args:
-        query_directory (str): Path to the directory containing SQL query files.
+        series (pd.Series): Raw column values.
+        kind (str): Cleaning rule from the staging schema ('int', 'decimal', 'str', ...).
+
+    Returns:
+        list: Column values as native Python objects, with missing values as None.
     """
-    conn = get_db_connection()
-    try:
-        sql_files = [
-            os.path.join(query_directory, file)
-            for file in os.listdir(query_directory)
-            if file.endswith('.sql')
-        ]
+    if kind == 'int':
+        cleaned = np.trunc(pd.to_numeric(series, errors='coerce')).astype('Int64')
+    elif kind == 'decimal':
+        cleaned = pd.to_numeric(series, errors='coerce').round(2)
+    elif kind == 'float':
+        cleaned = pd.to_numeric(series, errors='coerce')
+    elif kind == 'bit':
+        if series.dtype.kind == 'b':
+            cleaned = series
+        else:
+            lowered = series.astype(str).str.strip().str.lower()
+            cleaned = pd.to_numeric(
+                lowered.replace({'true': '1', 'false': '0'}), errors='coerce'
+            ).ne(0).where(series.notnull())
+    elif kind == 'datetime':
+        cleaned = pd.to_datetime(series, errors='coerce')
+    elif kind == 'date':
+        cleaned = pd.to_datetime(series, errors='coerce').dt.date
+    elif kind == 'str':
+        cleaned = series.astype(str).str.strip().where(series.notnull())
+    else:
+        return [None] * len(series)
+    return cleaned.astype(object).where(cleaned.notnull(), None).tolist()
+
+
+def _row_hash_token(value) -> str:
+    """
+    Renders a cleaned value the same way whichever source it came from, so that e.g.
+    18.0 from a workbook and '18' from a CSV file hash alike.
+    """
+    if value is None:
+        return '\x00'
+    if isinstance(value, (bool, np.bool_)):
+        return '1' if value else '0'
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return format(float(value), '.15g')
+    return str(value)
 
-        if not sql_files:
-            logger.warning(f"No SQL scripts found in directory: {query_directory}")
-            return
 
-        for script_path in sql_files:
-            try:
-                logger.info(f"Executing script: {script_path}")
+def _row_hashes(attribute_columns):
+    """
+    Hashes the tracked attributes of every row into a 16-byte digest.
 
-                with open(script_path, 'r', encoding='utf-8') as sql_file:
-                    sql_script = sql_file.read()
+    Args:
+        attribute_columns (list[list]): Cleaned values, one list per tracked attribute.
 
-                cursor = conn.cursor()
-                cursor.execute(sql_script)
-                conn.commit()
+    Returns:
+        list[bytes]: One digest per row.
+    """
+    return [
+        hashlib.blake2b('\x1f'.join(map(_row_hash_token, values)).encode('utf-8'), digest_size=16).digest()
+        for values in zip(*attribute_columns)
+    ]
 
-                logger.info(f"Successfully executed script: {script_path}")
 
-            except FileNotFoundError:
-                logger.error(f"File not found: {script_path}", exc_info=True)
-            except pyodbc.Error as e:
-                logger.error(f"Error executing script {script_path}: {str(e)}", exc_info=True)
-            except Exception as e:
-                logger.error(f"An unexpected error occurred while executing {script_path}: {str(e)}", exc_info=True)
+def _insert_columns(df, table_name):
+    """
+    Returns the staging columns a DataFrame is inserted into: its own columns, plus
+    RowHash for tables whose changes are tracked by hash.
+    """
+    columns = list(df.columns)
+    if get_row_hash_attributes(table_name):
+        columns.append(ROW_HASH_COLUMN)
+    return columns
 
-    except Exception as e:
-        logger.error(f"Error during the update process: {str(e)}", exc_info=True)
 
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+def _clean_dataframe(df, table_name):
+    """
+    Cleans every column of a DataFrame with whole-column operations and returns
+    the rows as parameter tuples. Tables with tracked attributes get the RowHash of
+    each row appended, computed from the cleaned values.
 
+    Args:
+        df (pd.DataFrame): Raw sheet data.
+        table_name (str): Target staging table.
 
-def update_fact_orders(start_date, end_date):
+    Returns:
+        list[tuple]: One tuple per row, ready for executemany.
     """
-    Updates the FactOrders table based on data in the staging and dimension tables.
-    The SQL logic is read from an external file for better separation of concerns.
+    column_types = get_staging_column_types(table_name)
+    cleaned_columns = {
+        col: _clean_column(df[col], column_types.get(col) or _DTYPE_KINDS.get(dtype.kind))
+        for col, dtype in zip(df.columns, df.dtypes)
+    }
+    columns = list(cleaned_columns.values())
+    attributes = get_row_hash_attributes(table_name)
+    if attributes:
+        missing = [None] * len(df)
+        columns.append(_row_hashes([cleaned_columns.get(attribute, missing) for attribute in attributes]))
+    return list(zip(*columns))
+
+
+def _insert_batch(conn, cursor, insert_query, batch, first_row):
     """
-    conn = get_db_connection()
+    Inserts and commits a batch with executemany, bisecting it only when the batch fails.
+
+    A failed attempt is rolled back before the halves are retried, so rows of a
+    partially applied batch are never inserted twice.
 
+    Args:
+        conn: Open database connection.
+        cursor: Database cursor with fast_executemany enabled.
+        insert_query (str): Parameterised INSERT statement.
+        batch (list[tuple]): Rows to insert.
+        first_row (int): Position of the first row of the batch in the source DataFrame.
+
+    Returns:
+        list[tuple[int, str, str]]: Position, error type and error message of every rejected row.
+    """
     try:
-        cursor = conn.cursor()
-
-        if not start_date or not end_date:
-            logger.warning("No valid date range provided. Skipping FactOrders update.")
-            return
-        
-        # Load SQL file and format with dynamic dates
-        sql_file_path = os.path.join("pipeline_dimensional_data", "queries", "update_fact.sql")
-        
-        with open(sql_file_path, "r", encoding="utf-8") as file:
-            fact_orders_query = file.read().format(start_date=start_date, end_date=end_date)
-
-        # Execute the query
-        logger.info("Updating FactOrders table...")
-        cursor.execute(fact_orders_query)
+        cursor.executemany(insert_query, batch)
         conn.commit()
-        logger.info("FactOrders table updated successfully.")
-
-    except FileNotFoundError:
-        logger.error(f"SQL file not found: {sql_file_path}", exc_info=True)
+        return []
     except Exception as e:
-        logger.error(f"Failed to update FactOrders table: {e}", exc_info=True)
-    
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+        conn.rollback()
+        if len(batch) == 1:
+            return [(first_row, _error_type(e), str(e))]
+    middle = len(batch) // 2
+    return (
+        _insert_batch(conn, cursor, insert_query, batch[:middle], first_row)
+        + _insert_batch(conn, cursor, insert_query, batch[middle:], first_row + middle)
+    )
+
+
+def _error_type(error: Exception) -> str:
+    """
+    Groups rejected rows by cause: the SQLSTATE of a pyodbc error, else the exception class.
+    """
+    if isinstance(error, pyodbc.Error) and len(error.args) > 1:
+        return f"{type(error).__name__} {error.args[0]}"
+    return type(error).__name__
+
 
-def update_fact_error_table():
+def _log_rejected_rows(df, table_name: str, errors):
     """
-    Updates the FactError table by detecting faulty records in the FactOrders pipeline.
-    Dynamically calculates the earliest and latest OrderDate from Staging_Orders.
+    Logs rejected rows as one count per error type, with the first ROW_ERROR_SAMPLES
+    rows of each type in full, instead of one line per row.
     """
-    conn = get_db_connection()
+    by_type = {}
+    for row_position, error_type, message in errors:
+        by_type.setdefault(error_type, []).append((row_position, message))
+
+    for error_type, rows in by_type.items():
+        logger.error(f"{len(rows)} rows rejected by {table_name} with {error_type}.")
+        for row_position, message in rows[:ROW_ERROR_SAMPLES]:
+            logger.error(f"Failed to insert row {df.index[row_position]} into {table_name}: {message}")
+        if len(rows) > ROW_ERROR_SAMPLES:
+            logger.error(f"{len(rows) - ROW_ERROR_SAMPLES} more {error_type} rows of {table_name} not shown.")
+
+
+def execute_sql_inserts(df, table_name, conn, batch_size: int = INSERT_BATCH_SIZE):
+    """
+    Bulk loads a DataFrame into a staging table using batched executemany calls.
+
+    Args:
+        df (pd.DataFrame): Raw sheet data.
+        table_name (str): Target staging table.
+        conn: Open database connection.
+        batch_size (int): Number of rows sent per round-trip.
 
+    Returns:
+        int: Number of rows inserted.
+    """
+    if df.empty:
+        logger.info(f"No rows to insert into {table_name}.")
+        return 0
+
+    started = time.perf_counter()
+    rows = _clean_dataframe(df, table_name)
+    columns = _insert_columns(df, table_name)
+    placeholders = ", ".join(["?" for _ in columns])
+    insert_query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    cursor = conn.cursor()
+    cursor.fast_executemany = True
+    errors = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        batch_errors = _insert_batch(conn, cursor, insert_query, batch, start)
+        if batch_errors:
+            logger.debug(
+                f"{len(batch_errors)} of {len(batch)} rows rejected by {table_name} "
+                f"in batch starting at row {start}."
+            )
+            errors.extend(batch_errors)
+    cursor.close()
+    if errors:
+        _log_rejected_rows(df, table_name, errors)
+    failed_rows = len(errors)
+    inserted = len(rows) - failed_rows
+    get_metrics().record(
+        'staging_insert', table_name,
+        duration_seconds=round(time.perf_counter() - started, 6),
+        rows_inserted=inserted,
+        rows_failed=failed_rows,
+    )
+    logger.info(f"Inserted {inserted} rows into {table_name}.")
+    return inserted
+
+
+# Sheets larger than this are split into slices loaded concurrently, each on its own connection
+STAGING_SLICE_ROWS = 100000
+
+
+def _load_staging_part(table_name: str, chunks, batch_size: int) -> dict:
+    """
+    Inserts DataFrame chunks into one staging table on a pooled connection of its own.
+    execute_sql_inserts commits every batch, so the part never holds a long transaction.
+
+    Args:
+        table_name (str): Target staging table.
+        chunks: Iterable of DataFrames.
+        batch_size (int): Number of rows sent per executemany round-trip.
+
+    Returns:
+        dict: {'success': bool, 'rows_inserted': int, 'rows_failed': int, 'duration_seconds': float},
+            plus 'error' on failure.
+    """
+    started = time.perf_counter()
+    status = {'success': True, 'rows_inserted': 0, 'rows_failed': 0}
     try:
-        # Determine date range
-        date_query = """
-        SELECT MIN(OrderDate) AS StartDate, MAX(OrderDate) AS EndDate
-        FROM dbo.Staging_Orders;
-        """
-        cursor = conn.cursor()
-        cursor.execute(date_query)
-        start_date, end_date = cursor.fetchone()
-
-        if not start_date or not end_date:
-            logger.warning("No orders found in Staging_Orders. Skipping FactError update.")
-            return
-
-        fact_error_query = """
-        INSERT INTO dbo.FactError (
-            ErrorID, Staging_Raw_ID, OrderID, CustomerID, EmployeeID, 
-            ShipVia, ProductID, OrderDate, Quantity, TotalAmount, Discount, ErrorReason
+        with get_pool().connection() as conn:
+            for chunk in chunks:
+                inserted = execute_sql_inserts(chunk, table_name, conn, batch_size)
+                status['rows_inserted'] += inserted
+                status['rows_failed'] += len(chunk) - inserted
+    except Exception as e:
+        logger.error(f"Loading {table_name} failed: {e}", exc_info=True)
+        status.update(success=False, error=str(e))
+    status['duration_seconds'] = round(time.perf_counter() - started, 6)
+    return status
+
+
+def _load_staging_parts(parts: dict, batch_size: int, load_workers: int = None) -> dict:
+    """
+    Loads independent parts of the staging tables concurrently. The staging tables have
+    no foreign keys to each other, so parts run in any order, bounded by load_workers.
+
+    Args:
+        parts (dict): {part name: (table name, iterable of DataFrames)}.
+        batch_size (int): Number of rows sent per executemany round-trip.
+        load_workers (int): Maximum number of parts loading at once. Defaults to the pool size.
+
+    Returns:
+        dict: {table name: {'success', 'rows_inserted', 'rows_failed', 'duration_seconds', 'rows_per_second'}}
+
+    Raises:
+        RuntimeError: If any part failed; the other parts are still loaded and committed.
+    """
+    results = run_dag(
+        list(parts), {},
+        lambda part: _load_staging_part(parts[part][0], parts[part][1], batch_size),
+        max_workers=load_workers or get_pool().max_size,
+    )
+
+    tables = {}
+    for part, (table_name, _) in parts.items():
+        status = results[part]
+        table = tables.setdefault(
+            table_name, {'success': True, 'rows_inserted': 0, 'rows_failed': 0, 'duration_seconds': 0}
+        )
+        table['success'] = table['success'] and status['success']
+        table['rows_inserted'] += status.get('rows_inserted', 0)
+        table['rows_failed'] += status.get('rows_failed', 0)
+        # Slices of a table run side by side, so the slowest one is the table's load time
+        table['duration_seconds'] = max(table['duration_seconds'], status.get('duration_seconds', 0))
+
+    for table_name, table in tables.items():
+        seconds = table['duration_seconds']
+        table['rows_per_second'] = round(table['rows_inserted'] / seconds, 1) if seconds else 0
+        logger.info(
+            f"Loaded {table['rows_inserted']} rows into {table_name} in {seconds:.3f}s "
+            f"({table['rows_per_second']} rows/s, {table['rows_failed']} rejected)."
         )
-        SELECT
-            NEWID() AS ErrorID,
-            so.Staging_Raw_ID,
-            so.OrderID,
-            so.CustomerID,
-            so.EmployeeID,
-            so.ShipVia,
-            sod.ProductID,
-            so.OrderDate,
-            sod.Quantity,
-            sod.UnitPrice * sod.Quantity AS TotalAmount,
-            sod.Discount,
-            CASE
-                WHEN dc.CustomerKey IS NULL THEN 'Missing Customer'
-                WHEN de.EmployeeKey IS NULL THEN 'Missing Employee'
-                WHEN ds.ShipperKey IS NULL THEN 'Missing Shipper'
-                WHEN dp.ProductKey IS NULL THEN 'Missing Product'
-                WHEN sod.Quantity <= 0 THEN 'Invalid Quantity'
-                WHEN sod.UnitPrice * sod.Quantity <= 0 THEN 'Invalid Amount'
-                WHEN sod.Discount < 0 THEN 'Invalid Discount'
-                ELSE 'Unknown Error'
-            END AS ErrorReason
-        FROM dbo.Staging_Orders so
-        JOIN dbo.Staging_OrderDetails sod ON sod.OrderID = so.OrderID
-        LEFT JOIN dbo.DimCustomers dc ON so.CustomerID = dc.CustomerID
-        LEFT JOIN dbo.DimEmployees de ON so.EmployeeID = de.EmployeeID
-        LEFT JOIN dbo.DimShippers ds ON so.ShipVia = ds.ShipperID
-        LEFT JOIN dbo.DimProducts dp ON sod.ProductID = dp.ProductID
-        WHERE so.OrderDate BETWEEN ? AND ?
-        AND (
-            dc.CustomerKey IS NULL OR
-            de.EmployeeKey IS NULL OR
-            ds.ShipperKey IS NULL OR
-            dp.ProductKey IS NULL OR
-            sod.Quantity <= 0 OR
-            sod.UnitPrice * sod.Quantity <= 0 OR
-            sod.Discount < 0
-        );
-        """
-
-        logger.info("Inserting records into FactError table...")
-        cursor.execute(fact_error_query, (start_date, end_date))
-        conn.commit()
-        logger.info("FactError table updated successfully.")
 
-    except Exception as e:
-        logger.error(f"Failed to update FactError table: {e}", exc_info=True)
+    failed = [table_name for table_name, table in tables.items() if not table['success']]
+    if failed:
+        raise RuntimeError(f"Staging load failed for: {', '.join(failed)}")
+    return tables
 
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
 
+#Loading raw data in db
+def load_raw_data_to_staging(raw_data_path: str, batch_size: int = INSERT_BATCH_SIZE,
+                             max_workers: int = 1, use_cache: bool = True, load_workers: int = None,
+                             slice_rows: int = STAGING_SLICE_ROWS) -> dict:
+    """
+    Loads raw data from an Excel file into staging tables in the database.
 
-def populate_dim_sor():
-    conn = get_db_connection()
-    sql_file_path = os.path.join("pipeline_dimensional_data", "queries", "update_dim_sor.sql")
-    
-    try:
-        # Read SQL script from file
-        with open(sql_file_path, "r", encoding="utf-8") as file:
-            query = file.read()
+    Every sheet, and every slice of slice_rows rows of a large sheet, is inserted by
+    its own worker on its own connection, so the load takes about as long as its
+    largest part rather than the sum of all sheets.
 
-        cursor = conn.cursor()
-        cursor.execute(query)
-        conn.commit()
-        print("Dim_SOR table populated successfully.")
-        
-    except FileNotFoundError:
-        print(f"SQL file not found: {sql_file_path}", exc_info=True)
-        
-    except Exception as e:
-        print(f"Failed to populate Dim_SOR: {e}", exc_info=True)
-        
-    finally:
-        conn.close()
+    Args:
+        raw_data_path (str): Path to the Excel workbook.
+        batch_size (int): Number of rows sent per executemany round-trip.
+        max_workers (int): Number of processes used to parse the workbook sheets.
+        use_cache (bool): Whether to reuse the parsed-workbook cache.
+        load_workers (int): Maximum number of parts inserted at once. Defaults to the pool size.
+        slice_rows (int): Sheets with more rows are split into slices of this size.
+
+    Returns:
+        dict: Per staging table load statistics, see _load_staging_parts.
+    """
+    # Load every sheet from a single pass over the workbook
+    frames = read_workbook(raw_data_path, max_workers=max_workers, use_cache=use_cache)
+    frames['Suppliers'] = frames['Suppliers'].sort_values(by='Phone', ascending=True, na_position='first')
+
+    parts = {}
+    for sheet_name, table_name in STAGING_SHEETS.items():
+        frame = frames[sheet_name]
+        if len(frame) <= slice_rows:
+            parts[table_name] = (table_name, [frame])
+            continue
+        for start in range(0, len(frame), slice_rows):
+            end = start + slice_rows
+            parts[f"{table_name}[{start}:{end}]"] = (table_name, [frame.iloc[start:end]])
+    return _load_staging_parts(parts, batch_size, load_workers)
+
+
+def stream_raw_data_to_staging(raw_data_path: str, chunk_size: int = STREAM_CHUNK_SIZE,
+                               batch_size: int = INSERT_BATCH_SIZE, load_workers: int = None) -> dict:
+    """
+    Streams raw data into staging tables in bounded chunks, so memory stays flat
+    regardless of the size of the source.
+
+    Sheets are streamed concurrently, each by its own worker on its own connection,
+    so up to load_workers chunks are held in memory at once.
+
+    Unlike load_raw_data_to_staging, rows are inserted in source order (Suppliers
+    are not sorted by Phone).
+
+    Args:
+        raw_data_path (str): Path to the Excel workbook or to a directory of <sheet>.csv files.
+        chunk_size (int): Maximum number of rows held in memory at once per sheet.
+        batch_size (int): Number of rows sent per executemany round-trip.
+        load_workers (int): Maximum number of sheets streamed at once. Defaults to the pool size.
+
+    Returns:
+        dict: Per staging table load statistics, see _load_staging_parts.
+    """
+    parts = {
+        table_name: (table_name, iter_sheet_chunks(raw_data_path, sheet_name, chunk_size))
+        for sheet_name, table_name in STAGING_SHEETS.items()
+    }
+    return _load_staging_parts(parts, batch_size, load_workers)